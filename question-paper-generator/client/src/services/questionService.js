@@ -9,6 +9,8 @@ const questionService = {
       // Add filters to query params
       if (filters.page) params.append('page', filters.page);
       if (filters.page_size) params.append('page_size', filters.page_size);
+      if (filters.cursor) params.append('cursor', filters.cursor);
+      if (filters.include_facets) params.append('include_facets', 'true');
       if (filters.subject) params.append('subject', filters.subject);
       if (filters.class_grade) params.append('class_grade', filters.class_grade);
       if (filters.topic) params.append('topic', filters.topic);
@@ -81,6 +83,20 @@ const questionService = {
     }
   },
 
+  // Star or unstar several questions at once
+  setStarred: async (ids, isStarred) => {
+    try {
+      const response = await api.patch('/questions/star', {
+        question_ids: ids,
+        is_starred: isStarred,
+      });
+      return response.data;
+    } catch (error) {
+      console.error('Error updating stars:', error);
+      throw error;
+    }
+  },
+
   // Get statistics
   getStatistics: async () => {
     try {
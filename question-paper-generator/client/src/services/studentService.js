@@ -1,6 +1,12 @@
 import api from './api';
 
 const studentService = {
+  // Dashboard: counts and latest summaries of all four listings in one call
+  getDashboard: async (recent = 5) => {
+    const response = await api.get('/student/dashboard', { params: { recent } });
+    return response.data;
+  },
+
   // Notes
   createNote: async (title, content, sourcePdfName) => {
     const response = await api.post('/student/notes', {
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
 from app.core.auth_deps import get_current_user
-from typing import Optional
-from app.services.ai_service import AIService
+from typing import TYPE_CHECKING, Optional
 from app.core.database import get_supabase
 from supabase import Client
 import os
@@ -15,9 +14,13 @@ logger = logging.getLogger(__name__)
 
 from functools import lru_cache
 
+if TYPE_CHECKING:
+    from app.services.ai_service import AIService
+
 @lru_cache()
-def get_ai_service() -> AIService:
-    """Get AI service singleton instance"""
+def get_ai_service() -> "AIService":
+    """Get AI service singleton instance (google-genai, PyPDF2 etc. load on first use)"""
+    from app.services.ai_service import AIService
     try:
         return AIService()
     except ValueError as e:
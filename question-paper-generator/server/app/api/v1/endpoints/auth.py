@@ -2,8 +2,8 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.models.user import UserCreate, UserLogin, User, TokenResponse, UserUpdate
 from app.services.auth_service import AuthService, SECRET_KEY, ALGORITHM
-from app.core.database import get_supabase
-from supabase import Client
+from app.core.database import Database, get_db
+from app.core.password_hasher import PasswordHasherBusy
 from uuid import UUID
 from jose import JWTError, jwt
 import os
@@ -14,8 +14,8 @@ security = HTTPBearer()
 # `SECRET_KEY` and `ALGORITHM` are imported from `auth_service` to ensure
 # a single source of truth and to force requiring a secure secret via env.
 
-def get_auth_service(supabase: Client = Depends(get_supabase)) -> AuthService:
-    return AuthService(supabase)
+def get_auth_service(db: Database = Depends(get_db)) -> AuthService:
+    return AuthService(db)
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -45,6 +45,13 @@ async def get_current_user(
         )
     return user
 
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Too many sign-ins in progress, please retry",
+        headers={"Retry-After": "1"}
+    )
+
 @router.post("/register", response_model=TokenResponse, status_code=201)
 async def register(
     user_data: UserCreate,
@@ -54,6 +61,8 @@ async def register(
     try:
         result = await service.register_user(user_data)
         return TokenResponse(**result)
+    except PasswordHasherBusy:
+        raise _busy()
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -70,7 +79,10 @@ async def login(
     service: AuthService = Depends(get_auth_service)
 ):
     """Login and get access token"""
-    result = await service.authenticate_user(login_data)
+    try:
+        result = await service.authenticate_user(login_data)
+    except PasswordHasherBusy:
+        raise _busy()
     if not result:
         raise HTTPException(
             status_code=401,
@@ -2,14 +2,13 @@ from fastapi import APIRouter, HTTPException, Depends
 from app.core.auth_deps import get_current_user
 from app.models.profile import Profile, ProfileCreate, ProfileUpdate
 from app.services.profile_service import ProfileService
-from app.core.database import get_supabase
-from supabase import Client
+from app.core.database import Database, get_db
 from typing import Optional
 
 router = APIRouter()
 
-def get_profile_service(supabase: Client = Depends(get_supabase)) -> ProfileService:
-    return ProfileService(supabase)
+def get_profile_service(db: Database = Depends(get_db)) -> ProfileService:
+    return ProfileService(db)
 
 @router.post("/profile", response_model=Profile, status_code=201)
 async def create_or_update_profile(
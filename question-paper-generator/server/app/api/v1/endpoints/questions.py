@@ -1,32 +1,77 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
+from typing import TYPE_CHECKING, List, Optional
 from uuid import UUID
-from fastapi.responses import StreamingResponse
-from app.services.pdf_service import PDFService
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import asyncio
+from functools import lru_cache
 import io
+import json
+import logging
 from app.schemas.pdf_request import PDFRequest
+from app.schemas.paper_blueprint import PaperBlueprint
 from app.models.question import (
     Question, 
     QuestionCreate, 
     QuestionUpdate, 
     QuestionFilter,
     QuestionListResponse,
+    QuestionStarUpdate,
     QuestionType
 )
-from app.services.question_service import QuestionService
-from app.core.database import get_supabase
-from supabase import Client
+from app.services.question_service import (
+    QuestionService,
+    PDF_RENDER_COLUMNS,
+    QUESTION_FIELDS,
+    QUESTION_SUMMARY_FIELDS
+)
+from app.services.question_import_service import QuestionImportService, SUPPORTED_FORMATS
+from app.services.paper_assembly_service import PaperAssemblyService
+from app.services.question_similarity import DUPLICATE_THRESHOLD
+from app.core.database import Database, get_db
+from app.core.fields import select_columns
+
+if TYPE_CHECKING:
+    from app.services.pdf_service import PDFService
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+
+class RequestBodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for handlers that keep reading the request body while
+    they respond. Starlette's version listens for a client disconnect on the
+    same receive channel, which swallows the remaining body chunks and stalls
+    the reader; a disconnect still surfaces as a failed send.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+@lru_cache()
+def get_pdf_service() -> "PDFService":
+    """
+    Shared PDF service (its style sheet is built once, not per paper).
+    Imported on first use, so workers that never render a paper skip ReportLab.
+    """
+    from app.services.pdf_service import PDFService
+    return PDFService()
+
 # Dependency to get question service
-def get_question_service(supabase: Client = Depends(get_supabase)) -> QuestionService:
-    return QuestionService(supabase)
+def get_question_service(db: Database = Depends(get_db)) -> QuestionService:
+    return QuestionService(db)
 
-@router.get("/", response_model=QuestionListResponse)
+@router.get("/", response_model=QuestionListResponse, response_model_exclude_unset=True)
 async def get_questions(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor"),
+    include_total: bool = Query(True, description="Include an estimated total count"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, or 'summary'"),
+    include_facets: bool = Query(False, description="Include counts per subject, topic, difficulty and type"),
     subject: Optional[str] = None,
     class_grade: Optional[str] = None,
     topic: Optional[str] = None,
@@ -40,15 +85,19 @@ async def get_questions(
     """
     Get paginated list of questions with optional filters.
     
-    - **page**: Page number (default: 1)
+    - **page**: Page number (default: 1); ignored when a cursor is given
     - **page_size**: Number of items per page (default: 20, max: 100)
+    - **cursor**: Continue after the last page using its `next_cursor`
+    - **include_total**: Return an estimated total (default: true)
+    - **fields**: Only return these fields (`id`, `created_at` always included), or `summary`
+    - **include_facets**: Also return counts per subject, topic, difficulty and type for these filters
     - **subject**: Filter by subject
     - **class_grade**: Filter by class/grade
     - **topic**: Filter by topic
     - **difficulty**: Filter by difficulty (EASY, MEDIUM, HARD)
     - **question_type**: Filter by type (MCQ, LONG, TRUE_FALSE, FILL_BLANK)
     - **is_starred**: Filter by starred status
-    - **search**: Search in question text
+    - **search**: Ranked search in question text, topic, options and answer (typo tolerant)
     """
     # Create filter object
     filters = QuestionFilter(
@@ -63,21 +112,36 @@ async def get_questions(
     )
     
     # Get questions
-    questions_data, total = await service.get_all_questions(filters, page, page_size)
-    
-    # Convert to Pydantic models
-    questions = [Question(**q) for q in questions_data]
+    try:
+        columns = select_columns(fields, QUESTION_FIELDS, QUESTION_SUMMARY_FIELDS)
+        listing = service.get_all_questions(
+            filters, page, page_size, cursor=cursor, include_total=include_total, columns=columns
+        )
+        if include_facets:
+            (questions_data, total, next_cursor), facets = await asyncio.gather(
+                listing, service.get_facets(filters)
+            )
+        else:
+            questions_data, total, next_cursor = await listing
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Calculate total pages
-    total_pages = (total + page_size - 1) // page_size
+    # Rows come straight from our own table with known columns: serialize them
+    # as-is instead of re-validating every question through Pydantic
+    # (QuestionListResponse still documents the shape)
+    total_pages = (total + page_size - 1) // page_size if total is not None else None
     
-    return QuestionListResponse(
-        questions=questions,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
-    )
+    response = {
+        "questions": questions_data,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages,
+        "next_cursor": next_cursor,
+    }
+    if include_facets:
+        response["facets"] = facets
+    return ORJSONResponse(response)
 
 @router.get("/{question_id}", response_model=Question)
 async def get_question(
@@ -119,6 +183,15 @@ async def delete_question(
     
     return None
 
+@router.patch("/star")
+async def set_questions_starred(
+    request: QuestionStarUpdate,
+    service: QuestionService = Depends(get_question_service)
+):
+    """Star or unstar several questions at once. Returns the ids whose status changed."""
+    updated_ids = await service.set_starred(request.question_ids, request.is_starred)
+    return {"updated": len(updated_ids), "question_ids": updated_ids}
+
 @router.patch("/{question_id}/star", response_model=Question)
 async def toggle_star_question(
     question_id: UUID,
@@ -135,37 +208,126 @@ async def toggle_star_question(
 @router.post("/", response_model=Question, status_code=201)
 async def create_question(
     question: QuestionCreate,
+    response: Response,
     service: QuestionService = Depends(get_question_service)
 ):
-    """Create a new question"""
-    question_data = await service.create_question(question)
+    """
+    Create a new question. Near-duplicates already in the bank are listed in X-Near-Duplicate-Ids.
+    
+    The lookup is advisory: it runs alongside the insert, and if it fails the
+    question is still created (the header is then left out).
+    """
+    row = question.model_dump(exclude_unset=True)
+    lookup = asyncio.ensure_future(service.find_near_duplicates([row]))
+    try:
+        question_data = await service.create_question(question)
+    except BaseException:
+        lookup.cancel()
+        raise
+    
+    try:
+        (matches,) = await lookup
+    except Exception as e:
+        logger.warning(f"Near-duplicate lookup failed for new question {question_data['id']}: {type(e).__name__}: {e}")
+    else:
+        response.headers["X-Near-Duplicate-Ids"] = ",".join(
+            m["id"] for m in matches if m["id"] != str(question_data["id"])
+        )
     return Question(**question_data)
 
+@router.post("/duplicates/check")
+async def check_duplicates(
+    question: QuestionCreate,
+    service: QuestionService = Depends(get_question_service)
+):
+    """Find existing questions that are near-duplicates of this one (nothing is written)"""
+    (matches,) = await service.find_near_duplicates([question.model_dump(exclude_unset=True)])
+    return {"matches": matches}
+
+@router.get("/duplicates/report")
+async def get_duplicate_report(
+    subject: Optional[str] = None,
+    threshold: float = Query(DUPLICATE_THRESHOLD, ge=0.5, le=1.0, description="Minimum estimated similarity"),
+    service: QuestionService = Depends(get_question_service)
+):
+    """Clusters of near-duplicate questions across the bank (or one subject)"""
+    return await service.get_duplicate_report(subject=subject, threshold=threshold)
+
+# Content types accepted by /import when no explicit format is given
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/x-jsonlines": "jsonl",
+}
+
+@router.post("/import")
+async def import_questions(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", description="csv or jsonl (default: from Content-Type)"),
+    service: QuestionService = Depends(get_question_service)
+):
+    """
+    Bulk import questions from a CSV (with a header row) or JSON Lines body.
+    
+    Rows are validated as they stream in and written in batches; rows with an
+    `id` update the existing question. The response is NDJSON: one `error`
+    event per rejected row, a `progress` event after each batch and a final
+    `summary`. If the database becomes unavailable the import stops with an
+    error event (`row` is null) followed by the summary.
+    """
+    if not fmt:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        fmt = IMPORT_CONTENT_TYPES.get(content_type)
+    
+    if fmt not in SUPPORTED_FORMATS:
+        raise HTTPException(
+            status_code=415,
+            detail="Send text/csv or application/x-ndjson, or pass format=csv|jsonl"
+        )
+    
+    importer = QuestionImportService(service)
+    
+    async def events():
+        async for event in importer.import_stream(request.stream(), fmt):
+            yield json.dumps(event) + "\n"
+    
+    return RequestBodyStreamingResponse(events(), media_type="application/x-ndjson")
+
 @router.get("/stats/overview")
 async def get_statistics(
+    category: Optional[str] = None,
+    user_id: Optional[UUID] = None,
     service: QuestionService = Depends(get_question_service)
 ):
-    """Get statistics about questions (counts by type, subject, difficulty, etc.)"""
-    stats = await service.get_statistics()
+    """
+    Get statistics about questions (counts by type, subject, difficulty, etc.)
+    
+    - **category**: Only count questions in this category
+    - **user_id**: Only count questions owned by this user
+    """
+    stats = await service.get_statistics(category=category, user_id=user_id)
     return stats
 
 @router.post("/generate-pdf")
 async def generate_pdf(
     request: PDFRequest,
-    service: QuestionService = Depends(get_question_service)
+    service: QuestionService = Depends(get_question_service),
+    pdf_service: "PDFService" = Depends(get_pdf_service)
 ):
-    """Generate PDF from selected questions"""
-    questions_data = []
+    """Generate PDF from selected questions (fetched in one query, in request order)"""
+    try:
+        question_ids = [UUID(qid) for qid in request.question_ids]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid question id")
     
-    for qid in request.question_ids:
-        q = await service.get_question_by_id(UUID(qid))
-        if q:
-            questions_data.append(q)
+    questions_data, missing_ids = await service.get_questions_by_ids(
+        question_ids, columns=PDF_RENDER_COLUMNS
+    )
     
     if not questions_data:
         raise HTTPException(status_code=400, detail="No valid questions provided")
     
-    pdf_service = PDFService()
     pdf_bytes = pdf_service.generate_pdf(
         questions_data, 
         request.title,
@@ -174,8 +336,39 @@ async def generate_pdf(
         total_marks_override=request.total_marks
     )
     
+    return StreamingResponse(
+        io.BytesIO(pdf_bytes),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f"attachment; filename=question_paper.pdf",
+            "X-Missing-Question-Ids": ",".join(missing_ids)
+        }
+    )
+
+@router.post("/assemble")
+async def assemble_paper(
+    blueprint: PaperBlueprint,
+    db: Database = Depends(get_db),
+    pdf_service: "PDFService" = Depends(get_pdf_service)
+):
+    """Assemble a paper from the question bank to match a blueprint (JSON, or a PDF with output=pdf)"""
+    paper = await PaperAssemblyService(db).assemble(blueprint)
+    
+    if not paper.questions:
+        raise HTTPException(status_code=404, detail="No questions match the blueprint")
+    
+    if blueprint.output == "json":
+        return paper
+    
+    pdf_bytes = pdf_service.generate_pdf(
+        paper.questions,
+        blueprint.title,
+        duration=blueprint.duration,
+        instructions=blueprint.instructions
+    )
+    
     return StreamingResponse(
         io.BytesIO(pdf_bytes),
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename=question_paper.pdf"}
-    )
\ No newline at end of file
+    )
@@ -1,19 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends, Header, Body
+from fastapi import APIRouter, HTTPException, Depends, Header, Body, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 from app.core.auth_deps import get_current_user
 from typing import List, Optional, Dict, Any
-from app.services.student_service import StudentService
+from app.services.student_service import (
+    StudentService,
+    NOTE_FIELDS, NOTE_SUMMARY_FIELDS,
+    FLASHCARD_FIELDS, FLASHCARD_SUMMARY_FIELDS,
+    QUIZ_FIELDS, QUIZ_SUMMARY_FIELDS,
+    MINDMAP_FIELDS, MINDMAP_SUMMARY_FIELDS
+)
 from app.services.profile_service import ProfileService
-from app.core.database import get_supabase
-from supabase import Client
+from app.core.database import Database, get_db
+from app.core.fields import get_columns
+from app.core.conditional import make_etag, http_date, is_conditional, not_modified
 from pydantic import BaseModel
 from uuid import UUID
 
 router = APIRouter()
 
-def get_services(supabase: Client = Depends(get_supabase)):
+def get_services(db: Database = Depends(get_db)):
     return {
-        "student": StudentService(supabase),
-        "profile": ProfileService(supabase)
+        "student": StudentService(db),
+        "profile": ProfileService(db)
     }
 
 # Pydantic models
@@ -37,14 +45,82 @@ class MindMapCreate(BaseModel):
     data: Dict[str, Any]
     source_pdf_name: Optional[str] = None
 
+# Page size for a cursor sent without a limit
+DEFAULT_PAGE_SIZE = 50
+
+FIELDS_QUERY = Query(None, description="Comma-separated fields to return, or 'summary'")
+LIMIT_QUERY = Query(
+    None, ge=1, le=200,
+    description=f"Items per page (default: every item, or {DEFAULT_PAGE_SIZE} when a cursor is given)"
+)
+CURSOR_QUERY = Query(None, description="Opaque cursor from a previous page's X-Next-Cursor header")
+
 # Helper to get internal user ID
 async def get_internal_user_id(user: dict, profile_service: ProfileService) -> str:
-    # Use user.id (object notation)
-    profile = await profile_service.get_profile_by_user_id(user.id)
+    # Role checks only need the identity (token claims or cached profile)
+    profile = await profile_service.get_identity(user)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found. Please complete onboarding.")
     return profile["id"]
 
+async def conditional_listing(
+    request: Request,
+    student: StudentService,
+    listing: str,
+    user_id: str,
+    columns: str,
+    limit: Optional[int],
+    cursor: Optional[str]
+):
+    """
+    One page of a student listing as a JSON array, newest first.
+    
+    Without `limit` and `cursor` the whole listing is returned, as before
+    pagination existed. Otherwise the next page's cursor is sent in X-Next-Cursor. Content is append-only,
+    so the newest row on the page identifies it: it is the ETag and
+    Last-Modified, and a conditional request whose copy is current gets a
+    304 after a one-row lookup instead of the full content.
+    """
+    def validators(newest):
+        etag = make_etag(listing, user_id, columns, limit, cursor, newest and newest["id"], newest and newest["created_at"])
+        return etag, http_date(newest["created_at"]) if newest else None
+    
+    def cache_headers(etag, last_modified):
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if last_modified:
+            headers["Last-Modified"] = last_modified
+        return headers
+    
+    if cursor and limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    
+    try:
+        if is_conditional(request):
+            etag, last_modified = validators(await student.get_latest(listing, user_id, cursor))
+            if not_modified(request, etag, last_modified):
+                return Response(status_code=304, headers=cache_headers(etag, last_modified))
+        
+        rows, next_cursor = await getattr(student, f"get_{listing}")(user_id, columns, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    headers = cache_headers(*validators(rows[0] if rows else None))
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return ORJSONResponse(rows, headers=headers)
+
+# --- Dashboard ---
+
+@router.get("/dashboard")
+async def get_dashboard(
+    recent: int = Query(5, ge=1, le=20, description="Latest items per listing"),
+    user: dict = Depends(get_current_user),
+    services: dict = Depends(get_services)
+):
+    """Counts and latest summaries of notes, flashcards, quizzes and mind maps in one call"""
+    user_id = await get_internal_user_id(user, services["profile"])
+    return ORJSONResponse(await services["student"].get_dashboard(user_id, recent))
+
 # --- Notes Endpoints ---
 
 @router.post("/notes")
@@ -59,11 +135,16 @@ async def create_note(
 
 @router.get("/notes")
 async def get_notes(
+    request: Request,
+    fields: Optional[str] = FIELDS_QUERY,
+    limit: Optional[int] = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
     user: dict = Depends(get_current_user),
     services: dict = Depends(get_services)
 ):
+    columns = get_columns(fields, NOTE_FIELDS, NOTE_SUMMARY_FIELDS)
     user_id = await get_internal_user_id(user, services["profile"])
-    return await services["student"].get_notes(user_id)
+    return await conditional_listing(request, services["student"], "notes", user_id, columns, limit, cursor)
 
 # --- Flashcards Endpoints ---
 
@@ -79,11 +160,16 @@ async def create_flashcards(
 
 @router.get("/flashcards")
 async def get_flashcards(
+    request: Request,
+    fields: Optional[str] = FIELDS_QUERY,
+    limit: Optional[int] = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
     user: dict = Depends(get_current_user),
     services: dict = Depends(get_services)
 ):
+    columns = get_columns(fields, FLASHCARD_FIELDS, FLASHCARD_SUMMARY_FIELDS)
     user_id = await get_internal_user_id(user, services["profile"])
-    return await services["student"].get_flashcards(user_id)
+    return await conditional_listing(request, services["student"], "flashcards", user_id, columns, limit, cursor)
 
 # --- Quiz Endpoints ---
 
@@ -99,11 +185,16 @@ async def create_quiz(
 
 @router.get("/quizzes")
 async def get_quizzes(
+    request: Request,
+    fields: Optional[str] = FIELDS_QUERY,
+    limit: Optional[int] = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
     user: dict = Depends(get_current_user),
     services: dict = Depends(get_services)
 ):
+    columns = get_columns(fields, QUIZ_FIELDS, QUIZ_SUMMARY_FIELDS)
     user_id = await get_internal_user_id(user, services["profile"])
-    return await services["student"].get_quizzes(user_id)
+    return await conditional_listing(request, services["student"], "quizzes", user_id, columns, limit, cursor)
 
 # --- Mind Map Endpoints ---
 
@@ -119,8 +210,13 @@ async def create_mindmap(
 
 @router.get("/mindmaps")
 async def get_mindmaps(
+    request: Request,
+    fields: Optional[str] = FIELDS_QUERY,
+    limit: Optional[int] = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
     user: dict = Depends(get_current_user),
     services: dict = Depends(get_services)
 ):
+    columns = get_columns(fields, MINDMAP_FIELDS, MINDMAP_SUMMARY_FIELDS)
     user_id = await get_internal_user_id(user, services["profile"])
-    return await services["student"].get_mindmaps(user_id)
+    return await conditional_listing(request, services["student"], "mindmaps", user_id, columns, limit, cursor)
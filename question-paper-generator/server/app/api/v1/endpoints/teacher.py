@@ -1,25 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends, Header, Body
+from fastapi import APIRouter, HTTPException, Depends, Header, Body, Query
+from fastapi.responses import ORJSONResponse
 from app.core.auth_deps import get_current_user
 from typing import List, Optional, Dict, Any
-from app.services.teacher_service import TeacherService
+from app.services.teacher_service import TeacherService, PAPER_FIELDS, PAPER_SUMMARY_FIELDS
 from app.services.profile_service import ProfileService
-from app.core.database import get_supabase
-from supabase import Client
+from app.core.database import Database, get_db
+from app.core.fields import get_columns
 from pydantic import BaseModel
 from uuid import UUID
 
 router = APIRouter()
 
-def get_services(supabase: Client = Depends(get_supabase)):
+def get_services(db: Database = Depends(get_db)):
     return {
-        "teacher": TeacherService(supabase),
-        "profile": ProfileService(supabase)
+        "teacher": TeacherService(db),
+        "profile": ProfileService(db)
     }
 
 # Helper to get internal user ID
 async def get_internal_user_id(user: dict, profile_service: ProfileService) -> str:
-    # Use user.id (object notation)
-    profile = await profile_service.get_profile_by_user_id(user.id)
+    # Role checks only need the identity (token claims or cached profile)
+    profile = await profile_service.get_identity(user)
     if not profile:
         raise HTTPException(status_code=400, detail="Profile not found. Please complete onboarding.")
     if profile.get("role") != "teacher":
@@ -56,8 +57,11 @@ async def create_paper(
 
 @router.get("/papers")
 async def get_papers(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, or 'summary'"),
     user: dict = Depends(get_current_user),
     services: dict = Depends(get_services)
 ):
+    columns = get_columns(fields, PAPER_FIELDS, PAPER_SUMMARY_FIELDS)
     user_id = await get_internal_user_id(user, services["profile"])
-    return await services["teacher"].get_papers(user_id)
+    # Trusted rows (papers embed their full question lists): serialize directly
+    return ORJSONResponse(await services["teacher"].get_papers(user_id, columns))
@@ -1,39 +1,70 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 from supabase import Client
 from app.core.database import get_supabase
+from app.core.jwt_verifier import jwt_verifier, TokenVerificationError, VerifierUnavailable
+from app.models.user import AuthenticatedUser
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
+# Verify tokens locally (see jwt_verifier); set to false to always ask Supabase Auth
+AUTH_LOCAL_VERIFY = os.getenv("AUTH_LOCAL_VERIFY", "true").lower() == "true"
+
+def _unauthorized() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=f"Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+async def _get_user_from_auth_server(supabase: Client, token: str) -> AuthenticatedUser:
+    """Ask Supabase Auth about the token (a network round trip, kept off the event loop)"""
+    user_response = await run_in_threadpool(supabase.auth.get_user, token)
+    
+    if not user_response or not user_response.user:
+        raise _unauthorized()
+    
+    user = user_response.user
+    return AuthenticatedUser(
+        id=str(user.id),
+        email=user.email,
+        role=user.role,
+        user_metadata=user.user_metadata or {},
+        app_metadata=user.app_metadata or {}
+    )
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     supabase: Client = Depends(get_supabase)
-) -> dict:
+) -> AuthenticatedUser:
     """
-    Verifies the Supabase JWT token and returns the user object.
+    Verifies the Supabase JWT token and returns the user.
+    
+    The signature, expiry and audience are checked locally against the cached
+    signing keys. Supabase Auth is only asked when no key material is
+    available (or AUTH_LOCAL_VERIFY is off).
     """
     token = credentials.credentials
     
+    if AUTH_LOCAL_VERIFY:
+        try:
+            claims = await jwt_verifier.verify(token)
+            return AuthenticatedUser.from_claims(claims)
+        except TokenVerificationError as e:
+            logger.info(f"Rejected token: {str(e)}")
+            raise _unauthorized()
+        except VerifierUnavailable as e:
+            logger.warning(f"Local token verification unavailable ({str(e)}); asking Supabase Auth")
+    
     try:
-        # Verify the token by getting the user from Supabase Auth
-        # This checks the validity of the JWT signature and expiration
-        user_response = supabase.auth.get_user(token)
-        
-        if not user_response or not user_response.user:
-             raise HTTPException(
-                 status_code=status.HTTP_401_UNAUTHORIZED, 
-                 detail="Invalid authentication credentials"
-             )
-        
-        return user_response.user
-        
+        return await _get_user_from_auth_server(supabase, token)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Auth error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized()
@@ -0,0 +1,64 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from app.core.metrics import CACHE_LOOKUPS
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Small in-process cache with per-entry expiry.
+    Size is bounded; the least recently used entry is evicted first.
+    Lookups of a named cache are counted in cache_lookups_total.
+    """
+
+    def __init__(self, ttl_seconds: float, maxsize: int = 1024, name: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = CACHE_LOOKUPS.labels(name, "hit") if name else None
+        self._misses = CACHE_LOOKUPS.labels(name, "miss") if name else None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] <= time.monotonic():
+                del self._data[key]
+                entry = _MISSING
+            if entry is _MISSING:
+                if self._misses:
+                    self._misses.inc()
+                return default
+            self._data.move_to_end(key)
+            if self._hits:
+                self._hits.inc()
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop every entry for which predicate(key, value) is true. Returns how many were dropped."""
+        with self._lock:
+            doomed = [k for k, (_, v) in self._data.items() if predicate(k, v)]
+            for k in doomed:
+                del self._data[k]
+            return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,44 @@
+import hashlib
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request
+
+def make_etag(*parts) -> str:
+    """Weak validator built from the values that determine a response"""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+def http_date(timestamp: Optional[str]) -> Optional[str]:
+    """Format an ISO timestamp (as returned by PostgREST) for Last-Modified"""
+    if not timestamp:
+        return None
+    try:
+        value = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return format_datetime(value.replace(microsecond=0), usegmt=True) if value.tzinfo else None
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+def not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    """
+    Whether the client's copy is current (RFC 9110: If-None-Match wins over
+    If-Modified-Since when both are sent).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        # Weak comparison: W/"x" matches "x"
+        bare = etag.removeprefix("W/")
+        return "*" in tags or any(t.removeprefix("W/") == bare for t in tags)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
@@ -1,7 +1,18 @@
 from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient
 from dotenv import load_dotenv
+from typing import Dict, Union
+import asyncio
+import logging
+import sys
+import time
+import httpx
 import os
 
+from app.core.metrics import DB_QUERY_ERRORS, DB_QUERY_SECONDS
+
+logger = logging.getLogger(__name__)
+
 # Load environment variables
 load_dotenv()
 
@@ -16,9 +27,118 @@ if not SUPABASE_URL or not SUPABASE_KEY:
         "Please set SUPABASE_URL and SUPABASE_KEY (or SUPABASE_SERVICE_KEY) in .env file"
     )
 
-# Create Supabase client
+# Data access tuning
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_QUERY_TIMEOUT = float(os.getenv("DB_QUERY_TIMEOUT", "10"))
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "500"))
+
+# Create Supabase client (used for Supabase Auth)
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 def get_supabase() -> Client:
     """Dependency to get Supabase client"""
-    return supabase
\ No newline at end of file
+    return supabase
+
+
+class DatabaseTimeout(Exception):
+    """A query did not complete within the database timeout"""
+
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """AsyncPostgrestClient whose HTTP session keeps a bounded connection pool"""
+
+    def __init__(self, base_url: str, *, headers: Dict[str, str], timeout: float, pool_size: int):
+        # create_session() is called from the parent constructor
+        self.pool_size = pool_size
+        super().__init__(base_url, headers=headers, timeout=timeout)
+
+    def create_session(
+        self,
+        base_url: str,
+        headers: Dict[str, str],
+        timeout: Union[int, float, httpx.Timeout],
+    ) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size
+            ),
+        )
+
+
+class Database:
+    """
+    Non-blocking PostgREST access shared by all services.
+
+    Build queries with `table()` / `rpc()` and run them with `await execute(query)`.
+    Every query is bounded by `timeout` (DatabaseTimeout is raised past it) and
+    its latency is exported per endpoint (db_query_duration_seconds).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        pool_size: int = DB_POOL_SIZE,
+        timeout: float = DB_QUERY_TIMEOUT
+    ):
+        self.timeout = timeout
+        self.client = PooledPostgrestClient(
+            f"{url}/rest/v1",
+            headers={
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+            },
+            timeout=timeout,
+            pool_size=pool_size,
+        )
+
+    def table(self, name: str):
+        return self.client.from_(name)
+
+    def rpc(self, func: str, params: dict):
+        return self.client.rpc(func, params)
+
+    async def execute(self, query):
+        """Run a query built from this database, with timeout and latency tracking"""
+        label = f"{query.http_method} {query.path}"
+        # Service method that issued the query (e.g. StudentService._list), for metrics
+        caller = sys._getframe(1).f_code
+        method = getattr(caller, "co_qualname", caller.co_name)
+        start = time.perf_counter()
+        failed = False
+        try:
+            return await asyncio.wait_for(query.execute(), timeout=self.timeout)
+        except (asyncio.TimeoutError, httpx.TimeoutException) as exc:
+            failed = True
+            logger.error(f"DB query timed out after {self.timeout}s: {label}")
+            raise DatabaseTimeout(label) from exc
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            DB_QUERY_SECONDS.labels(method, label).observe(elapsed)
+            if failed:
+                DB_QUERY_ERRORS.labels(method, label).inc()
+            if elapsed * 1000 >= DB_SLOW_QUERY_MS:
+                logger.warning(f"Slow DB query ({elapsed * 1000:.0f} ms): {label}")
+
+    async def warmup(self):
+        """Open a pooled connection (DNS, TCP and TLS) before the first request needs one"""
+        await self.execute(self.table("user_profiles").select("id").limit(1))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+db = Database(SUPABASE_URL, SUPABASE_KEY)
+
+def get_db() -> Database:
+    """Dependency to get the shared async database"""
+    return db
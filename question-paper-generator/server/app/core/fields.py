@@ -0,0 +1,38 @@
+from typing import Iterable, Optional
+
+from fastapi import HTTPException
+
+SUMMARY = "summary"
+
+def select_columns(fields: Optional[str], allowed: Iterable[str], summary: Iterable[str]) -> str:
+    """
+    Translate a `fields=` query value into a PostgREST select list.
+
+    - None / empty: every column ("*")
+    - "summary": the compact column set used by list views
+    - "a,b,c": only those columns (must be in `allowed`); `id` is always included
+
+    Raises ValueError for unknown fields.
+    """
+    if not fields or not fields.strip():
+        return "*"
+
+    if fields.strip() == SUMMARY:
+        return ",".join(summary)
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    allowed = set(allowed)
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    columns = ["id"] + [f for f in dict.fromkeys(requested) if f != "id"]
+    return ",".join(columns)
+
+
+def get_columns(fields: Optional[str], allowed: Iterable[str], summary: Iterable[str]) -> str:
+    """`select_columns` for endpoints: unknown fields are a 400"""
+    try:
+        return select_columns(fields, allowed, summary)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,153 @@
+"""
+Local verification of Supabase access tokens.
+
+Tokens are checked here (signature, expiry, audience) instead of asking the
+auth server on every request. Asymmetric projects publish their keys as a
+JWKS, fetched once and refreshed periodically; legacy projects sign with
+the shared JWT secret (SUPABASE_JWT_SECRET). Verified tokens are cached
+briefly, so repeat requests with the same token skip the signature check.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from jose import JWTError, jwt
+
+from app.core.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_URL = os.getenv("SUPABASE_URL", "")
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWKS_URL = os.getenv(
+    "SUPABASE_JWKS_URL", f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json"
+)
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+JWKS_REFRESH_SECONDS = float(os.getenv("JWKS_REFRESH_SECONDS", "600"))
+# A token with an unknown key id triggers a refresh at most this often
+JWKS_MIN_REFRESH_SECONDS = float(os.getenv("JWKS_MIN_REFRESH_SECONDS", "30"))
+JWKS_FETCH_TIMEOUT = float(os.getenv("JWKS_FETCH_TIMEOUT", "5"))
+# 0 disables the verified-token cache
+AUTH_TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "60"))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096"))
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
+
+class TokenVerificationError(Exception):
+    """The token is invalid, expired or signed with an unknown key"""
+
+
+class VerifierUnavailable(Exception):
+    """No signing key material could be obtained (no secret and no JWKS)"""
+
+
+class JWTVerifier:
+    def __init__(
+        self,
+        secret: Optional[str] = SUPABASE_JWT_SECRET,
+        jwks_url: Optional[str] = SUPABASE_JWKS_URL,
+        audience: Optional[str] = SUPABASE_JWT_AUDIENCE,
+        refresh_seconds: float = JWKS_REFRESH_SECONDS,
+        min_refresh_seconds: float = JWKS_MIN_REFRESH_SECONDS,
+        cache_ttl: float = AUTH_TOKEN_CACHE_TTL
+    ):
+        self.secret = secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.refresh_seconds = refresh_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self.cache = TTLCache(cache_ttl, maxsize=AUTH_TOKEN_CACHE_SIZE, name="auth_tokens") if cache_ttl > 0 else None
+
+        self._keys: Dict[str, dict] = {}
+        self._fetched_at = 0.0
+        self._attempted_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _fetch_jwks(self) -> List[dict]:
+        async with httpx.AsyncClient(timeout=JWKS_FETCH_TIMEOUT) as client:
+            response = await client.get(self.jwks_url)
+            response.raise_for_status()
+            return response.json().get("keys", [])
+
+    async def _refresh_keys(self, force: bool = False) -> None:
+        """Refresh the JWKS when stale (or when forced); on failure keep the old keys"""
+        if not self.jwks_url:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if force:
+                if now - self._attempted_at < self.min_refresh_seconds:
+                    return
+            elif self._keys and now - self._fetched_at < self.refresh_seconds:
+                return
+            self._attempted_at = now
+            try:
+                keys = await self._fetch_jwks()
+            except Exception as e:
+                logger.warning(f"Could not refresh JWKS ({e}); using {len(self._keys)} cached key(s)")
+                return
+            self._keys = {key.get("kid"): key for key in keys}
+            self._fetched_at = now
+
+    async def _key_for(self, header: Dict[str, Any]) -> Any:
+        algorithm = header.get("alg")
+        if algorithm == "HS256":
+            if not self.secret:
+                raise VerifierUnavailable("HS256 token but SUPABASE_JWT_SECRET is not set")
+            return self.secret
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise TokenVerificationError(f"Unsupported algorithm: {algorithm}")
+
+        await self._refresh_keys()
+        key = self._keys.get(header.get("kid"))
+        if key is None:
+            # Keys may have been rotated since the last fetch
+            await self._refresh_keys(force=True)
+            key = self._keys.get(header.get("kid"))
+        if key is None:
+            if not self._keys:
+                raise VerifierUnavailable("No signing keys available")
+            raise TokenVerificationError("Unknown signing key")
+        return key
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Return the token's claims, or raise TokenVerificationError / VerifierUnavailable"""
+        cache_key = hashlib.sha256(token.encode()).hexdigest() if self.cache is not None else None
+        if cache_key:
+            claims = self.cache.get(cache_key)
+            # Cached entries must not outlive the token itself
+            if claims is not None and claims.get("exp", 0) > time.time():
+                return claims
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError as e:
+            raise TokenVerificationError(str(e))
+
+        key = await self._key_for(header)
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=[header["alg"]],
+                audience=self.audience,
+                options={"verify_aud": bool(self.audience)}
+            )
+        except JWTError as e:
+            raise TokenVerificationError(str(e))
+
+        if not claims.get("sub"):
+            raise TokenVerificationError("Token has no subject")
+
+        if cache_key:
+            self.cache.set(cache_key, claims)
+        return claims
+
+
+jwt_verifier = JWTVerifier()
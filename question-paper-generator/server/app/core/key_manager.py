@@ -1,13 +1,22 @@
+import logging
 import os
 import time
 import random
 from typing import List, Dict
 
+from app.core.key_state import create_key_state, key_id
+from app.core.metrics import KEY_POOL_AVAILABLE, KEY_POOL_SIZE, KEY_RATE_LIMITED, key_label
+
+logger = logging.getLogger(__name__)
+
 class KeyManager:
-    def __init__(self):
+    def __init__(self, state=None):
         self._ensure_env_loaded()
         self.keys: List[str] = self._load_keys()
-        self.key_status: Dict[str, float] = {k: 0.0 for k in self.keys}
+        # Cooldowns and usage, shared between workers with KEY_STATE_BACKEND=sqlite
+        self.state = state or create_key_state()
+        KEY_POOL_SIZE.set(len(self.keys))
+        KEY_POOL_AVAILABLE.set(len(self.keys))
         
         # Helper map to find key by nickname/index if needed, or by task
         self.task_keys = {
@@ -22,7 +31,7 @@ class KeyManager:
         if os.getenv("GEMINI_API_KEY"):
             return
 
-        print("DEBUG: GEMINI_API_KEY not found in env, attempting manual .env load")
+        logger.debug("GEMINI_API_KEY not found in env, attempting manual .env load")
         try:
             # Try to find .env in current or parent dirs
             current = os.path.dirname(os.path.abspath(__file__))
@@ -35,7 +44,7 @@ class KeyManager:
                  env_path = ".env"
 
             if os.path.exists(env_path):
-                print(f"DEBUG: Loading .env from {env_path}")
+                logger.debug(f"Loading .env from {env_path}")
                 with open(env_path, "r", encoding="utf-8") as f:
                     for line in f:
                         line = line.strip()
@@ -49,9 +58,9 @@ class KeyManager:
                                 os.environ[k] = v
                                 # print(f"DEBUG: Loaded {k}")
             else:
-                print(f"DEBUG: .env not found at {env_path}")
+                logger.debug(f".env not found at {env_path}")
         except Exception as e:
-            print(f"DEBUG: Manual .env load failed: {e}")
+            logger.debug(f"Manual .env load failed: {e}")
 
     def _load_keys(self) -> List[str]:
         keys = []
@@ -60,7 +69,7 @@ class KeyManager:
         # "i ahve written them in format as keys=1,2,3,4"
         custom_keys = os.getenv("keys")
         if custom_keys:
-            print(f"DEBUG: Found 'keys' env var: {custom_keys[:10]}...")
+            logger.debug(f"Found 'keys' env var: {custom_keys[:10]}...")
             for k in custom_keys.split(","):
                 k = k.strip()
                 if k and k not in keys:
@@ -75,14 +84,14 @@ class KeyManager:
             if val:
                 # If it looks like a list (contains comma), split it
                 if "," in val:
-                    print(f"DEBUG: Loading multiple keys from {var_name}")
+                    logger.debug(f"Loading multiple keys from {var_name}")
                     for k in val.split(","):
                         k = k.strip()
                         if k and k not in keys:
                             keys.append(k)
                 # Otherwise, if it's a single key and not already added
                 elif val.strip() and val.strip() not in keys:
-                    print(f"DEBUG: Loading single key from {var_name}")
+                    logger.debug(f"Loading single key from {var_name}")
                     keys.append(val.strip())
         
         # 2. Load numbered task keys (Legacy/Auxiliary)
@@ -91,30 +100,27 @@ class KeyManager:
             if k and k not in keys:
                 keys.append(k)
             
-        print(f"DEBUG: KeyManager loaded {len(keys)} unique keys.")
+        logger.debug(f"KeyManager loaded {len(keys)} unique keys.")
         return keys
 
     def get_valid_key(self, task_type: str = None) -> str:
         """
         Get a key. If task_type is provided, prefer that specific key.
         """
-        now = time.time()
+        cooldowns = self.state.cooldowns()
         
         # 1. Try Task Specific Key
         if task_type:
             target_key = self.task_keys.get(task_type)
             if target_key:
-                # Check status
-                if target_key not in self.key_status:
-                    self.key_status[target_key] = 0.0
-                
-                if self.key_status[target_key] <= now:
+                if key_id(target_key) not in cooldowns:
                     return target_key
                 else:
-                    print(f"DEBUG: Key for {task_type} is rate limited. Falling back to pool.")
+                    logger.info(f"Key for {task_type} is rate limited. Falling back to pool.")
         
         # 2. Pool Logic (Fallback)
-        available_keys = [k for k in self.keys if self.key_status.get(k, 0) <= now]
+        available_keys = [k for k in self.keys if key_id(k) not in cooldowns]
+        KEY_POOL_AVAILABLE.set(len(available_keys))
         
         if available_keys:
             return random.choice(available_keys)
@@ -125,10 +131,18 @@ class KeyManager:
         # All keys exhausted
         raise Exception("All API keys are exhausted/rate-limited.")
 
-    def mark_rate_limited(self, key: str, cooldown_seconds: int = 60):
-        """Mark a key as rate limited"""
-        self.key_status[key] = time.time() + cooldown_seconds
-        print(f"Key ...{key[-4:]} marked as rate limited for {cooldown_seconds}s")
+    def mark_rate_limited(self, key: str, cooldown_seconds: float = 60):
+        """Mark a key as rate limited (for every worker sharing the key state)"""
+        self.state.set_cooldown(key, time.time() + cooldown_seconds)
+        KEY_RATE_LIMITED.labels(key_label(key)).inc()
+        cooldowns = self.state.cooldowns()
+        KEY_POOL_AVAILABLE.set(sum(1 for k in self.keys if key_id(k) not in cooldowns))
+        logger.warning(f"Key ...{key[-4:]} marked as rate limited for {cooldown_seconds}s")
 
     def report_success(self, key: str):
-        pass
+        self.state.record_use(key)
+
+    def usage(self) -> Dict[str, Dict[str, int]]:
+        """Calls and 429s per key (by last 4 characters), across workers sharing the state"""
+        usage = self.state.usage()
+        return {key_label(k): usage.get(key_id(k), {"calls": 0, "rate_limited": 0}) for k in self.keys}
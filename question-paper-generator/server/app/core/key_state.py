@@ -0,0 +1,198 @@
+"""
+Where Gemini key cooldowns and usage counts are kept.
+
+With one worker process, memory is enough. With several (serve.py), every
+worker would otherwise have to hit its own 429s to learn that a key is
+exhausted; the SQLite backend shares that knowledge through a local file, so
+one worker's 429 sends all of them to other keys.
+
+Keys are stored as digests, never in the clear.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# "memory" (per process) or "sqlite" (shared by all workers on the host)
+KEY_STATE_BACKEND = os.getenv("KEY_STATE_BACKEND", "memory").lower()
+# serve.py points this at a per-run directory; the default is private to this app
+KEY_STATE_PATH = os.getenv("KEY_STATE_PATH") or os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "question-paper-generator",
+    "gemini-key-state.sqlite",
+)
+# How stale another worker's cooldowns may be; counters are written at the same pace
+KEY_STATE_REFRESH_SECONDS = float(os.getenv("KEY_STATE_REFRESH_SECONDS", "1"))
+# How long a statement may wait for another worker's write before it is skipped
+KEY_STATE_BUSY_TIMEOUT = 0.05
+
+
+def key_id(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+class MemoryKeyState:
+    """Cooldowns and counters for this process only"""
+
+    def __init__(self):
+        self._cooldowns: Dict[str, float] = {}
+        self._usage: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def cooldowns(self) -> Dict[str, float]:
+        """key id -> time (epoch seconds) until which the key must not be used"""
+        now = time.time()
+        with self._lock:
+            return {k: until for k, until in self._cooldowns.items() if until > now}
+
+    def set_cooldown(self, key: str, until: float) -> None:
+        kid = key_id(key)
+        with self._lock:
+            # A shorter cooldown reported later never shortens a longer one
+            self._cooldowns[kid] = max(until, self._cooldowns.get(kid, 0.0))
+            self._count(kid, "rate_limited")
+
+    def record_use(self, key: str) -> None:
+        with self._lock:
+            self._count(key_id(key), "calls")
+
+    def _count(self, kid: str, field: str) -> None:
+        usage = self._usage.setdefault(kid, {"calls": 0, "rate_limited": 0})
+        usage[field] += 1
+
+    def usage(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {k: dict(v) for k, v in self._usage.items()}
+
+    def flush(self) -> None:
+        """Nothing is pending in memory-only state"""
+
+
+class SQLiteKeyState:
+    """
+    Cooldowns and counters in a SQLite file shared by every worker on the host.
+
+    Calls come from the event loop, so the file is read at most once per
+    `refresh_seconds`: cooldowns are served from memory in between (this
+    worker's own 429s apply at once) and usage counts are added up in memory
+    and written in the same refresh. If another worker holds the write lock
+    for longer than KEY_STATE_BUSY_TIMEOUT the refresh is skipped and the
+    pending writes are retried on the next one.
+    """
+
+    def __init__(self, path: str = KEY_STATE_PATH, refresh_seconds: float = KEY_STATE_REFRESH_SECONDS):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._cooldowns: Dict[str, float] = {}
+        self._pending_cooldowns: Dict[str, float] = {}
+        self._pending_calls: Counter = Counter()
+        self._pending_limited: Counter = Counter()
+        self._refreshed_at = float("-inf")
+
+        os.makedirs(os.path.dirname(path) or ".", mode=0o700, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, timeout=KEY_STATE_BUSY_TIMEOUT, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS key_state ("
+            " key_id TEXT PRIMARY KEY,"
+            " cooldown_until REAL NOT NULL DEFAULT 0,"
+            " calls INTEGER NOT NULL DEFAULT 0,"
+            " rate_limited INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def cooldowns(self) -> Dict[str, float]:
+        now = time.time()
+        with self._lock:
+            if time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+                self._sync()
+            return {k: until for k, until in self._cooldowns.items() if until > now}
+
+    def set_cooldown(self, key: str, until: float) -> None:
+        kid = key_id(key)
+        with self._lock:
+            until = max(until, self._cooldowns.get(kid, 0.0))
+            self._cooldowns[kid] = until
+            self._pending_cooldowns[kid] = until
+            self._pending_limited[kid] += 1
+            # Other workers should learn about a 429 now, not at the next refresh
+            self._sync()
+
+    def record_use(self, key: str) -> None:
+        with self._lock:
+            self._pending_calls[key_id(key)] += 1
+
+    def usage(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            self._sync()
+            try:
+                rows = self._conn.execute("SELECT key_id, calls, rate_limited FROM key_state").fetchall()
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Key state unavailable: {e}")
+                rows = []
+        return {kid: {"calls": calls, "rate_limited": limited} for kid, calls, limited in rows}
+
+    def flush(self) -> None:
+        """Write pending counts and cooldowns now (e.g. before the worker exits)"""
+        with self._lock:
+            self._sync()
+
+    def _sync(self) -> None:
+        """Write what is pending and re-read the cooldowns, in one transaction (lock held)"""
+        kids = set(self._pending_cooldowns) | set(self._pending_calls) | set(self._pending_limited)
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO key_state (key_id, cooldown_until, calls, rate_limited) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key_id) DO UPDATE SET "
+                    " cooldown_until = MAX(cooldown_until, excluded.cooldown_until),"
+                    " calls = calls + excluded.calls,"
+                    " rate_limited = rate_limited + excluded.rate_limited",
+                    [
+                        (kid, self._pending_cooldowns.get(kid, 0.0),
+                         self._pending_calls[kid], self._pending_limited[kid])
+                        for kid in kids
+                    ],
+                )
+                rows = self._conn.execute(
+                    "SELECT key_id, cooldown_until FROM key_state WHERE cooldown_until > ?", (time.time(),)
+                ).fetchall()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        except sqlite3.OperationalError as e:
+            # Busy or unavailable: keep serving from memory and retry at the next
+            # refresh, not on every cooldowns() call
+            logger.warning(f"Key state not synced: {e}")
+            self._refreshed_at = time.monotonic()
+            return
+        self._pending_cooldowns.clear()
+        self._pending_calls.clear()
+        self._pending_limited.clear()
+        self._cooldowns = dict(rows)
+        self._refreshed_at = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            self._sync()
+            self._conn.close()
+
+
+def create_key_state(backend: str = KEY_STATE_BACKEND):
+    if backend == "sqlite":
+        return SQLiteKeyState()
+    if backend == "memory":
+        return MemoryKeyState()
+    raise ValueError(f"Unknown KEY_STATE_BACKEND: {backend}")
@@ -0,0 +1,148 @@
+"""
+Prometheus metrics for the API's hot paths.
+
+Served at GET /metrics (see app/main.py) to scrapers that send
+`Authorization: Bearer $METRICS_TOKEN`; without METRICS_TOKEN the endpoint
+is off. Under a multi-worker runner set PROMETHEUS_MULTIPROC_DIR so every
+worker's samples are aggregated on scrape.
+"""
+
+import os
+import time
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import REGISTRY, multiprocess
+
+# Buckets in seconds, per kind of work
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+GEMINI_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10)
+WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"], buckets=HTTP_BUCKETS
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests currently being handled", multiprocess_mode="livesum"
+)
+
+GEMINI_CALL_SECONDS = Histogram(
+    "gemini_call_duration_seconds", "Gemini call latency (one attempt) by task type and outcome",
+    ["task_type", "outcome"], buckets=GEMINI_BUCKETS
+)
+GEMINI_TOKENS = Counter(
+    "gemini_tokens_total", "Tokens reported by Gemini usage metadata", ["task_type", "kind"]
+)
+GEMINI_RETRY_WAIT_SECONDS = Histogram(
+    "gemini_retry_wait_seconds", "Backoff slept before retrying a Gemini call", ["reason"], buckets=WAIT_BUCKETS
+)
+AI_SEMAPHORE_WAIT_SECONDS = Histogram(
+    "ai_semaphore_wait_seconds", "Time waiting for an AIService concurrency slot", buckets=WAIT_BUCKETS
+)
+AI_IN_FLIGHT = Gauge(
+    "ai_requests_in_flight", "Gemini requests holding an AIService concurrency slot", multiprocess_mode="livesum"
+)
+
+KEY_POOL_SIZE = Gauge("gemini_key_pool_size", "Configured Gemini API keys", multiprocess_mode="max")
+KEY_POOL_AVAILABLE = Gauge(
+    "gemini_key_pool_available", "Gemini API keys not cooling down after a 429", multiprocess_mode="min"
+)
+KEY_RATE_LIMITED = Counter(
+    "gemini_key_rate_limited_total", "429s per Gemini key (identified by its last 4 characters)", ["key"]
+)
+
+PDF_RENDER_SECONDS = Histogram(
+    "pdf_render_duration_seconds", "Question paper PDF render time", buckets=HTTP_BUCKETS
+)
+
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "PostgREST query latency by calling service method and endpoint",
+    ["method", "endpoint"], buckets=DB_BUCKETS
+)
+DB_QUERY_ERRORS = Counter(
+    "db_query_errors_total", "Failed or timed-out PostgREST queries", ["method", "endpoint"]
+)
+
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time on a worker thread, by operation and outcome",
+    ["operation", "outcome"], buckets=DB_BUCKETS
+)
+PASSWORD_HASH_WAIT_SECONDS = Histogram(
+    "password_hash_wait_seconds", "Time queued for a password hashing thread", ["operation"], buckets=WAIT_BUCKETS
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending", "Password operations running or queued", multiprocess_mode="livesum"
+)
+PASSWORD_HASH_CAPACITY = Gauge(
+    "password_hash_capacity", "Password operations admitted before PasswordHasherBusy", multiprocess_mode="livesum"
+)
+LOGINS = Counter(
+    "logins_total", "Password checks by outcome (succeeded, failed, rejected when the pool is full)", ["outcome"]
+)
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "In-process and shared cache lookups by cache and result (hit, miss)",
+    ["cache", "result"]
+)
+
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total", "Log records dropped because the writer queue was full"
+)
+
+
+def key_label(key: Optional[str]) -> str:
+    """Never export a key; its last 4 characters are enough to tell them apart"""
+    return f"...{key[-4:]}" if key else "none"
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Exposition text for a scrape, aggregated across workers in multiprocess mode"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    Records latency per route template (e.g. /api/v1/questions/{question_id}),
+    so ids in paths do not explode the label set. Pure ASGI, so streamed
+    request and response bodies pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        HTTP_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope["method"], template, str(status["code"])).observe(
+                time.perf_counter() - start
+            )
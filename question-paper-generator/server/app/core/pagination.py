@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+def encode_cursor(created_at: str, row_id: str) -> str:
+    """Encode the (created_at, id) position of the last row into an opaque token"""
+    raw = json.dumps([created_at, str(row_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """
+    Decode a token produced by `encode_cursor`. Raises ValueError if it is malformed.
+
+    Cursors come from clients and end up inside a PostgREST filter, so both
+    values are parsed (a timestamp and a UUID) and returned re-serialized;
+    nothing else can reach the query.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(created_at).isoformat()
+        row_id = str(UUID(row_id))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return created_at, row_id
+
+def apply_keyset(query, cursor: Optional[str]):
+    """
+    Order a PostgREST query newest first on (created_at, id) and, if a cursor
+    is given, keep only the rows after it.
+    """
+    # postgrest-py 0.13 has no or_() and a second order() call would add a
+    # second `order` parameter, so both are set as raw query parameters.
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # Values are quoted because timestamps contain reserved characters (.:)
+        query.params = query.params.add(
+            "or",
+            f'(created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt."{row_id}"))'
+        )
+    query.params = query.params.add("order", "created_at.desc,id.desc")
+    return query
+
+def split_page(rows: list, page_size: int) -> tuple[list, Optional[str]]:
+    """
+    Split `page_size + 1` fetched rows into the page and the cursor for the
+    next one (None when this is the last page).
+    """
+    if len(rows) <= page_size:
+        return rows, None
+    page = rows[:page_size]
+    last = page[-1]
+    return page, encode_cursor(last["created_at"], last["id"])
@@ -0,0 +1,96 @@
+"""
+Password hashing off the event loop.
+
+bcrypt costs ~100-300 ms of CPU per call. Running it inline in an async
+handler stalls every other request on the worker, so hashes and checks run
+in a small thread pool instead (the bcrypt backend releases the GIL while
+hashing). Admission is bounded: when too many are already queued, callers
+get PasswordHasherBusy right away rather than piling up behind a login burst.
+
+Pool usage and login outcomes are exported as Prometheus metrics (see
+app/core/metrics.py).
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.metrics import (
+    LOGINS,
+    PASSWORD_HASH_CAPACITY,
+    PASSWORD_HASH_PENDING,
+    PASSWORD_HASH_SECONDS,
+    PASSWORD_HASH_WAIT_SECONDS,
+)
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Requests allowed to wait for a worker before new ones are turned away
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "64"))
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hashing requests are already waiting"""
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        rounds: int = BCRYPT_ROUNDS,
+        workers: int = PASSWORD_HASH_WORKERS,
+        queue_limit: int = PASSWORD_HASH_QUEUE_LIMIT
+    ):
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.capacity = workers + queue_limit
+        self.pending = 0
+        PASSWORD_HASH_CAPACITY.inc(self.capacity)
+
+    async def _run(self, operation: str, func, *args):
+        if self.pending >= self.capacity:
+            if operation == "verify":
+                LOGINS.labels("rejected").inc()
+            raise PasswordHasherBusy(f"{self.pending} password operations pending")
+
+        self.pending += 1
+        PASSWORD_HASH_PENDING.inc()
+        queued_at = time.perf_counter()
+        started = {}
+
+        def timed():
+            started["at"] = time.perf_counter()
+            return func(*args)
+
+        failed = False
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.pending -= 1
+            PASSWORD_HASH_PENDING.dec()
+            finished = time.perf_counter()
+            start = started.get("at", finished)
+            PASSWORD_HASH_SECONDS.labels(operation, "error" if failed else "ok").observe(finished - start)
+            PASSWORD_HASH_WAIT_SECONDS.labels(operation).observe(start - queued_at)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", self.context.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password. Returns (valid, new_hash); new_hash is set when the
+        stored hash uses an outdated cost and should be replaced.
+        """
+        valid, new_hash = await self._run("verify", self.context.verify_and_update, password, hashed)
+        LOGINS.labels("succeeded" if valid else "failed").inc()
+        return valid, new_hash
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,231 @@
+"""
+Non-blocking, structured logging.
+
+Request handlers only put records on a bounded in-memory queue; a background
+thread (logging.handlers.QueueListener) formats them as JSON lines and does
+all file and console I/O. When the queue is full, records are dropped and
+counted instead of blocking the event loop. DEBUG records are sampled
+(LOG_DEBUG_SAMPLE_RATE) because the AI path emits several per request.
+
+Every record carries the id of the request that produced it (X-Request-ID,
+generated when the client sends none).
+
+Log files rotate on size and age in a single process. Rotation is not safe
+across processes, so with several workers (WEB_CONCURRENCY > 1, exported by
+serve.py) the files are only appended to and reopened when an external tool
+such as logrotate moves them.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from app.core.metrics import LOG_RECORDS_DROPPED
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# JSON lines for the whole app; unset: console only
+LOG_FILE = os.getenv("LOG_FILE")
+# The AI service's detailed trace (previously written synchronously)
+AI_LOG_FILE = os.getenv("AI_LOG_FILE", "debug_ai.log")
+AI_LOG_LEVEL = os.getenv("AI_LOG_LEVEL", "DEBUG").upper()
+LOG_TO_STDOUT = os.getenv("LOG_TO_STDOUT", "true").lower() == "true"
+# Fraction of DEBUG records kept (WARNING and above are never sampled)
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Rotate when a file reaches this size or this age, keeping LOG_BACKUP_COUNT old files
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(20 * 1024 * 1024)))
+LOG_ROTATE_SECONDS = float(os.getenv("LOG_ROTATE_SECONDS", str(24 * 3600)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# Worker processes writing the same files (serve.py exports it)
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+AI_LOGGER = "app.services.ai_service"
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id (must run on the producing thread)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keep only `rate` of records below INFO"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.INFO or random.random() < self.rate
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records when the writer falls behind"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback here; args and exc_info may not be
+        # safe to hand to another thread
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotates on size (as RotatingFileHandler) and also once the file is `interval` seconds old"""
+
+    def __init__(self, filename: str, max_bytes: int, interval: float, backup_count: int):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.interval = interval
+        self.rollover_at = time.time() + interval
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.interval and time.time() >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval
+
+
+class DetailFilter(logging.Filter):
+    """Drop records from `name` below `level` (its detailed trace has its own file)"""
+
+    def __init__(self, name: str, level: int = logging.INFO):
+        super().__init__(name)
+        self.level = level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.level or not super().filter(record)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _file_handler(path: str, workers: int = WORKERS) -> logging.Handler:
+    if workers > 1:
+        # Workers would rotate over each other; leave rotation to logrotate
+        return logging.handlers.WatchedFileHandler(path, encoding="utf-8", delay=True)
+    return SizeAndTimeRotatingFileHandler(path, LOG_MAX_BYTES, LOG_ROTATE_SECONDS, LOG_BACKUP_COUNT)
+
+
+def configure_logging() -> None:
+    """
+    Route all logging through the queue. Idempotent; the writer thread runs
+    until `shutdown_logging()`, which also runs at interpreter exit.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = JSONFormatter()
+    sinks: List[logging.Handler] = []
+    if LOG_TO_STDOUT:
+        sinks.append(logging.StreamHandler(sys.stdout))
+    if LOG_FILE:
+        sinks.append(_file_handler(LOG_FILE))
+    for sink in sinks:
+        sink.addFilter(DetailFilter(AI_LOGGER))
+    if AI_LOG_FILE:
+        ai_sink = _file_handler(AI_LOG_FILE)
+        ai_sink.addFilter(logging.Filter(AI_LOGGER))
+        sinks.append(ai_sink)
+    for sink in sinks:
+        sink.setFormatter(formatter)
+
+    records: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(records)
+    handler.addFilter(DebugSamplingFilter(LOG_DEBUG_SAMPLE_RATE))
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if isinstance(existing, NonBlockingQueueHandler):
+            root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    logging.getLogger(AI_LOGGER).setLevel(AI_LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(records, *sinks, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for sink in _listener.handlers:
+        sink.close()
+    _listener = None
+
+
+class RequestIdMiddleware:
+    """Bind X-Request-ID (or a new id) to the request's logs and echo it back"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")
+        request_id = incoming[:64] if incoming else uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
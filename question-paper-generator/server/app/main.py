@@ -1,14 +1,75 @@
 import os
+import asyncio
+import hmac
+import logging
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 # Load env vars before importing app modules to ensure config is ready
 load_dotenv()
 
-from fastapi import FastAPI
+from app.core.structured_logging import RequestIdMiddleware, configure_logging
+
+configure_logging()
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from app.api.v1.api import api_router
+from app.api.v1.endpoints.ai import get_ai_service
+from app.api.v1.endpoints.questions import get_pdf_service
+from app.core.database import DatabaseTimeout, db
+from app.core.compression import CompressionMiddleware
+from app.core.metrics import MetricsMiddleware, render_latest
+from prometheus_client import multiprocess
+
+logger = logging.getLogger(__name__)
+
+# Services initialised before the first request (comma-separated; empty: none).
+# AI and PDF load their heavy dependencies here rather than at import. PDF stays
+# lazy by default so ReportLab/matplotlib load only in workers that render papers;
+# add "pdf" to pay that cost at startup instead
+WARMUP_SERVICES = {s.strip() for s in os.getenv("WARMUP_SERVICES", "db,ai").split(",") if s.strip()}
+
+# Scrapers send "Authorization: Bearer <token>"; unset, /metrics is not served
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+async def warm_up():
+    """Pay cold-start costs at startup; a failure only means a slower first request"""
+    steps = {
+        "db": db.warmup,
+        "ai": lambda: get_ai_service().warmup(),
+        "pdf": lambda: get_pdf_service().warmup(),
+    }
+    for name, step in steps.items():
+        if name not in WARMUP_SERVICES:
+            continue
+        try:
+            result = step()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.warning(f"Warm-up of {name} failed: {e}")
+
 
-app = FastAPI(title="BudyforStudy API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up()
+    yield
+    # The server has stopped accepting requests and drained in-flight ones
+    # (including AI jobs; see serve.py for the grace period)
+    await db.aclose()
+    if get_ai_service.cache_info().currsize:
+        # Key usage counted since the last shared key state refresh
+        get_ai_service().key_manager.state.flush()
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
+    # Logging is flushed at exit (shutdown_logging), after the server's last messages
+
+
+# orjson for every JSON response; hot listings also skip re-validation of DB rows
+app = FastAPI(title="BudyforStudy API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Configure CORS origins from env var `ALLOW_ORIGINS` (comma-separated).
 # If set to '*', allow all origins (useful for quick local testing).
@@ -32,9 +93,17 @@ app.add_middleware(
     allow_credentials=allow_credentials,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"],
+    expose_headers=["Content-Disposition", "X-Missing-Question-Ids", "X-Near-Duplicate-Ids", "ETag", "Last-Modified", "X-Next-Cursor", "X-Request-ID"],
 )
 
+# gzip (or brotli) for large JSON bodies; streamed responses pass through
+app.add_middleware(CompressionMiddleware)
+
+app.add_middleware(RequestIdMiddleware)
+
+# Outermost, so latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Mount API router under /api/v1
 app.include_router(api_router, prefix="/api/v1")
 
@@ -44,3 +113,19 @@ def root():
     return {"status": "ok", "service": "question-paper-generator"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Prometheus scrape endpoint (requires METRICS_TOKEN)"""
+    if not METRICS_TOKEN:
+        return Response(status_code=404)
+    presented = request.headers.get("authorization", "").encode()
+    if not hmac.compare_digest(presented, f"Bearer {METRICS_TOKEN}".encode()):
+        return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+
+@app.exception_handler(DatabaseTimeout)
+async def db_timeout_handler(request: Request, exc: DatabaseTimeout):
+    return JSONResponse(status_code=504, content={"detail": "Database query timed out"})
+
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, HttpUrl
-from typing import Optional
+from typing import Dict, Optional, Union
 from enum import Enum
 from datetime import datetime
 from uuid import UUID
@@ -76,6 +76,36 @@ class Question(QuestionBase):
     class Config:
         from_attributes = True  # Allows ORM mode for SQLAlchemy
 
+# Sparse Response Model (for listings requested with `fields=`)
+class PartialQuestion(BaseModel):
+    """Question with only the requested fields present"""
+    id: UUID
+    question_type: Optional[QuestionType] = None
+    source: Optional[str] = None
+    subject: Optional[str] = None
+    class_grade: Optional[str] = None
+    topic: Optional[str] = None
+    difficulty: Optional[str] = None
+    category: Optional[str] = None
+    question_text: Optional[str] = None
+    image_url: Optional[str] = None
+    option_a: Optional[str] = None
+    option_b: Optional[str] = None
+    option_c: Optional[str] = None
+    option_d: Optional[str] = None
+    answer_text: Optional[str] = None
+    detailed_solution: Optional[str] = None
+    hint: Optional[str] = None
+    marks: Optional[int] = None
+    is_starred: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+# Bulk star/unstar request (multi-select in the library)
+class QuestionStarUpdate(BaseModel):
+    question_ids: list[UUID] = Field(..., min_length=1, max_length=1000)
+    is_starred: bool
+
 # Filter Model (for querying questions)
 class QuestionFilter(BaseModel):
     """Used for filtering questions in the library"""
@@ -85,14 +115,17 @@ class QuestionFilter(BaseModel):
     difficulty: Optional[str] = None
     question_type: Optional[QuestionType] = None
     is_starred: Optional[bool] = None
-    search: Optional[str] = None  # For searching in question_text
+    search: Optional[str] = None  # Full-text/fuzzy search over text, topic, options and answer
     category: Optional[str] = None  # Filter by category (college, school, competition)
 
 # List Response Model (for paginated results)
 class QuestionListResponse(BaseModel):
     """Response for list endpoints with pagination"""
-    questions: list[Question]
-    total: int
+    questions: list[Union[Question, PartialQuestion]]
+    total: Optional[int] = None  # Estimated; omitted when include_total=false
     page: int
     page_size: int
-    total_pages: int
\ No newline at end of file
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Pass as `cursor` to get the next page
+    # Counts per value of subject, topic, difficulty and question_type for the filter (include_facets=true)
+    facets: Optional[Dict[str, Dict[str, int]]] = None
\ No newline at end of file
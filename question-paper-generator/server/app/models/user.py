@@ -31,3 +31,21 @@ class UserUpdate(BaseModel):
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str
+
+class AuthenticatedUser(BaseModel):
+    """The caller of an authenticated request (from the verified access token)"""
+    id: str
+    email: Optional[str] = None
+    role: Optional[str] = None
+    user_metadata: dict = {}
+    app_metadata: dict = {}
+
+    @classmethod
+    def from_claims(cls, claims: dict) -> "AuthenticatedUser":
+        return cls(
+            id=claims["sub"],
+            email=claims.get("email"),
+            role=claims.get("role"),
+            user_metadata=claims.get("user_metadata") or {},
+            app_metadata=claims.get("app_metadata") or {}
+        )
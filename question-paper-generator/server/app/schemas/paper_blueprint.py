@@ -0,0 +1,33 @@
+from typing import Annotated, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
+
+from app.models.question import QuestionType
+
+class PaperBlueprint(BaseModel):
+    """Specification of a paper to assemble automatically from the question bank"""
+    subject: str = Field(..., min_length=1)
+    class_grade: Optional[str] = None
+    category: Optional[str] = None
+    topics: Optional[List[str]] = None  # Restrict to these topics (any topic if empty)
+
+    # Number of questions per type, e.g. {"MCQ": 10, "LONG": 3}
+    question_counts: Dict[QuestionType, Annotated[int, Field(ge=1, le=200)]] = Field(..., min_length=1)
+    # Share of each difficulty, e.g. {"EASY": 0.3, "MEDIUM": 0.5, "HARD": 0.2}
+    difficulty_mix: Optional[Dict[str, float]] = None
+    target_total_marks: Optional[int] = Field(None, ge=1)
+
+    seed: Optional[int] = None  # Makes the sampled candidates and the selection among them repeatable
+
+    # Output
+    output: Literal["json", "pdf"] = "json"
+    title: Optional[str] = "Question Paper"
+    duration: Optional[int] = None
+    instructions: Optional[str] = None
+
+class AssembledPaper(BaseModel):
+    questions: List[dict]
+    total_marks: int
+    target_total_marks: Optional[int] = None
+    question_counts: Dict[str, int]
+    difficulty_counts: Dict[str, int]
+    shortfall: Dict[str, int] = {}  # Question types the bank could not fully supply
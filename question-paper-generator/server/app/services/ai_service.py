@@ -6,6 +6,7 @@ import json
 import re
 import logging
 import json_repair
+from contextlib import asynccontextmanager
 from typing import List, Dict, Optional, Any, Type, Union
 
 from google import genai
@@ -14,6 +15,11 @@ import PyPDF2
 from pydantic import BaseModel
 
 from app.core.key_manager import KeyManager
+from app.core.metrics import (
+    AI_IN_FLIGHT, AI_SEMAPHORE_WAIT_SECONDS, GEMINI_CALL_SECONDS,
+    GEMINI_RETRY_WAIT_SECONDS, GEMINI_TOKENS
+)
+from app.core.structured_logging import configure_logging
 from app.schemas.ai_schemas import (
     AnalysisSchema, StructuredDataSchema, TestPaperSchema, 
     MoreQuestionsSchema, MoreFormulasSchema, TopicsSchema, CustomQuizSchema,
@@ -42,18 +48,61 @@ class AIService:
         # Limit concurrent requests
         self.semaphore = asyncio.Semaphore(3)
 
-    def _setup_logging(self):
-        # Add file handler if not present
-        if not logger.handlers:
+        # Alternate endpoint (e.g. loadtest/fake_gemini.py for offline benchmarks)
+        base_url = os.getenv("GEMINI_BASE_URL")
+        self.http_options = types.HttpOptions(base_url=base_url) if base_url else None
+        # One client (and connection pool) per key, reused across requests
+        self._clients: Dict[str, genai.Client] = {}
+
+    def _client(self, key: str) -> genai.Client:
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = genai.Client(api_key=key, http_options=self.http_options)
+        return client
+
+    def warmup(self):
+        """Create every key's client up front, so first requests skip the setup"""
+        for key in self.key_manager.keys:
+            self._client(key)
+
+    @asynccontextmanager
+    async def _slot(self):
+        """A concurrency slot, recording how long the request queued for it"""
+        queued_at = time.perf_counter()
+        async with self.semaphore:
+            AI_SEMAPHORE_WAIT_SECONDS.observe(time.perf_counter() - queued_at)
+            AI_IN_FLIGHT.inc()
             try:
-                fh = logging.FileHandler('debug_ai.log')
-                fh.setLevel(logging.DEBUG)
-                formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-                fh.setFormatter(formatter)
-                logger.addHandler(fh)
-                logger.setLevel(logging.DEBUG)
-            except Exception as e:
-                print(f"Failed to setup debug_ai.log: {e}")
+                yield
+            finally:
+                AI_IN_FLIGHT.dec()
+
+    async def _call(self, content_generator_func, client, task_type: str = None):
+        """One Gemini attempt, timed per task type, with its token usage recorded"""
+        label = task_type or "default"
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await content_generator_func(client)
+            outcome = "ok"
+        except Exception as e:
+            error_str = str(e).lower()
+            if "429" in error_str or "resource_exhausted" in error_str or "quota" in error_str:
+                outcome = "rate_limited"
+            raise
+        finally:
+            GEMINI_CALL_SECONDS.labels(label, outcome).observe(time.perf_counter() - start)
+
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            GEMINI_TOKENS.labels(label, "prompt").inc(usage.prompt_token_count or 0)
+            GEMINI_TOKENS.labels(label, "output").inc(usage.candidates_token_count or 0)
+        return response
+
+    def _setup_logging(self):
+        # The detailed trace goes to debug_ai.log through the queued writer
+        # thread, so logging never blocks a Gemini call
+        configure_logging()
 
     def _extract_wait_time(self, error_message: str) -> float:
         """Attempts to find 'retry in X s' in the error message."""
@@ -83,8 +132,10 @@ class AIService:
             
             for attempt in range(sticky_retries):
                 try:
-                    client = genai.Client(api_key=override_key)
-                    return await content_generator_func(client)
+                    client = self._client(override_key)
+                    response = await self._call(content_generator_func, client, task_type)
+                    self.key_manager.report_success(override_key)
+                    return response
                 except Exception as e:
                     error_str = str(e).lower()
                     
@@ -101,6 +152,9 @@ class AIService:
                         wait_time = self._extract_wait_time(error_str)
                         
                         logger.warning(f"⚠️ Quota Hit on Sticky Key. Waiting {wait_time:.1f}s... (Attempt {attempt+1}/{sticky_retries})")
+                        # Other requests (and workers) rotate away from it meanwhile
+                        self.key_manager.mark_rate_limited(override_key, cooldown_seconds=wait_time)
+                        GEMINI_RETRY_WAIT_SECONDS.labels("sticky_key").observe(wait_time)
                         await asyncio.sleep(wait_time)
                         continue # RETRY loop
                     else:
@@ -115,13 +169,14 @@ class AIService:
         retries = 3
         delay = 2 
         
-        async with self.semaphore:
+        async with self._slot():
             for attempt in range(retries + 1):
                 key = self.key_manager.get_valid_key(task_type)
                 
                 try:
-                    client = genai.Client(api_key=key)
-                    response = await content_generator_func(client)
+                    client = self._client(key)
+                    response = await self._call(content_generator_func, client, task_type)
+                    self.key_manager.report_success(key)
                     
                     if capture_key_ref is not None:
                         capture_key_ref['key'] = key
@@ -135,6 +190,7 @@ class AIService:
                     if e.code == 429 or "429" in error_msg or "resource_exhausted" in error_msg:
                         logger.warning(f"Rate Limited (429) on key ...{key[-4:]}. Rotating.")
                         self.key_manager.mark_rate_limited(key, cooldown_seconds=60)
+                        GEMINI_RETRY_WAIT_SECONDS.labels("rotate").observe(delay)
                         await asyncio.sleep(delay)
                         delay *= 2
                         continue 
@@ -148,6 +204,7 @@ class AIService:
                     if "429" in error_msg or "quota" in error_msg or "resource_exhausted" in error_msg:
                          logger.warning(f"Rate Limited (General Exception) ...{key[-4:]}. Rotating.")
                          self.key_manager.mark_rate_limited(key, cooldown_seconds=60)
+                         GEMINI_RETRY_WAIT_SECONDS.labels("rotate").observe(delay)
                          await asyncio.sleep(delay)
                          delay *= 2
                          continue
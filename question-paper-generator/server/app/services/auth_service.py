@@ -1,6 +1,6 @@
-from supabase import Client
+from app.core.database import Database
 from app.models.user import UserCreate, UserLogin, UserUpdate
-from passlib.context import CryptContext
+from app.core.password_hasher import password_hasher
 from jose import jwt
 from datetime import datetime, timedelta
 from uuid import UUID
@@ -11,18 +11,17 @@ SECRET_KEY = os.getenv("SECRET_KEY", "a_very_secret_key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 class AuthService:
-    def __init__(self, supabase: Client):
-        self.supabase = supabase
+    def __init__(self, db: Database):
+        self.db = db
         self.table = "users"
 
-    def verify_password(self, plain_password, hashed_password):
-        return pwd_context.verify(plain_password, hashed_password)
+    # bcrypt runs in the bounded hashing pool, never on the event loop
+    async def verify_password(self, plain_password, hashed_password):
+        return await password_hasher.verify(plain_password, hashed_password)
 
-    def get_password_hash(self, password):
-        return pwd_context.hash(password)
+    async def get_password_hash(self, password):
+        return await password_hasher.hash(password)
 
     def create_access_token(self, data: dict):
         to_encode = data.copy()
@@ -33,11 +32,11 @@ class AuthService:
 
     async def register_user(self, user_data: UserCreate):
         # Check if user exists
-        existing_user = self.supabase.table(self.table).select("id").eq("email", user_data.email).execute()
+        existing_user = await self.db.execute(self.db.table(self.table).select("id").eq("email", user_data.email))
         if existing_user.data:
             raise ValueError("Email already registered")
 
-        hashed_password = self.get_password_hash(user_data.password)
+        hashed_password = await self.get_password_hash(user_data.password)
         
         new_user_data = {
             "email": user_data.email,
@@ -46,7 +45,7 @@ class AuthService:
             "category": user_data.category
         }
         
-        response = self.supabase.table(self.table).insert(new_user_data).execute()
+        response = await self.db.execute(self.db.table(self.table).insert(new_user_data))
 
         if not response.data:
             raise Exception("Failed to create user")
@@ -56,19 +55,26 @@ class AuthService:
         return {"access_token": access_token, "token_type": "bearer", "user": new_user}
 
     async def authenticate_user(self, login_data: UserLogin):
-        response = self.supabase.table(self.table).select("*").eq("email", login_data.email).execute()
+        response = await self.db.execute(self.db.table(self.table).select("*").eq("email", login_data.email))
         if not response.data:
             return None
         
         user = response.data[0]
-        if not self.verify_password(login_data.password, user["password_hash"]):
+        valid, new_hash = await self.verify_password(login_data.password, user["password_hash"])
+        if not valid:
             return None
         
+        # Stored with an outdated cost (BCRYPT_ROUNDS changed): upgrade it
+        if new_hash:
+            await self.db.execute(
+                self.db.table(self.table).update({"password_hash": new_hash}, returning="minimal").eq("id", user["id"])
+            )
+        
         access_token = self.create_access_token(data={"sub": str(user['id'])})
         return {"access_token": access_token, "token_type": "bearer", "user": user}
 
     async def get_user_by_id(self, user_id: UUID):
-        response = self.supabase.table(self.table).select("*").eq("id", str(user_id)).execute()
+        response = await self.db.execute(self.db.table(self.table).select("*").eq("id", str(user_id)))
         if not response.data:
             return None
         return response.data[0]
@@ -78,7 +84,7 @@ class AuthService:
         if not update_data:
             return None
             
-        response = self.supabase.table(self.table).update(update_data).eq("id", str(user_id)).execute()
+        response = await self.db.execute(self.db.table(self.table).update(update_data).eq("id", str(user_id)))
         if not response.data:
             return None
         return response.data[0]
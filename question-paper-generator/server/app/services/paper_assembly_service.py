@@ -0,0 +1,238 @@
+"""Automatic paper assembly from a blueprint."""
+
+import asyncio
+import random
+import secrets
+from bisect import insort
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+
+from app.core.database import Database
+from app.schemas.paper_blueprint import PaperBlueprint, AssembledPaper
+
+# Candidates sampled per (question type, difficulty) bucket, relative to the
+# largest requested type count. More candidates give the solver more room.
+CANDIDATE_FACTOR = 4
+MIN_CANDIDATES = 20
+MAX_CANDIDATES = 200
+
+# Upper bound on improvement steps while adjusting the marks total
+MAX_SWAPS = 500
+
+DIFFICULTY_ORDER = {"EASY": 0, "MEDIUM": 1, "HARD": 2}
+
+
+def allocate(total: int, weights: Dict[str, float]) -> Dict[str, int]:
+    """Split `total` items across keys in proportion to `weights` (largest remainder method)"""
+    weight_sum = sum(w for w in weights.values() if w > 0)
+    if total <= 0 or weight_sum <= 0:
+        return {k: 0 for k in weights}
+
+    exact = {k: total * max(w, 0) / weight_sum for k, w in weights.items()}
+    counts = {k: int(v) for k, v in exact.items()}
+    leftover = total - sum(counts.values())
+    for k in sorted(exact, key=lambda k: exact[k] - counts[k], reverse=True)[:leftover]:
+        counts[k] += 1
+    return counts
+
+
+def spread_topics(questions: List[dict]) -> List[dict]:
+    """Reorder so that consecutive picks come from different topics (round robin)"""
+    by_topic: Dict[str, List[dict]] = defaultdict(list)
+    for q in questions:
+        by_topic[q.get("topic")].append(q)
+    queues = list(by_topic.values())
+    spread = []
+    while queues:
+        queues = [queue for queue in queues if queue]
+        for queue in queues:
+            spread.append(queue.pop(0))
+    return spread
+
+
+def select_questions(
+    candidates: List[dict],
+    question_counts: Dict[str, int],
+    difficulty_mix: Optional[Dict[str, float]] = None,
+    target_total_marks: Optional[int] = None,
+    rng: Optional[random.Random] = None
+) -> Tuple[List[dict], Dict[str, int]]:
+    """
+    Pick questions matching the type counts, then the difficulty mix, then
+    the marks target.
+
+    Type counts are hard constraints. Each type's count is split across
+    difficulties by `difficulty_mix`, borrowing from other difficulties when
+    a bucket runs short. The marks total is then moved towards the target by
+    swapping a selected question for an unselected one of the same type,
+    same difficulty first, then any difficulty.
+
+    Returns (selected questions, shortfall per type).
+    """
+    rng = rng or random.Random()
+
+    buckets: Dict[Tuple[str, str], List[dict]] = defaultdict(list)
+    for q in candidates:
+        buckets[(q["question_type"], q.get("difficulty"))].append(q)
+    for key in buckets:
+        rng.shuffle(buckets[key])
+        buckets[key] = spread_topics(buckets[key])
+
+    selected: List[dict] = []
+    shortfall: Dict[str, int] = {}
+
+    for q_type, count in question_counts.items():
+        type_buckets = {d: qs for (t, d), qs in buckets.items() if t == q_type}
+        if difficulty_mix:
+            quotas = allocate(count, {d: difficulty_mix.get(d, 0) for d in set(type_buckets) | set(difficulty_mix)})
+        else:
+            quotas = allocate(count, {d: len(qs) for d, qs in type_buckets.items()})
+
+        picked = []
+        for difficulty, quota in quotas.items():
+            picked.extend(type_buckets.get(difficulty, [])[:quota])
+
+        # Borrow from other difficulties if some buckets were too small
+        if len(picked) < count:
+            picked_ids = {q["id"] for q in picked}
+            spare = [q for qs in type_buckets.values() for q in qs if q["id"] not in picked_ids]
+            picked.extend(spare[:count - len(picked)])
+
+        if len(picked) < count:
+            shortfall[q_type] = count - len(picked)
+        selected.extend(picked)
+
+    if target_total_marks is not None:
+        selected = _adjust_marks(selected, candidates, target_total_marks)
+
+    return selected, shortfall
+
+
+def _marks(q: dict) -> int:
+    return q.get("marks") or 1
+
+
+def _adjust_marks(selected: List[dict], candidates: List[dict], target: int) -> List[dict]:
+    """
+    Swap questions within a type until the marks total hits the target or stops improving.
+
+    Unselected candidates are indexed by (type, difficulty) and then marks, and
+    selected questions by (type, difficulty, marks), so each step compares
+    distinct marks values instead of every selected/candidate pair.
+    """
+    selected = list(selected)
+    selected_ids = {q["id"] for q in selected}
+    total = sum(_marks(q) for q in selected)
+
+    # (type, difficulty) -> marks -> unselected candidates, in candidate order
+    pool: Dict[Tuple[str, Optional[str]], Dict[int, deque]] = defaultdict(lambda: defaultdict(deque))
+    seen_ids = set()
+    for q in candidates:
+        if q["id"] not in selected_ids and q["id"] not in seen_ids:
+            seen_ids.add(q["id"])
+            pool[(q["question_type"], q.get("difficulty"))][_marks(q)].append(q)
+    difficulties: Dict[str, set] = defaultdict(set)
+    for q in candidates:
+        difficulties[q["question_type"]].add(q.get("difficulty"))
+
+    # (type, difficulty, marks) -> indexes into selected, ascending
+    slots: Dict[Tuple[str, Optional[str], int], List[int]] = defaultdict(list)
+    for i, q in enumerate(selected):
+        slots[(q["question_type"], q.get("difficulty"), _marks(q))].append(i)
+
+    for same_difficulty in (True, False):
+        for _ in range(MAX_SWAPS):
+            gap = target - total
+            if gap == 0:
+                return selected
+
+            best = None  # (new |gap|, index in selected, slot, pool key, replacement marks)
+            for slot, indexes in slots.items():
+                if not indexes:
+                    continue
+                q_type, difficulty, marks = slot
+                wanted = marks + gap
+                for pool_difficulty in ([difficulty] if same_difficulty else sorted(difficulties[q_type], key=str)):
+                    for replacement_marks, queue in pool[(q_type, pool_difficulty)].items():
+                        if not queue:
+                            continue
+                        new_gap = abs(wanted - replacement_marks)
+                        if best is None or (new_gap, indexes[0]) < best[:2]:
+                            best = (new_gap, indexes[0], slot, (q_type, pool_difficulty), replacement_marks)
+
+            if best is None or best[0] >= abs(gap):
+                break
+
+            _, i, slot, pool_key, replacement_marks = best
+            replacement = pool[pool_key][replacement_marks].popleft()
+            current = selected[i]
+            slots[slot].pop(0)
+            pool[(current["question_type"], current.get("difficulty"))][_marks(current)].append(current)
+            insort(slots[(replacement["question_type"], replacement.get("difficulty"), replacement_marks)], i)
+            total += replacement_marks - _marks(current)
+            selected[i] = replacement
+
+    return selected
+
+
+class PaperAssemblyService:
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def get_candidates(self, blueprint: PaperBlueprint) -> List[dict]:
+        """
+        Sample candidates per (type, difficulty) in one query (see blueprint_candidates RPC).
+
+        The sample is ordered by a hash of the question id and the seed, so a
+        blueprint with a seed gets the same candidates while the bank is unchanged.
+        """
+        largest = max(blueprint.question_counts.values())
+        per_bucket = min(MAX_CANDIDATES, max(MIN_CANDIDATES, CANDIDATE_FACTOR * largest))
+
+        query = self.db.rpc("blueprint_candidates", {
+            "p_subject": blueprint.subject,
+            "p_question_types": [t.value for t in blueprint.question_counts],
+            "p_per_bucket": per_bucket,
+            "p_class_grade": blueprint.class_grade,
+            "p_category": blueprint.category,
+            "p_topics": blueprint.topics or None,
+            "p_seed": str(blueprint.seed) if blueprint.seed is not None else secrets.token_hex(8)
+        })
+        response = await self.db.execute(query)
+        return response.data or []
+
+    async def assemble(self, blueprint: PaperBlueprint) -> AssembledPaper:
+        candidates = await self.get_candidates(blueprint)
+
+        question_counts = {t.value: n for t, n in blueprint.question_counts.items()}
+        # CPU-bound on large blueprints; keep it off the event loop
+        selected, shortfall = await asyncio.to_thread(
+            select_questions,
+            candidates,
+            question_counts,
+            difficulty_mix=blueprint.difficulty_mix,
+            target_total_marks=blueprint.target_total_marks,
+            rng=random.Random(blueprint.seed)
+        )
+
+        # Present by type (blueprint order), then easy to hard
+        type_order = {t: i for i, t in enumerate(question_counts)}
+        selected.sort(key=lambda q: (
+            type_order[q["question_type"]],
+            DIFFICULTY_ORDER.get(q.get("difficulty"), len(DIFFICULTY_ORDER))
+        ))
+
+        type_counts: Dict[str, int] = defaultdict(int)
+        difficulty_counts: Dict[str, int] = defaultdict(int)
+        for q in selected:
+            type_counts[q["question_type"]] += 1
+            difficulty_counts[q.get("difficulty") or "UNKNOWN"] += 1
+
+        return AssembledPaper(
+            questions=selected,
+            total_marks=sum(_marks(q) for q in selected),
+            target_total_marks=blueprint.target_total_marks,
+            question_counts=dict(type_counts),
+            difficulty_counts=dict(difficulty_counts),
+            shortfall=shortfall
+        )
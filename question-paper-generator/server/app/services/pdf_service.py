@@ -3,6 +3,7 @@
 import io
 import re
 import math
+import time
 from datetime import datetime
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
@@ -11,10 +12,20 @@ from reportlab.lib.units import cm, mm, inch
 from reportlab.platypus import BaseDocTemplate, PageTemplate, Frame, Paragraph, Spacer, Image, Table, TableStyle, KeepTogether
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
 
-# Matplotlib for Latex Rendering
-import matplotlib
-matplotlib.use('Agg') # Non-interactive backend
-import matplotlib.pyplot as plt
+from app.core.metrics import PDF_RENDER_SECONDS
+
+# Matplotlib for Latex Rendering, imported on the first formula (papers without math never need it)
+_plt = None
+
+
+def _pyplot():
+    global _plt
+    if _plt is None:
+        import matplotlib
+        matplotlib.use('Agg') # Non-interactive backend
+        import matplotlib.pyplot as plt
+        _plt = plt
+    return _plt
 
 
 class PDFService:
@@ -24,6 +35,10 @@ class PDFService:
         self.style_sheet = getSampleStyleSheet()
         self._setup_custom_styles()
 
+    def warmup(self):
+        """Load matplotlib's math fonts and renderer before the first paper needs them"""
+        self._render_latex_to_image(r"\frac{a}{b}")
+
     def _setup_custom_styles(self):
         """Define custom paragraph styles."""
         self.style_sheet.add(ParagraphStyle(
@@ -61,6 +76,7 @@ class PDFService:
 
     def _render_latex_to_image(self, latex_str, fontsize=16):
         """Render a LaTeX string to a PNG image in memory and return buffer + dimensions."""
+        plt = _pyplot()
         try:
             fig = plt.figure(figsize=(3, 1))
             fig.text(0.5, 0.5, f"${latex_str}$", fontsize=fontsize, ha='center', va='center')
@@ -120,6 +136,13 @@ class PDFService:
 
     def generate_pdf(self, questions, title="Question Paper", duration=None, instructions=None, total_marks_override=None):
         """Generate PDF using BaseDocTemplate for advanced layout."""
+        start = time.perf_counter()
+        try:
+            return self._render_pdf(questions, title, duration, instructions, total_marks_override)
+        finally:
+            PDF_RENDER_SECONDS.observe(time.perf_counter() - start)
+
+    def _render_pdf(self, questions, title, duration, instructions, total_marks_override):
         buffer = io.BytesIO()
         
         # Constants
@@ -401,5 +424,6 @@ class PDFService:
         doc.build(story)
         pdf_bytes = buffer.getvalue()
         buffer.close()
-        plt.close('all')
+        if _plt is not None:
+            _plt.close('all')
         return pdf_bytes
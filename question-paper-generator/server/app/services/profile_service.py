@@ -1,19 +1,33 @@
-from supabase import Client
+from app.core.database import Database
+from app.core.cache import TTLCache
 from app.models.profile import ProfileCreate, ProfileUpdate
 from typing import Optional
+import os
+
+# Profiles are read on every student/teacher request; a role change reaches
+# other workers within the TTL
+_profile_cache = TTLCache(
+    ttl_seconds=float(os.getenv("PROFILE_CACHE_TTL", "60")),
+    maxsize=int(os.getenv("PROFILE_CACHE_SIZE", "4096")),
+    name="profiles"
+)
+
+# Trust role/category claims added to the access token by
+# custom_access_token_hook (see supabase_schema.sql) instead of reading the profile
+PROFILE_CLAIMS_ENABLED = os.getenv("PROFILE_CLAIMS_ENABLED", "false").lower() == "true"
 
 class ProfileService:
-    def __init__(self, supabase: Client):
-        self.supabase = supabase
+    def __init__(self, db: Database):
+        self.db = db
         self.table = "user_profiles"
     
     async def create_or_update_profile(self, user_id: str, profile_data: ProfileCreate) -> dict:
         """Create or update user profile"""
         # Check if profile exists
-        existing = self.supabase.table(self.table)\
+        query = self.db.table(self.table)\
             .select("*")\
-            .eq("id", user_id)\
-            .execute()
+            .eq("id", user_id)
+        existing = await self.db.execute(query)
         
         profile_dict = {
             "id": user_id,
@@ -26,31 +40,58 @@ class ProfileService:
         
         if existing.data and len(existing.data) > 0:
             # Update existing
-            self.supabase.table(self.table)\
+            query = self.db.table(self.table)\
                 .update(profile_dict)\
-                .eq("id", user_id)\
-                .execute()
+                .eq("id", user_id)
+            await self.db.execute(query)
         else:
             # Create new
-            self.supabase.table(self.table)\
-                .insert(profile_dict)\
-                .execute()
+            query = self.db.table(self.table)\
+                .insert(profile_dict)
+            await self.db.execute(query)
         
         # Explicitly fetch the profile to ensure we return the latest data
         # This avoids issues where insert/update might not return the row
+        _profile_cache.invalidate(user_id)
         return await self.get_profile_by_user_id(user_id)
     
     async def get_profile_by_user_id(self, user_id: str) -> Optional[dict]:
-        """Get profile by User ID"""
-        response = self.supabase.table(self.table)\
+        """Get profile by User ID (cached for PROFILE_CACHE_TTL)"""
+        profile = _profile_cache.get(user_id)
+        if profile is not None:
+            return profile
+        
+        query = self.db.table(self.table)\
             .select("*")\
-            .eq("id", user_id)\
-            .execute()
+            .eq("id", user_id)
+        response = await self.db.execute(query)
         
         if response.data and len(response.data) > 0:
+            _profile_cache.set(user_id, response.data[0])
             return response.data[0]
         return None
     
+    async def get_identity(self, user) -> Optional[dict]:
+        """
+        The caller's profile id, role and category, for access checks.
+        
+        Taken from the verified token claims when PROFILE_CLAIMS_ENABLED is
+        set and the token carries them; otherwise from the (cached) profile.
+        Returns None if the user has no profile yet.
+        """
+        app_metadata = getattr(user, "app_metadata", None) or {}
+        if PROFILE_CLAIMS_ENABLED and app_metadata.get("profile_role"):
+            return {
+                "id": user.id,
+                "role": app_metadata["profile_role"],
+                "category": app_metadata.get("profile_category")
+            }
+        
+        profile = await self.get_profile_by_user_id(user.id)
+        if not profile:
+            return None
+        return {"id": profile["id"], "role": profile.get("role"), "category": profile.get("category")}
+    
     async def update_profile(self, user_id: str, profile_update: ProfileUpdate) -> Optional[dict]:
         """Update profile fields"""
         update_data = profile_update.model_dump(exclude_unset=True)
@@ -61,12 +102,14 @@ class ProfileService:
         if not update_data:
             return None
         
-        response = self.supabase.table(self.table)\
+        query = self.db.table(self.table)\
             .update(update_data)\
-            .eq("id", user_id)\
-            .execute()
+            .eq("id", user_id)
+        response = await self.db.execute(query)
         
+        _profile_cache.invalidate(user_id)
         if response.data and len(response.data) > 0:
+            _profile_cache.set(user_id, response.data[0])
             return response.data[0]
         return None
 
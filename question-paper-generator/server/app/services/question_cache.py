@@ -0,0 +1,256 @@
+"""Read-through cache for the question library."""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from app.core.cache import TTLCache
+from app.core.metrics import CACHE_LOOKUPS
+from app.models.question import QuestionFilter
+
+logger = logging.getLogger(__name__)
+
+QUESTION_CACHE_TTL = float(os.getenv("QUESTION_CACHE_TTL", "30"))
+QUESTION_CACHE_ITEM_SIZE = int(os.getenv("QUESTION_CACHE_ITEM_SIZE", "2048"))
+QUESTION_CACHE_LIST_SIZE = int(os.getenv("QUESTION_CACHE_LIST_SIZE", "256"))
+QUESTION_CACHE_REDIS_URL = os.getenv("QUESTION_CACHE_REDIS_URL")
+# Worker processes serving the app (serve.py exports it)
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+
+def filter_constraints(filters: Optional[QuestionFilter]) -> Dict[str, Any]:
+    """The column -> value constraints a listing applies (plus `search`, if any)"""
+    if not filters:
+        return {}
+    constraints = filters.model_dump(exclude_none=True)
+    if "question_type" in constraints:
+        constraints["question_type"] = constraints["question_type"].value
+    return constraints
+
+
+def listing_matches(constraints: Dict[str, Any], row: Dict[str, Any]) -> bool:
+    """Could `row` appear in a listing with these constraints?"""
+    if "search" in constraints:
+        # Relevance search cannot be evaluated here; assume it might
+        return True
+    return all(row.get(column) == value for column, value in constraints.items())
+
+
+class SharedCacheTier:
+    """
+    Optional Redis tier shared by all workers (set QUESTION_CACHE_REDIS_URL).
+
+    Listing keys embed a generation number that any write bumps, so listings
+    are invalidated as a whole in this tier. Each written question's version
+    is bumped too. Workers tag their in-process entries with the generation or
+    version they were cached at and re-check it on every read, so a write on
+    one worker is seen by all of them. Redis errors count as misses.
+    """
+
+    LIST_GENERATION_KEY = "qcache:list_gen"
+
+    def __init__(self, url: str, ttl_seconds: float):
+        import redis.asyncio as redis  # optional dependency
+
+        self.redis = redis.from_url(url)
+        self.ttl_seconds = int(ttl_seconds)
+        self._hits = CACHE_LOOKUPS.labels("question_shared", "hit")
+        self._misses = CACHE_LOOKUPS.labels("question_shared", "miss")
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = await self.redis.get(key)
+        except Exception as e:
+            logger.warning(f"Shared question cache unavailable: {e}")
+            raw = None
+        if raw is None:
+            self._misses.inc()
+            return None
+        self._hits.inc()
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any) -> None:
+        try:
+            await self.redis.set(key, json.dumps(value, default=str), ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Shared question cache unavailable: {e}")
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if not keys:
+            return
+        try:
+            await self.redis.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Shared question cache unavailable: {e}")
+
+    async def _counter(self, key: str) -> Optional[int]:
+        try:
+            return int(await self.redis.get(key) or 0)
+        except Exception as e:
+            logger.warning(f"Shared question cache unavailable: {e}")
+            return None
+
+    async def list_generation(self) -> Optional[int]:
+        """Current listing generation (None if Redis is unavailable)"""
+        return await self._counter(self.LIST_GENERATION_KEY)
+
+    @staticmethod
+    def list_key(signature: str, generation: int) -> str:
+        digest = hashlib.sha1(signature.encode()).hexdigest()
+        return f"qcache:list:{generation}:{digest}"
+
+    async def question_version(self, question_id: str) -> Optional[int]:
+        """Current version of a question (None if Redis is unavailable)"""
+        return await self._counter(f"qcache:qv:{question_id}")
+
+    async def bump(self, question_ids: Iterable[str]) -> None:
+        """Bump the listing generation and the versions of `question_ids`"""
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.incr(self.LIST_GENERATION_KEY)
+                for qid in question_ids:
+                    # Versions outlive any entry tagged with them, then expire
+                    pipe.incr(f"qcache:qv:{qid}")
+                    pipe.expire(f"qcache:qv:{qid}", 2 * self.ttl_seconds)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Shared question cache unavailable: {e}")
+
+
+class QuestionCache:
+    """
+    Two-tier cache for single questions and library listings.
+
+    The in-process tier is a bounded LRU with a short TTL. Writes invalidate
+    precisely: the written question's entry, and only those listings the row
+    could have entered, left or been displayed in. With the shared tier, an
+    in-process entry is only served while the shared generation (listings)
+    or version (questions) it was cached at is still current, so writes made
+    by other workers invalidate it too.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = QUESTION_CACHE_TTL,
+        item_size: int = QUESTION_CACHE_ITEM_SIZE,
+        list_size: int = QUESTION_CACHE_LIST_SIZE,
+        shared: Optional[SharedCacheTier] = None
+    ):
+        # question_id -> (shared version, row)
+        self.questions = TTLCache(ttl_seconds, maxsize=item_size, name="questions")
+        # signature -> (constraints, (rows, total, next_cursor), shared generation)
+        self.listings = TTLCache(ttl_seconds, maxsize=list_size, name="question_listings")
+        self.shared = shared
+
+    @staticmethod
+    def listing_signature(constraints: Dict[str, Any], **params) -> str:
+        return json.dumps({"filters": constraints, **params}, sort_keys=True, default=str)
+
+    async def get_question(self, question_id: str) -> Optional[dict]:
+        entry = self.questions.get(question_id)
+        if not self.shared:
+            return entry[1] if entry is not None else None
+
+        version = await self.shared.question_version(question_id)
+        if version is None:
+            return None
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        row = await self.shared.get(f"qcache:q:{question_id}")
+        if row is not None:
+            self.questions.set(question_id, (version, row))
+        return row
+
+    async def set_question(self, question_id: str, row: dict) -> None:
+        version = None
+        if self.shared:
+            version = await self.shared.question_version(question_id)
+            if version is None:
+                return
+            await self.shared.set(f"qcache:q:{question_id}", row)
+        self.questions.set(question_id, (version, row))
+
+    async def get_listing(self, signature: str) -> Optional[tuple]:
+        entry = self.listings.get(signature)
+        if not self.shared:
+            return entry[1] if entry is not None else None
+
+        generation = await self.shared.list_generation()
+        if generation is None:
+            return None
+        if entry is not None and entry[2] == generation:
+            return entry[1]
+        value = await self.shared.get(self.shared.list_key(signature, generation))
+        if value is not None:
+            value = tuple(value)
+            self.listings.set(signature, (json.loads(signature)["filters"], value, generation))
+        return value
+
+    async def set_listing(self, signature: str, constraints: Dict[str, Any], value: tuple) -> None:
+        generation = None
+        if self.shared:
+            generation = await self.shared.list_generation()
+            if generation is None:
+                return
+            await self.shared.set(self.shared.list_key(signature, generation), list(value))
+        self.listings.set(signature, (constraints, value, generation))
+
+    async def invalidate(
+        self,
+        rows: Iterable[dict] = (),
+        changed_columns: Iterable[str] = (),
+        question_ids: Iterable[str] = (),
+        all_listings: bool = False
+    ) -> None:
+        """
+        Invalidate after a write.
+
+        - rows: the written rows (new values; for deletes, the deleted rows)
+        - changed_columns: columns the write modified; listings filtering on
+          them may have lost a row
+        - question_ids: ids whose single-question entries must go
+        - all_listings: drop every listing (when the rows are unknown)
+        """
+        rows = list(rows)
+        changed = set(changed_columns)
+        ids = {str(qid) for qid in question_ids} | {str(r["id"]) for r in rows if r.get("id")}
+
+        for qid in ids:
+            self.questions.invalidate(qid)
+
+        if all_listings:
+            self.listings.clear()
+        else:
+            def affected(_signature, entry):
+                constraints = entry[0]
+                if changed & set(constraints):
+                    return True
+                return any(listing_matches(constraints, row) for row in rows)
+
+            self.listings.invalidate_where(affected)
+
+        if self.shared:
+            await self.shared.delete(f"qcache:q:{qid}" for qid in ids)
+            await self.shared.bump(ids)
+
+
+def _create_question_cache(workers: int = WORKERS) -> QuestionCache:
+    shared = None
+    if QUESTION_CACHE_REDIS_URL:
+        try:
+            shared = SharedCacheTier(QUESTION_CACHE_REDIS_URL, QUESTION_CACHE_TTL)
+        except ImportError:
+            logger.warning("QUESTION_CACHE_REDIS_URL is set but redis is not installed; using in-process cache only")
+    if shared is None and workers > 1:
+        # Another worker's writes could not invalidate this one's entries
+        logger.warning(
+            f"Question cache disabled: {workers} workers and no shared tier (set QUESTION_CACHE_REDIS_URL)"
+        )
+        return QuestionCache(item_size=0, list_size=0)
+    return QuestionCache(shared=shared)
+
+
+question_cache = _create_question_cache()
@@ -0,0 +1,263 @@
+"""Streaming bulk import of questions from CSV or JSON Lines."""
+
+import codecs
+import csv
+import json
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from postgrest.exceptions import APIError
+from pydantic import ValidationError
+
+from app.models.question import QuestionCreate
+from app.services.question_service import QuestionService
+from app.services.question_similarity import SimilarityIndex, signature_columns
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = int(os.getenv("QUESTION_IMPORT_BATCH_SIZE", "500"))
+
+SUPPORTED_FORMATS = ("csv", "jsonl")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without holding more than one line in memory."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_jsonl_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (row number, parsed object) per non-empty line; parse errors are yielded as the exception."""
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, e
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (row number, {header: value}) per CSV record. Quoted fields may span lines."""
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    quotes = 0
+    row_number = 0
+    async for line in lines:
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            # Inside a quoted field that continues on the next line
+            continue
+
+        record = "\n".join(pending)
+        pending, quotes = [], 0
+        if not record.strip():
+            continue
+
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+
+        row_number += 1
+        yield row_number, dict(zip(header, values))
+
+    if pending and header is not None:
+        yield row_number + 1, ValueError("Unterminated quoted field")
+
+
+def _validation_errors(e: ValidationError) -> List[Dict[str, str]]:
+    return [
+        {"field": ".".join(str(part) for part in err["loc"]), "message": err["msg"]}
+        for err in e.errors()
+    ]
+
+
+class QuestionImportService:
+    """
+    Validates rows against QuestionCreate as they arrive and writes them in
+    multi-row batches, so memory stays constant regardless of file size.
+
+    `import_stream` yields events suitable for an NDJSON response:
+    - {"type": "error", "row": n, "errors": [...]} for each rejected row
+    - {"type": "duplicate", "row": n, ...} for each row that is a near-duplicate
+      of a question in the bank (`matches`, earlier batches included) or of an
+      earlier row of its batch (`rows`); it is still written
+    - {"type": "progress", ...} after every written batch
+    - {"type": "summary", ...} once at the end
+
+    Rows the database rejects are reported one by one. Any other failure
+    (timeout, connection error) stops the import: one error event with
+    `"row": null` is followed by the summary, and the rows not confirmed as
+    written are counted as failed.
+    """
+
+    def __init__(self, question_service: QuestionService, batch_size: int = IMPORT_BATCH_SIZE):
+        self.question_service = question_service
+        self.batch_size = batch_size
+
+    def _to_row(self, raw: Any) -> Dict[str, Any]:
+        """Validate one raw record and return the dict to write"""
+        if not isinstance(raw, dict):
+            raise ValueError("Each record must be an object")
+
+        # Empty CSV cells mean "not provided" so that model defaults apply
+        data = {k: v for k, v in raw.items() if k and v not in ("", None)}
+        row_id = data.pop("id", None)
+
+        row = QuestionCreate(**data).model_dump()
+        row["question_type"] = row["question_type"].value
+        if row_id is not None:
+            row["id"] = str(UUID(str(row_id)))
+        return row
+
+    @staticmethod
+    def _groups(batch: List[Tuple[int, Dict[str, Any]]]) -> List[List[Tuple[int, Dict[str, Any]]]]:
+        """Rows with and without ids are written separately so keys match within a request"""
+        groups = [
+            [item for item in batch if "id" in item[1]],
+            [item for item in batch if "id" not in item[1]],
+        ]
+        return [group for group in groups if group]
+
+    async def _write_group(self, group: List[Tuple[int, Dict[str, Any]]]) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Write a group in one request; if the database rejects it, retry row by
+        row to attribute errors. Timeouts and connection errors propagate.
+        """
+        try:
+            return await self.question_service.bulk_upsert_questions([row for _, row in group]), []
+        except APIError:
+            pass
+
+        written = 0
+        errors = []
+        for row_number, row in group:
+            try:
+                written += await self.question_service.bulk_upsert_questions([row])
+            except APIError as e:
+                errors.append({"type": "error", "row": row_number, "errors": [{"field": "", "message": e.message or str(e)}]})
+        return written, errors
+
+    async def _find_duplicates(
+        self,
+        batch: List[Tuple[int, Dict[str, Any]]],
+        seen: SimilarityIndex
+    ) -> List[Dict[str, Any]]:
+        """
+        Near-duplicate events for a batch, against the bank (which holds the
+        earlier batches of this import) and earlier rows of the batch.
+
+        Each row is signed once here; the signature columns stay on the row,
+        so the bank lookup and the write reuse them.
+        """
+        rows = [row for _, row in batch]
+        for row in rows:
+            row.update(signature_columns(row))
+        bank_matches = await self.question_service.find_near_duplicates(
+            rows, exclude_ids=[row.get("id") for row in rows]
+        )
+
+        events = []
+        for (row_number, row), matches in zip(batch, bank_matches):
+            if row["minhash"] is None:
+                continue
+            signature = np.array(row["minhash"], dtype=np.int64)
+            earlier = seen.query(signature)
+            seen.add(str(row_number), signature)
+            if matches or earlier:
+                events.append({
+                    "type": "duplicate",
+                    "row": row_number,
+                    "matches": matches,
+                    "rows": [{"row": int(key), "similarity": score} for key, score in earlier]
+                })
+        return events
+
+    async def import_stream(self, chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Dict[str, Any]]:
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported import format: {fmt}")
+
+        lines = iter_lines(chunks)
+        records = iter_csv_records(lines) if fmt == "csv" else iter_jsonl_records(lines)
+
+        processed = written = failed = 0
+        batch: List[Tuple[int, Dict[str, Any]]] = []
+        settled = 0  # rows of the current batch already counted as written or failed
+
+        async def flush():
+            nonlocal written, failed, settled
+            settled = 0
+            # Earlier batches are in the bank by now; only this one needs an in-process index
+            events = await self._find_duplicates(batch, SimilarityIndex())
+            for group in self._groups(batch):
+                group_written, group_errors = await self._write_group(group)
+                written += group_written
+                failed += len(group_errors)
+                settled += len(group)
+                events += group_errors
+            batch.clear()
+            return events
+
+        def abort(e: Exception):
+            nonlocal failed
+            logger.error(f"Question import stopped after {processed} rows: {type(e).__name__}: {e}")
+            failed += len(batch) - settled
+            message = f"Import stopped by a database error ({type(e).__name__}); later rows were not read"
+            return [
+                {"type": "error", "row": None, "errors": [{"field": "", "message": message}]},
+                {"type": "summary", "processed": processed, "written": written, "failed": failed},
+            ]
+
+        async for row_number, raw in records:
+            processed += 1
+            try:
+                if isinstance(raw, Exception):
+                    raise raw
+                batch.append((row_number, self._to_row(raw)))
+            except ValidationError as e:
+                failed += 1
+                yield {"type": "error", "row": row_number, "errors": _validation_errors(e)}
+                continue
+            except (ValueError, TypeError) as e:
+                failed += 1
+                yield {"type": "error", "row": row_number, "errors": [{"field": "", "message": str(e)}]}
+                continue
+
+            if len(batch) >= self.batch_size:
+                try:
+                    events = await flush()
+                except Exception as e:
+                    for event in abort(e):
+                        yield event
+                    return
+                for event in events:
+                    yield event
+                yield {"type": "progress", "processed": processed, "written": written, "failed": failed}
+
+        if batch:
+            try:
+                events = await flush()
+            except Exception as e:
+                for event in abort(e):
+                    yield event
+                return
+            for event in events:
+                yield event
+            yield {"type": "progress", "processed": processed, "written": written, "failed": failed}
+
+        yield {"type": "summary", "processed": processed, "written": written, "failed": failed}
@@ -1,68 +1,286 @@
-from supabase import Client
+from app.core.database import Database
 from app.models.question import QuestionCreate, QuestionUpdate, QuestionFilter
+from app.core.cache import TTLCache
+from app.core.pagination import apply_keyset, split_page
+from app.services.question_cache import question_cache, filter_constraints
+from app.services.question_similarity import (
+    SIGNED_COLUMNS,
+    NUM_PERM,
+    DUPLICATE_THRESHOLD,
+    signature_columns,
+    row_signature,
+    match_candidates,
+    duplicate_pairs,
+    cluster_pairs
+)
+from collections import defaultdict
 from typing import List, Optional
+import asyncio
+import numpy as np
 from uuid import UUID
+import os
+
+# Columns PDFService reads when rendering a paper
+PDF_RENDER_COLUMNS = "id,question_type,question_text,marks,option_a,option_b,option_c,option_d"
+
+# Columns that can be requested with `fields=` and the compact set used by list views
+QUESTION_FIELDS = (
+    "id", "question_type", "source", "subject", "class_grade", "topic", "difficulty",
+    "category", "question_text", "image_url", "option_a", "option_b", "option_c",
+    "option_d", "answer_text", "detailed_solution", "hint", "marks", "is_starred",
+    "created_at", "updated_at"
+)
+QUESTION_SUMMARY_FIELDS = (
+    "id", "question_type", "subject", "class_grade", "topic", "difficulty",
+    "category", "question_text", "marks", "is_starred", "created_at"
+)
+# What `*` means for readers: every field except the stored similarity signature
+QUESTION_COLUMNS = ",".join(QUESTION_FIELDS)
+
+# Columns counted by get_facets
+FACET_COLUMNS = ("subject", "topic", "difficulty", "question_type")
+
+# Rows fetched per request while building the duplicate report
+DUPLICATE_SCAN_PAGE_SIZE = 1000
+# Ids per query when fetching rows by id for the duplicate report (ids go in the URL)
+DUPLICATE_FETCH_BATCH_SIZE = 200
+# Near-duplicate candidates fetched per checked question (most shared LSH bands first)
+DUPLICATE_CANDIDATES_PER_ROW = int(os.getenv("QUESTION_DUPLICATE_CANDIDATES", "50"))
+
+# Aggregated statistics are shared by all requests for the same scope
+_stats_cache = TTLCache(
+    ttl_seconds=float(os.getenv("QUESTION_STATS_CACHE_TTL", "30")), maxsize=256, name="question_stats"
+)
 
 class QuestionService:
-    def __init__(self, supabase: Client):
-        self.supabase = supabase
+    def __init__(self, db: Database):
+        self.db = db
         self.table = "questions"
+        self.cache = question_cache
+    
+    async def _invalidate(self, **kwargs):
+        """Drop cached data affected by a write (see QuestionCache.invalidate)"""
+        _stats_cache.clear()
+        await self.cache.invalidate(**kwargs)
+    
+    def _apply_filters(self, query, filters: Optional[QuestionFilter]):
+        """Apply the library filters (except `search`, see _search_questions) to a PostgREST query"""
+        if not filters:
+            return query
+        
+        if filters.subject:
+            query = query.eq("subject", filters.subject)
+        if filters.class_grade:
+            query = query.eq("class_grade", filters.class_grade)
+        if filters.topic:
+            query = query.eq("topic", filters.topic)
+        if filters.difficulty:
+            query = query.eq("difficulty", filters.difficulty)
+        if filters.question_type:
+            query = query.eq("question_type", filters.question_type.value)
+        if filters.is_starred is not None:
+            query = query.eq("is_starred", filters.is_starred)
+        if filters.category:
+            query = query.eq("category", filters.category)
+        return query
     
     async def get_all_questions(
         self, 
         filters: Optional[QuestionFilter] = None,
         page: int = 1,
-        page_size: int = 20
-    ) -> tuple[List[dict], int]:
-        """Get paginated list of questions with optional filters"""
-        
-        # Start query
-        query = self.supabase.table(self.table).select("*", count="exact")
-        
-        # Apply filters if provided
-        if filters:
-            if filters.subject:
-                query = query.eq("subject", filters.subject)
-            if filters.class_grade:
-                query = query.eq("class_grade", filters.class_grade)
-            if filters.topic:
-                query = query.eq("topic", filters.topic)
-            if filters.difficulty:
-                query = query.eq("difficulty", filters.difficulty)
-            if filters.question_type:
-                query = query.eq("question_type", filters.question_type.value)
-            if filters.is_starred is not None:
-                query = query.eq("is_starred", filters.is_starred)
-            if filters.search:
-                query = query.ilike("question_text", f"%{filters.search}%")
-            if filters.category:
-                query = query.eq("category", filters.category)
-        
-        # Apply pagination
-        offset = (page - 1) * page_size
-        query = query.range(offset, offset + page_size - 1)
-        
-        # Order by created_at descending
-        query = query.order("created_at", desc=True)
-        
-        # Execute query
-        response = query.execute()
-        
-        total_count = response.count if hasattr(response, 'count') else len(response.data)
-        
-        return response.data, total_count
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        columns: str = "*"
+    ) -> tuple[List[dict], Optional[int], Optional[str]]:
+        """
+        Get a page of questions with optional filters, newest first.
+        
+        Pages are keyset-paginated on (created_at, id): pass the returned
+        `next_cursor` to get the following page. Without a cursor, `page` is
+        used as an offset for older clients. The total is a planner estimate
+        (exact for small tables) and is skipped when `include_total` is False.
+        
+        Search results are ordered by relevance, so they are paginated with
+        `page` only and never return a cursor.
+        
+        `columns` is a PostgREST select list; created_at and id are always
+        returned because the cursor is built from them.
+        
+        Returns (questions, total, next_cursor).
+        """
+        if columns == "*":
+            columns = QUESTION_COLUMNS
+        selected = columns.split(",")
+        columns = ",".join(selected + [c for c in ("id", "created_at") if c not in selected])
+        
+        constraints = filter_constraints(filters)
+        signature = self.cache.listing_signature(
+            constraints, page=page, page_size=page_size, cursor=cursor,
+            include_total=include_total, columns=columns
+        )
+        cached = await self.cache.get_listing(signature)
+        if cached is not None:
+            return cached
+        
+        result = await self._query_questions(filters, page, page_size, cursor, include_total, columns)
+        await self.cache.set_listing(signature, constraints, result)
+        return result
+    
+    async def _query_questions(
+        self,
+        filters: Optional[QuestionFilter],
+        page: int,
+        page_size: int,
+        cursor: Optional[str],
+        include_total: bool,
+        columns: str
+    ) -> tuple[List[dict], Optional[int], Optional[str]]:
+        """Run the library query for get_all_questions (uncached)"""
+        if filters and filters.search:
+            return await self._search_questions(filters, page, page_size, include_total, columns)
+        
+        query = self.db.table(self.table).select(
+            columns, count="estimated" if include_total else None
+        )
+        
+        query = self._apply_filters(query, filters)
+        query = apply_keyset(query, cursor)
+        
+        # Fetch one extra row to know whether there is a next page
+        if cursor:
+            query = query.limit(page_size + 1)
+        else:
+            offset = (page - 1) * page_size
+            query = query.range(offset, offset + page_size)
+        
+        response = await self.db.execute(query)
+        
+        questions, next_cursor = split_page(response.data, page_size)
+        total_count = response.count if include_total else None
+        
+        return questions, total_count, next_cursor
+    
+    async def _search_questions(
+        self,
+        filters: QuestionFilter,
+        page: int,
+        page_size: int,
+        include_total: bool,
+        columns: str
+    ) -> tuple[List[dict], Optional[int], Optional[str]]:
+        """
+        Ranked full-text search with trigram fallback via the `search_questions`
+        RPC (see supabase_schema.sql). The other filters are applied in the same
+        query, and rows come back already projected to `columns`.
+        """
+        query = self.db.rpc("search_questions", {
+            "p_query": filters.search,
+            "p_subject": filters.subject,
+            "p_class_grade": filters.class_grade,
+            "p_topic": filters.topic,
+            "p_difficulty": filters.difficulty,
+            "p_question_type": filters.question_type.value if filters.question_type else None,
+            "p_is_starred": filters.is_starred,
+            "p_category": filters.category,
+            "p_limit": page_size,
+            "p_offset": (page - 1) * page_size,
+            "p_columns": columns.split(",")
+        })
+        response = await self.db.execute(query)
+        
+        rows = response.data or []
+        questions = [row["question"] for row in rows]
+        
+        total_count = None
+        if include_total:
+            total_count = rows[0]["total_count"] if rows else 0
+        
+        return questions, total_count, None
+    
+    async def get_facets(self, filters: Optional[QuestionFilter] = None) -> dict:
+        """
+        Counts per subject, topic, difficulty and question_type under the
+        library filters (including `search`), from one grouped query (the
+        `question_facets` RPC, see supabase_schema.sql).
+        
+        Cached with the listings, so writes invalidate exactly the facet sets
+        whose filter the written row matches.
+        """
+        constraints = filter_constraints(filters)
+        signature = self.cache.listing_signature(constraints, facets=True)
+        cached = await self.cache.get_listing(signature)
+        if cached is not None:
+            return cached[0]
+        
+        filters = filters or QuestionFilter()
+        query = self.db.rpc("question_facets", {
+            "p_query": filters.search,
+            "p_subject": filters.subject,
+            "p_class_grade": filters.class_grade,
+            "p_topic": filters.topic,
+            "p_difficulty": filters.difficulty,
+            "p_question_type": filters.question_type.value if filters.question_type else None,
+            "p_is_starred": filters.is_starred,
+            "p_category": filters.category
+        })
+        response = await self.db.execute(query)
+        
+        facets = {facet: {} for facet in FACET_COLUMNS}
+        facets.update(response.data or {})
+        
+        await self.cache.set_listing(signature, constraints, (facets,))
+        return facets
     
     async def get_question_by_id(self, question_id: UUID) -> Optional[dict]:
         """Get a single question by ID"""
-        response = self.supabase.table(self.table)\
-            .select("*")\
-            .eq("id", str(question_id))\
-            .execute()
+        cached = await self.cache.get_question(str(question_id))
+        if cached is not None:
+            return cached
+        
+        query = self.db.table(self.table)\
+            .select(QUESTION_COLUMNS)\
+            .eq("id", str(question_id))
+        response = await self.db.execute(query)
         
         if response.data:
+            await self.cache.set_question(str(question_id), response.data[0])
             return response.data[0]
         return None
     
+    async def get_questions_by_ids(
+        self,
+        question_ids: List[UUID],
+        columns: str = QUESTION_COLUMNS
+    ) -> tuple[List[dict], List[str]]:
+        """
+        Get several questions in a single query.
+        
+        Rows are returned in the order of `question_ids` (duplicates are kept),
+        together with the list of ids that were not found.
+        """
+        requested = [str(qid) for qid in question_ids]
+        unique_ids = list(dict.fromkeys(requested))
+        
+        if not unique_ids:
+            return [], []
+        
+        # The id column is needed to restore the requested order
+        if "id" not in [c.strip() for c in columns.split(",")]:
+            columns = f"id,{columns}"
+        
+        query = self.db.table(self.table)\
+            .select(columns)\
+            .in_("id", unique_ids)
+        response = await self.db.execute(query)
+        
+        by_id = {str(row["id"]): row for row in response.data}
+        
+        ordered = [by_id[qid] for qid in requested if qid in by_id]
+        missing = [qid for qid in unique_ids if qid not in by_id]
+        
+        return ordered, missing
+    
     async def create_question(self, question: QuestionCreate) -> dict:
         """Create a new question"""
         question_dict = question.model_dump(exclude_unset=True)
@@ -70,13 +288,42 @@ class QuestionService:
         # Convert enum to string
         if "question_type" in question_dict:
             question_dict["question_type"] = question_dict["question_type"].value
+        question_dict.update(signature_columns(question_dict))
         
-        response = self.supabase.table(self.table)\
-            .insert(question_dict)\
-            .execute()
+        query = self.db.table(self.table)\
+            .insert(question_dict)
+        response = await self.db.execute(query)
         
+        await self._invalidate(rows=response.data)
         return response.data[0]
     
+    async def bulk_upsert_questions(self, rows: List[dict]) -> int:
+        """
+        Write many questions in a single multi-row request.
+        
+        All rows must have the same keys. If they carry an `id`, existing
+        questions with that id are updated instead of duplicated.
+        Returns the number of rows written.
+        """
+        if not rows:
+            return 0
+        
+        rows = [{**row, **row_signature(row)} for row in rows]
+        
+        if "id" in rows[0]:
+            query = self.db.table(self.table)\
+                .upsert(rows, on_conflict="id", returning="minimal")
+        else:
+            query = self.db.table(self.table)\
+                .insert(rows, returning="minimal")
+        await self.db.execute(query)
+        
+        await self._invalidate(
+            question_ids=[row["id"] for row in rows if "id" in row],
+            all_listings=True
+        )
+        return len(rows)
+    
     async def update_question(self, question_id: UUID, question: QuestionUpdate) -> Optional[dict]:
         """Update an existing question"""
         update_data = question.model_dump(exclude_unset=True)
@@ -91,71 +338,213 @@ class QuestionService:
         if not update_data:
             return None
         
-        response = self.supabase.table(self.table)\
+        query = self.db.table(self.table)\
             .update(update_data)\
-            .eq("id", str(question_id))\
-            .execute()
+            .eq("id", str(question_id))
+        response = await self.db.execute(query)
+        
+        # Text changed: refresh the similarity signature from the updated row
+        if response.data and set(update_data) & set(SIGNED_COLUMNS):
+            query = self.db.table(self.table)\
+                .update(signature_columns(response.data[0]), returning="minimal")\
+                .eq("id", str(question_id))
+            await self.db.execute(query)
         
+        await self._invalidate(
+            rows=response.data,
+            changed_columns=update_data.keys(),
+            question_ids=[question_id]
+        )
         if response.data:
             return response.data[0]
         return None
     
     async def delete_question(self, question_id: UUID) -> bool:
         """Delete a question"""
-        response = self.supabase.table(self.table)\
+        query = self.db.table(self.table)\
             .delete()\
-            .eq("id", str(question_id))\
-            .execute()
+            .eq("id", str(question_id))
+        response = await self.db.execute(query)
         
+        await self._invalidate(rows=response.data, question_ids=[question_id])
         return len(response.data) > 0
     
     async def toggle_star(self, question_id: UUID) -> Optional[dict]:
-        """Toggle the starred status of a question"""
-        # First get current status
-        current = await self.get_question_by_id(question_id)
-        if not current:
-            return None
-        
-        # Toggle the value
-        new_status = not current.get("is_starred", False)
-        
-        response = self.supabase.table(self.table)\
-            .update({"is_starred": new_status})\
-            .eq("id", str(question_id))\
-            .execute()
+        """Toggle the starred status of a question atomically (one round trip)"""
+        query = self.db.rpc("toggle_question_star", {"p_question_id": str(question_id)})
+        response = await self.db.execute(query)
         
+        await self._invalidate(
+            rows=response.data,
+            changed_columns=["is_starred"],
+            question_ids=[question_id]
+        )
         if response.data:
             return response.data[0]
         return None
     
-    async def get_statistics(self) -> dict:
-        """Get question statistics"""
-        # Get all questions
-        all_questions = self.supabase.table(self.table).select("*").execute()
-        questions = all_questions.data
+    async def set_starred(self, question_ids: List[UUID], is_starred: bool) -> List[str]:
+        """Star or unstar many questions in one statement. Returns the ids that changed."""
+        if not question_ids:
+            return []
+        
+        query = self.db.rpc("set_questions_starred", {
+            "p_question_ids": list(dict.fromkeys(str(qid) for qid in question_ids)),
+            "p_is_starred": is_starred
+        })
+        response = await self.db.execute(query)
+        
+        updated_ids = [str(qid) for qid in response.data or []]
+        # Only ids come back, so listings that may show these rows are unknown
+        await self._invalidate(question_ids=updated_ids, all_listings=bool(updated_ids))
+        return updated_ids
+    
+    async def get_statistics(
+        self,
+        category: Optional[str] = None,
+        user_id: Optional[UUID] = None
+    ) -> dict:
+        """
+        Get question statistics, optionally scoped to a category and/or owner.
+        
+        Counts are computed in the database by the `question_statistics` RPC
+        (see supabase_schema.sql) and cached for a short TTL per scope.
+        """
+        cache_key = (category, str(user_id) if user_id else None)
+        stats = _stats_cache.get(cache_key)
+        if stats is not None:
+            return stats
+        
+        query = self.db.rpc("question_statistics", {
+            "p_category": category,
+            "p_user_id": cache_key[1]
+        })
+        response = await self.db.execute(query)
         
-        # Calculate stats
-        stats = {
-            "total_questions": len(questions),
+        stats = response.data or {
+            "total_questions": 0,
             "by_type": {},
             "by_subject": {},
             "by_difficulty": {},
             "by_class": {},
-            "starred_count": sum(1 for q in questions if q.get("is_starred", False))
+            "starred_count": 0
         }
         
-        # Count by type
-        for q in questions:
-            q_type = q.get("question_type")
-            stats["by_type"][q_type] = stats["by_type"].get(q_type, 0) + 1
-            
-            subject = q.get("subject")
-            stats["by_subject"][subject] = stats["by_subject"].get(subject, 0) + 1
-            
-            difficulty = q.get("difficulty")
-            stats["by_difficulty"][difficulty] = stats["by_difficulty"].get(difficulty, 0) + 1
-            
-            class_grade = q.get("class_grade")
-            stats["by_class"][class_grade] = stats["by_class"].get(class_grade, 0) + 1
-        
-        return stats
\ No newline at end of file
+        _stats_cache.set(cache_key, stats)
+        return stats
+    
+    async def find_near_duplicates(self, rows: List[dict], exclude_ids: Optional[List[str]] = None) -> List[List[dict]]:
+        """
+        Existing questions that are near-duplicates of each row, best first.
+        
+        Candidates for all rows are fetched in one indexed query (the
+        `near_duplicate_candidates` RPC matches shared LSH bands, up to
+        DUPLICATE_CANDIDATES_PER_ROW per row) and confirmed by comparing
+        signatures. Rows that already carry their signature columns are not
+        signed again. Returns one match list per row.
+        """
+        signatures = [row_signature(row) for row in rows]
+        signed = [i for i, sig in enumerate(signatures) if sig["similarity_bands"]]
+        if not signed:
+            return [[] for _ in rows]
+        
+        query = self.db.rpc("near_duplicate_candidates", {
+            "p_row_bands": [signatures[i]["similarity_bands"] for i in signed],
+            "p_per_row": DUPLICATE_CANDIDATES_PER_ROW
+        })
+        response = await self.db.execute(query)
+        candidates = defaultdict(list)
+        for candidate in response.data or []:
+            candidates[signed[candidate["row_index"]]].append(candidate)
+        
+        exclude_ids = exclude_ids or [None] * len(rows)
+        return [
+            match_candidates(sig["minhash"], candidates[i], exclude_id=exclude_id) if sig["minhash"] else []
+            for i, (sig, exclude_id) in enumerate(zip(signatures, exclude_ids))
+        ]
+    
+    async def get_duplicate_report(
+        self,
+        subject: Optional[str] = None,
+        threshold: float = DUPLICATE_THRESHOLD
+    ) -> dict:
+        """
+        Groups of near-duplicate questions across the bank (or one subject).
+        
+        Only the stored signatures and band keys are scanned (in id order);
+        rows written before signatures existed are fetched, signed and their
+        signatures stored (set_question_signatures RPC), so later insert and
+        import checks can match them too. Rows
+        sharing a band key are compared, on a worker thread so the event loop
+        keeps serving requests. Text is loaded for the clustered rows only.
+        """
+        rows: List[dict] = []
+        last_id = None
+        while True:
+            query = self.db.table(self.table).select("id,minhash,similarity_bands")
+            if subject:
+                query = query.eq("subject", subject)
+            if last_id:
+                query = query.gt("id", last_id)
+            query = query.order("id").limit(DUPLICATE_SCAN_PAGE_SIZE)
+            response = await self.db.execute(query)
+            rows.extend(response.data)
+            if len(response.data) < DUPLICATE_SCAN_PAGE_SIZE:
+                break
+            last_id = response.data[-1]["id"]
+        
+        unsigned = [row for row in rows if not row.get("minhash")]
+        for start in range(0, len(unsigned), DUPLICATE_FETCH_BATCH_SIZE):
+            chunk = unsigned[start:start + DUPLICATE_FETCH_BATCH_SIZE]
+            texts, _ = await self.get_questions_by_ids([row["id"] for row in chunk], columns=",".join(SIGNED_COLUMNS))
+            computed = await asyncio.to_thread(lambda: [signature_columns(text) for text in texts])
+            by_id = {str(text["id"]): sig for text, sig in zip(texts, computed)}
+            for row in chunk:
+                row.update(by_id.get(str(row["id"]), {}))
+            backfill = [{"id": qid, **sig} for qid, sig in by_id.items() if sig["minhash"]]
+            if backfill:
+                await self.db.execute(self.db.rpc("set_question_signatures", {"p_rows": backfill}))
+        
+        signed = [row for row in rows if row.get("minhash") and row.get("similarity_bands")]
+        pairs = await asyncio.to_thread(
+            duplicate_pairs,
+            np.array([row["minhash"] for row in signed], dtype=np.int64).reshape(-1, NUM_PERM),
+            threshold,
+            [row["similarity_bands"] for row in signed]
+        )
+        best = {}
+        for i, j, score in pairs:
+            for k in (i, j):
+                best[k] = max(best.get(k, 0.0), score)
+        
+        members = cluster_pairs(pairs)
+        details = {}
+        clustered_ids = [str(signed[k]["id"]) for cluster in members for k in cluster]
+        for start in range(0, len(clustered_ids), DUPLICATE_FETCH_BATCH_SIZE):
+            found, _ = await self.get_questions_by_ids(
+                clustered_ids[start:start + DUPLICATE_FETCH_BATCH_SIZE], columns="id,subject,question_text"
+            )
+            details.update((str(row["id"]), row) for row in found)
+        
+        clusters = [
+            {
+                "size": len(cluster),
+                "questions": [
+                    {
+                        "id": str(signed[k]["id"]),
+                        "subject": details.get(str(signed[k]["id"]), {}).get("subject"),
+                        "question_text": details.get(str(signed[k]["id"]), {}).get("question_text"),
+                        "similarity": best[k]
+                    }
+                    for k in cluster
+                ]
+            }
+            for cluster in members
+        ]
+        
+        return {
+            "scanned": len(rows),
+            "threshold": threshold,
+            "duplicate_pairs": len(pairs),
+            "clusters": clusters
+        }
@@ -0,0 +1,196 @@
+"""
+Near-duplicate detection for questions.
+
+Each question gets a MinHash signature over character shingles of its
+normalized text and options (numbers are masked, so questions that differ
+only in numbers collide). Signatures are split into LSH bands; two questions
+sharing any band are candidates, confirmed by comparing signatures.
+
+The signature and band keys are stored on the row (`minhash`,
+`similarity_bands`), so a GIN index on the bands finds candidates in the
+database with one indexed lookup.
+"""
+
+import os
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+# Estimated Jaccard similarity at or above which two questions are near-duplicates
+DUPLICATE_THRESHOLD = float(os.getenv("QUESTION_DUPLICATE_THRESHOLD", "0.8"))
+
+SIGNED_COLUMNS = ("question_text", "option_a", "option_b", "option_c", "option_d")
+SIGNATURE_COLUMNS = ("minhash", "similarity_bands")
+
+_PRIME = (1 << 31) - 1  # Mersenne prime; hash values fit a Postgres integer
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, _PRIME, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_NON_WORD = re.compile(r"[^\w#]+")
+
+
+def normalize(row: dict) -> str:
+    """Lowercased text and options with numbers masked and punctuation dropped"""
+    text = " ".join(str(row.get(column) or "") for column in SIGNED_COLUMNS)
+    text = _NUMBER.sub("#", text.lower())
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def shingles(text: str) -> set:
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str) -> Optional[np.ndarray]:
+    """MinHash signature of a normalized text (None if the text is empty)"""
+    hashes = [zlib.crc32(s.encode()) for s in shingles(text)]
+    if not hashes:
+        return None
+    x = np.array(hashes, dtype=np.uint64)
+    # (a * x + b) mod p for every permutation and shingle at once
+    permuted = (np.outer(_A, x) + _B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.int64)
+
+
+def band_keys(signature: np.ndarray) -> List[str]:
+    return [
+        f"b{band}_{zlib.crc32(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()):08x}"
+        for band in range(BANDS)
+    ]
+
+
+def signature_columns(row: dict) -> Dict[str, Optional[list]]:
+    """Values for the stored signature columns of a question row"""
+    signature = minhash(normalize(row))
+    if signature is None:
+        return {"minhash": None, "similarity_bands": None}
+    return {"minhash": signature.tolist(), "similarity_bands": band_keys(signature)}
+
+
+def row_signature(row: dict) -> Dict[str, Optional[list]]:
+    """The row's signature columns, computed only if the row does not carry them yet"""
+    if "minhash" in row:
+        return {column: row.get(column) for column in SIGNATURE_COLUMNS}
+    return signature_columns(row)
+
+
+def similarities(signature: Sequence[int], others: Sequence[Sequence[int]]) -> np.ndarray:
+    """Estimated Jaccard similarity between one signature and each of `others`"""
+    if not len(others):
+        return np.zeros(0)
+    return (np.asarray(others) == np.asarray(signature)).mean(axis=1)
+
+
+def match_candidates(
+    signature: Sequence[int],
+    candidates: List[dict],
+    threshold: float = DUPLICATE_THRESHOLD,
+    exclude_id: Optional[str] = None
+) -> List[dict]:
+    """Confirm LSH candidates (rows with `id` and `minhash`); best matches first"""
+    candidates = [
+        c for c in candidates
+        if c.get("minhash") and len(c["minhash"]) == NUM_PERM and str(c["id"]) != str(exclude_id)
+    ]
+    scores = similarities(signature, [c["minhash"] for c in candidates])
+    matches = [
+        {"id": str(c["id"]), "similarity": round(float(score), 3)}
+        for c, score in zip(candidates, scores)
+        if score >= threshold
+    ]
+    return sorted(matches, key=lambda m: m["similarity"], reverse=True)
+
+
+class SimilarityIndex:
+    """In-process LSH index, e.g. for rows of one import that are not in the database yet"""
+
+    def __init__(self, threshold: float = DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self.buckets: Dict[str, List[str]] = defaultdict(list)
+        self.signatures: Dict[str, np.ndarray] = {}
+
+    def add(self, key: str, signature: np.ndarray) -> None:
+        self.signatures[key] = signature
+        for band in band_keys(signature):
+            self.buckets[band].append(key)
+
+    def query(self, signature: np.ndarray) -> List[Tuple[str, float]]:
+        keys = list({key for band in band_keys(signature) for key in self.buckets.get(band, ())})
+        scores = similarities(signature, [self.signatures[key] for key in keys])
+        return sorted(
+            ((key, round(float(score), 3)) for key, score in zip(keys, scores) if score >= self.threshold),
+            key=lambda match: match[1],
+            reverse=True
+        )
+
+
+def duplicate_pairs(
+    signatures: np.ndarray,
+    threshold: float = DUPLICATE_THRESHOLD,
+    bands: Optional[Sequence[Sequence[str]]] = None
+) -> List[Tuple[int, int, float]]:
+    """
+    All pairs of rows in an (n, NUM_PERM) signature matrix at or above the
+    threshold, as (i, j, similarity) with i < j.
+
+    Rows sharing a band key are candidates. Pass the stored `similarity_bands`
+    as `bands` to reuse them; otherwise they are computed from the signatures.
+    """
+    n = len(signatures)
+    if n < 2:
+        return []
+    if bands is None:
+        bands = [band_keys(signature) for signature in signatures]
+
+    buckets: Dict[str, List[int]] = defaultdict(list)
+    for i, keys in enumerate(bands):
+        for key in keys:
+            buckets[key].append(i)
+
+    pairs = set()
+    for members in buckets.values():
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                pairs.add((members[a], members[b]))
+
+    if not pairs:
+        return []
+
+    left, right = np.array(sorted(pairs)).T
+    scores = (signatures[left] == signatures[right]).mean(axis=1)
+    keep = scores >= threshold
+    return [
+        (int(i), int(j), round(float(s), 3))
+        for i, j, s in zip(left[keep], right[keep], scores[keep])
+    ]
+
+
+def cluster_pairs(pairs: Iterable[Tuple[int, int, float]]) -> List[List[int]]:
+    """Group pairwise matches into clusters (connected components)"""
+    parent: Dict[int, int] = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j, _ in pairs:
+        parent[find(i)] = find(j)
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for x in parent:
+        clusters[find(x)].append(x)
+    return sorted((sorted(c) for c in clusters.values()), key=len, reverse=True)
@@ -1,10 +1,72 @@
-from supabase import Client
-from typing import List, Optional, Dict, Any
+from app.core.database import Database
+from app.core.pagination import apply_keyset, split_page
+from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
+import asyncio
+
+# Columns that can be requested with `fields=` and the compact sets used by list views.
+# card_count / question_count are computed columns (see supabase_schema.sql).
+NOTE_FIELDS = ("id", "title", "content", "source_pdf_name", "created_at", "updated_at")
+NOTE_SUMMARY_FIELDS = ("id", "title", "source_pdf_name", "created_at", "updated_at")
+
+FLASHCARD_FIELDS = ("id", "deck_title", "cards", "source_pdf_name", "created_at", "card_count")
+FLASHCARD_SUMMARY_FIELDS = ("id", "deck_title", "source_pdf_name", "created_at", "card_count")
+
+QUIZ_FIELDS = ("id", "title", "questions", "score", "total_questions", "source_pdf_name", "created_at", "question_count")
+QUIZ_SUMMARY_FIELDS = ("id", "title", "score", "total_questions", "source_pdf_name", "created_at", "question_count")
+
+MINDMAP_FIELDS = ("id", "title", "data", "source_pdf_name", "created_at")
+MINDMAP_SUMMARY_FIELDS = ("id", "title", "source_pdf_name", "created_at")
+
+# Listing name -> table
+CONTENT_TABLES = {
+    "notes": "user_notes",
+    "flashcards": "user_flashcards",
+    "quizzes": "user_quizzes",
+    "mindmaps": "user_mindmaps",
+}
+
+# Listing name -> compact columns shown on the dashboard
+DASHBOARD_FIELDS = {
+    "notes": NOTE_SUMMARY_FIELDS,
+    "flashcards": FLASHCARD_SUMMARY_FIELDS,
+    "quizzes": QUIZ_SUMMARY_FIELDS,
+    "mindmaps": MINDMAP_SUMMARY_FIELDS,
+}
 
 class StudentService:
-    def __init__(self, supabase: Client):
-        self.supabase = supabase
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def _list(
+        self,
+        table: str,
+        user_id: str,
+        columns: str = "*",
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        The user's rows, newest first, keyset-paginated on (created_at, id).
+        Returns (rows, next_cursor); without a limit every row is returned.
+        """
+        if columns != "*" and "created_at" not in columns.split(","):
+            columns = f"{columns},created_at"
+        query = self.db.table(table).select(columns).eq("user_id", user_id)
+        query = apply_keyset(query, cursor)
+        if limit:
+            query = query.limit(limit + 1)
+        res = await self.db.execute(query)
+        if limit:
+            return split_page(res.data, limit)
+        return res.data, None
+
+    async def get_latest(self, listing: str, user_id: str, cursor: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """id and created_at of the newest row a listing page would start with (for conditional GETs)"""
+        query = self.db.table(CONTENT_TABLES[listing]).select("id,created_at").eq("user_id", user_id)
+        query = apply_keyset(query, cursor).limit(1)
+        res = await self.db.execute(query)
+        return res.data[0] if res.data else None
 
     async def create_note(self, user_id: str, title: str, content: str, source_pdf: Optional[str] = None) -> Dict[str, Any]:
         data = {
@@ -13,12 +75,11 @@ class StudentService:
             "content": content,
             "source_pdf_name": source_pdf
         }
-        res = self.supabase.table("user_notes").insert(data).execute()
+        res = await self.db.execute(self.db.table("user_notes").insert(data))
         return res.data[0] if res.data else None
 
-    async def get_notes(self, user_id: str) -> List[Dict[str, Any]]:
-        res = self.supabase.table("user_notes").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
-        return res.data
+    async def get_notes(self, user_id: str, columns: str = "*", limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self._list("user_notes", user_id, columns, limit, cursor)
 
     async def create_flashcards(self, user_id: str, deck_title: str, cards: List[Dict[str, str]], source_pdf: Optional[str] = None) -> Dict[str, Any]:
         data = {
@@ -27,12 +88,11 @@ class StudentService:
             "cards": cards,
             "source_pdf_name": source_pdf
         }
-        res = self.supabase.table("user_flashcards").insert(data).execute()
+        res = await self.db.execute(self.db.table("user_flashcards").insert(data))
         return res.data[0] if res.data else None
 
-    async def get_flashcards(self, user_id: str) -> List[Dict[str, Any]]:
-        res = self.supabase.table("user_flashcards").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
-        return res.data
+    async def get_flashcards(self, user_id: str, columns: str = "*", limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self._list("user_flashcards", user_id, columns, limit, cursor)
 
     async def create_quiz(self, user_id: str, title: str, questions: List[Dict[str, Any]], source_pdf: Optional[str] = None) -> Dict[str, Any]:
         data = {
@@ -41,12 +101,11 @@ class StudentService:
             "questions": questions,
             "source_pdf_name": source_pdf
         }
-        res = self.supabase.table("user_quizzes").insert(data).execute()
+        res = await self.db.execute(self.db.table("user_quizzes").insert(data))
         return res.data[0] if res.data else None
     
-    async def get_quizzes(self, user_id: str) -> List[Dict[str, Any]]:
-        res = self.supabase.table("user_quizzes").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
-        return res.data
+    async def get_quizzes(self, user_id: str, columns: str = "*", limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self._list("user_quizzes", user_id, columns, limit, cursor)
 
     async def create_mindmap(self, user_id: str, title: str, mindmap_data: Dict[str, Any], source_pdf: Optional[str] = None) -> Dict[str, Any]:
         data = {
@@ -55,9 +114,26 @@ class StudentService:
             "data": mindmap_data,
             "source_pdf_name": source_pdf
         }
-        res = self.supabase.table("user_mindmaps").insert(data).execute()
+        res = await self.db.execute(self.db.table("user_mindmaps").insert(data))
         return res.data[0] if res.data else None
 
-    async def get_mindmaps(self, user_id: str) -> List[Dict[str, Any]]:
-        res = self.supabase.table("user_mindmaps").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
-        return res.data
+    async def get_mindmaps(self, user_id: str, columns: str = "*", limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self._list("user_mindmaps", user_id, columns, limit, cursor)
+
+    async def _summarize(self, listing: str, user_id: str, recent: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """Row count and newest `recent` summaries of one listing, in a single query"""
+        query = self.db.table(CONTENT_TABLES[listing])\
+            .select(",".join(DASHBOARD_FIELDS[listing]), count="exact")\
+            .eq("user_id", user_id)
+        query = apply_keyset(query, None).limit(recent)
+        res = await self.db.execute(query)
+        return res.count or 0, res.data
+
+    async def get_dashboard(self, user_id: str, recent: int = 5) -> Dict[str, Any]:
+        """Counts and latest summaries for all four listings, queried concurrently"""
+        listings = list(CONTENT_TABLES)
+        results = await asyncio.gather(*(self._summarize(listing, user_id, recent) for listing in listings))
+        return {
+            "counts": {listing: count for listing, (count, _) in zip(listings, results)},
+            "recent": {listing: rows for listing, (_, rows) in zip(listings, results)},
+        }
@@ -1,10 +1,21 @@
-from supabase import Client
+from app.core.database import Database
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 
+# Columns that can be requested with `fields=` and the compact set used by list views.
+# question_count is a computed column (see supabase_schema.sql).
+PAPER_FIELDS = (
+    "id", "title", "category", "total_marks", "duration_minutes", "instructions",
+    "questions", "created_at", "updated_at", "question_count"
+)
+PAPER_SUMMARY_FIELDS = (
+    "id", "title", "category", "total_marks", "duration_minutes",
+    "created_at", "updated_at", "question_count"
+)
+
 class TeacherService:
-    def __init__(self, supabase: Client):
-        self.supabase = supabase
+    def __init__(self, db: Database):
+        self.db = db
 
     async def create_paper(self, user_id: str, title: str, category: str, 
                           total_marks: int, duration_minutes: int, 
@@ -18,16 +29,16 @@ class TeacherService:
             "instructions": instructions,
             "questions": questions
         }
-        res = self.supabase.table("question_papers").insert(data).execute()
+        res = await self.db.execute(self.db.table("question_papers").insert(data))
         return res.data[0] if res.data else None
 
-    async def get_papers(self, user_id: str) -> List[Dict[str, Any]]:
-        res = self.supabase.table("question_papers").select("*")\
+    async def get_papers(self, user_id: str, columns: str = "*") -> List[Dict[str, Any]]:
+        query = self.db.table("question_papers").select(columns)\
             .eq("user_id", user_id)\
-            .order("created_at", desc=True)\
-            .execute()
+            .order("created_at", desc=True)
+        res = await self.db.execute(query)
         return res.data
     
     async def get_paper_by_id(self, paper_id: str) -> Optional[Dict[str, Any]]:
-        res = self.supabase.table("question_papers").select("*").eq("id", paper_id).execute()
+        res = await self.db.execute(self.db.table("question_papers").select("*").eq("id", paper_id))
         return res.data[0] if res.data else None
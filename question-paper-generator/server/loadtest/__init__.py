@@ -0,0 +1,9 @@
+"""
+Offline load testing.
+
+`fake_gemini` and `fake_supabase` are local stand-ins for the Gemini API and
+Supabase (PostgREST + Auth). Point the API at them with GEMINI_BASE_URL and
+SUPABASE_URL and it can be benchmarked without any external service.
+`run` drives the scenarios in `scenarios` against it; `bench_json` times
+response serialization on its own.
+"""
@@ -0,0 +1,153 @@
+"""
+Serialization benchmark for the large JSON responses.
+
+    python -m loadtest.bench_json --output json-bench.json
+
+Builds realistic payloads (a page of full questions, a student's notes,
+a teacher's papers with their embedded questions) and times the previous
+response path (Pydantic re-validation, jsonable_encoder, json.dumps) against
+the current one (orjson on the trusted rows), plus gzip/brotli size and time.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.compression import brotli, compress
+from app.models.question import Question, QuestionListResponse
+from loadtest.scenarios import FILLER_WORDS, SAMPLE_CONTENT, sample_question
+
+
+def timestamp(rng: random.Random) -> str:
+    moment = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=rng.randint(0, 10**7))
+    return moment.isoformat()
+
+
+def question_row(rng: random.Random, i: int) -> dict:
+    row = sample_question(rng, i)
+    row.update({
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "source": "manual",
+        "image_url": None,
+        "detailed_solution": " ".join(rng.choices(FILLER_WORDS, k=80)),
+        "hint": "Start from the definition.",
+        "is_starred": rng.random() < 0.1,
+        "created_at": timestamp(rng),
+        "updated_at": timestamp(rng),
+    })
+    row.setdefault("option_a", None)
+    row.setdefault("option_b", None)
+    row.setdefault("option_c", None)
+    row.setdefault("option_d", None)
+    return row
+
+
+def payloads(seed: int = 7) -> Dict[str, dict]:
+    rng = random.Random(seed)
+    questions = [question_row(rng, i) for i in range(100)]
+    notes = [
+        {"id": str(uuid.uuid4()), "title": f"Chapter {i}", "content": SAMPLE_CONTENT * 2,
+         "source_pdf_name": f"chapter-{i}.pdf", "created_at": timestamp(rng)}
+        for i in range(50)
+    ]
+    papers = [
+        {"id": str(uuid.uuid4()), "title": f"Unit test {i}", "category": "school", "total_marks": 80,
+         "duration_minutes": 90, "instructions": "Answer all questions.", "created_at": timestamp(rng),
+         "questions": [question_row(rng, j) for j in range(30)]}
+        for i in range(20)
+    ]
+    listing = {"questions": questions, "total": 4200, "page": 1, "page_size": 100,
+               "total_pages": 42, "next_cursor": "eyJjIjoiMjAyNC0wMS0wMSJ9"}
+    return {"questions_page_100": listing, "student_notes_50": notes, "teacher_papers_20x30": papers}
+
+
+def previous_question_listing(listing: dict) -> bytes:
+    """What GET /questions did: build models, validate against response_model, json.dumps"""
+    response = QuestionListResponse(
+        **{**listing, "questions": [Question(**q) for q in listing["questions"]]}
+    )
+    field = create_response_field(name="response", type_=QuestionListResponse)
+    content = run_sync(serialize_response(field=field, response_content=response, exclude_unset=True))
+    return JSONResponse(content).body
+
+
+def run_sync(coroutine):
+    """Drive a coroutine that never suspends (serialize_response for an async endpoint)"""
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("coroutine suspended")
+
+
+def time_it(func: Callable[[], bytes], repeat: int) -> float:
+    """Median milliseconds per call"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def run(repeat: int = 20) -> dict:
+    results = {}
+    for name, payload in payloads().items():
+        if name == "questions_page_100":
+            previous = lambda: previous_question_listing(payload)
+        else:
+            previous = lambda: JSONResponse(jsonable_encoder(payload)).body
+        current = lambda: ORJSONResponse(payload).body
+
+        body = current()
+        assert json.loads(body) == json.loads(JSONResponse(jsonable_encoder(payload)).body)
+        entry = {
+            "bytes": len(body),
+            "previous_ms": round(time_it(previous, repeat), 3),
+            "orjson_ms": round(time_it(current, repeat), 3),
+            "gzip_bytes": len(compress(body, "gzip")),
+            "gzip_ms": round(time_it(lambda: compress(body, "gzip"), repeat), 3),
+        }
+        if brotli is not None:
+            entry["br_bytes"] = len(compress(body, "br"))
+            entry["br_ms"] = round(time_it(lambda: compress(body, "br"), repeat), 3)
+        entry["speedup"] = round(entry["previous_ms"] / entry["orjson_ms"], 1)
+        results[name] = entry
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark JSON response serialization")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per payload (median reported)")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    for name, entry in results.items():
+        print(
+            f"{name:24} {entry['bytes'] / 1024:8.0f} KiB  previous {entry['previous_ms']:8.2f} ms  "
+            f"orjson {entry['orjson_ms']:7.2f} ms  ({entry['speedup']}x)  "
+            f"gzip {entry['gzip_bytes'] / 1024:6.0f} KiB in {entry['gzip_ms']:.2f} ms",
+            file=sys.stderr,
+        )
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""
+Local stand-in for the Gemini API (the google-genai SDK's REST surface).
+
+Serves generateContent, streamGenerateContent (SSE), resumable file uploads
+and files.get. Uploaded files report PROCESSING until FAKE_GEMINI_FILE_ACTIVE_SECONDS
+have passed, then ACTIVE. Each API key gets FAKE_GEMINI_RPM requests per
+minute; beyond that the server answers 429 RESOURCE_EXHAUSTED with the same
+"Please retry in Xs." hint the real API gives, so key rotation and cooldowns
+in AIService/KeyManager are exercised.
+
+When the request carries a response schema, the reply is a JSON document
+that satisfies it, so the API's parsing code runs as it would in production.
+
+Run with:
+    python -m loadtest.fake_gemini --port 8101
+and start the API with GEMINI_BASE_URL=http://127.0.0.1:8101 and any keys in
+GEMINI_API_KEYS.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from collections import deque
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+FAKE_GEMINI_LATENCY_MS = float(os.getenv("FAKE_GEMINI_LATENCY_MS", "800"))
+FAKE_GEMINI_JITTER_MS = float(os.getenv("FAKE_GEMINI_JITTER_MS", "200"))
+# Requests per key per minute; 0 disables rate limiting
+FAKE_GEMINI_RPM = int(os.getenv("FAKE_GEMINI_RPM", "15"))
+FAKE_GEMINI_FILE_ACTIVE_SECONDS = float(os.getenv("FAKE_GEMINI_FILE_ACTIVE_SECONDS", "3"))
+FAKE_GEMINI_STREAM_CHUNKS = int(os.getenv("FAKE_GEMINI_STREAM_CHUNKS", "4"))
+# Length of generated arrays (questions, cards, ...) in schema-shaped replies
+FAKE_GEMINI_ARRAY_ITEMS = int(os.getenv("FAKE_GEMINI_ARRAY_ITEMS", "5"))
+
+RATE_WINDOW_SECONDS = 60.0
+
+WORDS = (
+    "photosynthesis converts light energy into chemical energy stored in glucose "
+    "the mitochondria release that energy during cellular respiration while "
+    "enzymes lower the activation energy of each reaction in the pathway"
+).split()
+
+
+def sample_text(words: int, seed: int = 0) -> str:
+    start = seed % len(WORDS)
+    picked = [WORDS[(start + i) % len(WORDS)] for i in range(words)]
+    return " ".join(picked).capitalize() + "."
+
+
+def sample_from_schema(schema: Dict[str, Any], name: str = "value", defs: Optional[dict] = None, depth: int = 0) -> Any:
+    """
+    A value matching a Gemini `responseSchema` (OpenAPI subset, upper-case
+    types) or a `responseJsonSchema` (JSON Schema, with $defs/$ref).
+    """
+    defs = defs if defs is not None else schema.get("$defs", schema.get("defs", {}))
+    if "$ref" in schema:
+        schema = defs.get(schema["$ref"].rsplit("/", 1)[-1], {})
+    for combinator in ("anyOf", "oneOf", "any_of"):
+        options = [s for s in schema.get(combinator, []) if str(s.get("type", "")).lower() != "null"]
+        if options:
+            return sample_from_schema(options[0], name, defs, depth)
+
+    if schema.get("enum"):
+        return schema["enum"][0]
+
+    kind = schema.get("type", "object")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if str(k).lower() != "null"), "string")
+    kind = str(kind).lower()
+
+    if kind == "object":
+        properties = schema.get("properties", {})
+        return {
+            key: sample_from_schema(prop, key, defs, depth + 1)
+            for key, prop in properties.items()
+        }
+    if kind == "array":
+        count = FAKE_GEMINI_ARRAY_ITEMS if depth < 3 else 1
+        count = max(count, int(schema.get("minItems", schema.get("min_items", 0)) or 0))
+        return [sample_from_schema(schema.get("items", {}), name, defs, depth + 1) for _ in range(count)]
+    if kind == "integer":
+        return int(schema.get("minimum", 1) or 1)
+    if kind == "number":
+        return float(schema.get("minimum", 1) or 1)
+    if kind == "boolean":
+        return True
+    return sample_text(6 if depth else 40, seed=len(name))
+
+
+class FakeGemini:
+    def __init__(
+        self,
+        latency_ms: float = FAKE_GEMINI_LATENCY_MS,
+        jitter_ms: float = FAKE_GEMINI_JITTER_MS,
+        rpm: int = FAKE_GEMINI_RPM,
+        file_active_seconds: float = FAKE_GEMINI_FILE_ACTIVE_SECONDS,
+        stream_chunks: int = FAKE_GEMINI_STREAM_CHUNKS
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rpm = rpm
+        self.file_active_seconds = file_active_seconds
+        self.stream_chunks = stream_chunks
+
+        # key -> timestamps of accepted requests in the current window
+        self.requests: Dict[str, deque] = {}
+        # upload id -> {"file": ..., "received": int}
+        self.uploads: Dict[str, dict] = {}
+        # "files/<id>" -> file resource (plus "_created" monotonic time)
+        self.files: Dict[str, dict] = {}
+        self.counters = {"generate": 0, "stream": 0, "upload": 0, "files_get": 0, "rate_limited": 0}
+
+    async def delay(self):
+        if self.latency_ms or self.jitter_ms:
+            jitter = random.uniform(-self.jitter_ms, self.jitter_ms)
+            await asyncio.sleep(max(0.0, self.latency_ms + jitter) / 1000)
+
+    def admit(self, key: str) -> Optional[float]:
+        """Record a request for `key`; returns the retry delay if it is over quota"""
+        if not self.rpm:
+            return None
+        now = time.monotonic()
+        window = self.requests.setdefault(key, deque())
+        while window and window[0] <= now - RATE_WINDOW_SECONDS:
+            window.popleft()
+        if len(window) >= self.rpm:
+            self.counters["rate_limited"] += 1
+            return window[0] + RATE_WINDOW_SECONDS - now
+        window.append(now)
+        return None
+
+    def file_resource(self, name: str) -> Optional[dict]:
+        stored = self.files.get(name)
+        if stored is None:
+            return None
+        resource = {k: v for k, v in stored.items() if not k.startswith("_")}
+        elapsed = time.monotonic() - stored["_created"]
+        resource["state"] = "ACTIVE" if elapsed >= self.file_active_seconds else "PROCESSING"
+        return resource
+
+    def reply_text(self, body: dict) -> str:
+        config = body.get("generationConfig") or {}
+        schema = config.get("responseJsonSchema") or config.get("responseSchema")
+        if schema:
+            return json.dumps(sample_from_schema(schema))
+        return sample_text(120)
+
+
+def api_key(request: Request) -> str:
+    return request.headers.get("x-goog-api-key") or request.query_params.get("key") or "anonymous"
+
+
+def error(code: int, status: str, message: str) -> JSONResponse:
+    return JSONResponse(status_code=code, content={"error": {"code": code, "message": message, "status": status}})
+
+
+def rate_limited(retry_after: float) -> JSONResponse:
+    return error(
+        429,
+        "RESOURCE_EXHAUSTED",
+        "You exceeded your current quota, please check your plan and billing details. "
+        f"Please retry in {retry_after:.1f}s."
+    )
+
+
+def candidate(text: str, finish: Optional[str] = "STOP") -> dict:
+    item = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if finish:
+        item["finishReason"] = finish
+    return item
+
+
+def usage(prompt: dict, text: str) -> dict:
+    prompt_tokens = max(1, len(json.dumps(prompt.get("contents", []))) // 4)
+    output_tokens = max(1, len(text) // 4)
+    return {
+        "promptTokenCount": prompt_tokens,
+        "candidatesTokenCount": output_tokens,
+        "totalTokenCount": prompt_tokens + output_tokens,
+    }
+
+
+def create_app(fake: Optional[FakeGemini] = None) -> FastAPI:
+    fake = fake or FakeGemini()
+    app = FastAPI(title="Fake Gemini")
+    app.state.fake = fake
+
+    @app.post("/{version}/models/{model}:generateContent")
+    async def generate_content(version: str, model: str, request: Request):
+        retry_after = fake.admit(api_key(request))
+        if retry_after is not None:
+            return rate_limited(retry_after)
+        body = await request.json()
+        await fake.delay()
+        fake.counters["generate"] += 1
+        text = fake.reply_text(body)
+        return {"candidates": [candidate(text)], "usageMetadata": usage(body, text), "modelVersion": model}
+
+    @app.post("/{version}/models/{model}:streamGenerateContent")
+    async def stream_generate_content(version: str, model: str, request: Request):
+        retry_after = fake.admit(api_key(request))
+        if retry_after is not None:
+            return rate_limited(retry_after)
+        body = await request.json()
+        fake.counters["stream"] += 1
+        text = fake.reply_text(body)
+        size = -(-len(text) // max(1, fake.stream_chunks))
+        pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+        async def events():
+            for i, piece in enumerate(pieces):
+                await fake.delay()
+                last = i == len(pieces) - 1
+                chunk = {"candidates": [candidate(piece, "STOP" if last else None)], "modelVersion": model}
+                if last:
+                    chunk["usageMetadata"] = usage(body, text)
+                yield f"data: {json.dumps(chunk)}\r\n\r\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/upload/{version}/files")
+    async def start_upload(version: str, request: Request):
+        """Resumable upload, step 1: reserve the file and hand out an upload URL"""
+        if request.headers.get("x-goog-upload-command", "").lower() != "start":
+            return error(400, "INVALID_ARGUMENT", "Only resumable uploads are supported")
+        retry_after = fake.admit(api_key(request))
+        if retry_after is not None:
+            return rate_limited(retry_after)
+
+        metadata = (await request.json() or {}).get("file") or {}
+        file_id = uuid.uuid4().hex[:12]
+        name = metadata.get("name") or f"files/{file_id}"
+        upload_id = uuid.uuid4().hex
+        fake.uploads[upload_id] = {
+            "received": 0,
+            "file": {
+                "name": name,
+                "displayName": metadata.get("displayName", name),
+                "mimeType": request.headers.get("x-goog-upload-header-content-type")
+                or metadata.get("mimeType", "application/octet-stream"),
+                "sizeBytes": request.headers.get("x-goog-upload-header-content-length", "0"),
+                "uri": f"{str(request.base_url).rstrip('/')}/{version}/{name}",
+            },
+        }
+        upload_url = f"{str(request.base_url).rstrip('/')}/upload/{version}/files?upload_id={upload_id}"
+        return Response(headers={"x-goog-upload-url": upload_url, "x-goog-upload-status": "active"})
+
+    async def upload_chunk(request: Request):
+        upload = fake.uploads.get(request.query_params.get("upload_id", ""))
+        if upload is None:
+            return error(404, "NOT_FOUND", "Unknown upload session")
+        chunk = await request.body()
+        upload["received"] += len(chunk)
+        command = request.headers.get("x-goog-upload-command", "")
+        if "finalize" not in command:
+            return Response(headers={"x-goog-upload-status": "active"})
+
+        await fake.delay()
+        del fake.uploads[request.query_params["upload_id"]]
+        resource = dict(upload["file"], sizeBytes=str(upload["received"]))
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        resource.update({"createTime": now, "updateTime": now, "_created": time.monotonic()})
+        fake.files[resource["name"]] = resource
+        fake.counters["upload"] += 1
+        return JSONResponse({"file": fake.file_resource(resource["name"])}, headers={"x-goog-upload-status": "final"})
+
+    @app.middleware("http")
+    async def route_upload_chunks(request: Request, call_next):
+        # Chunks are POSTed to the upload URL itself, which differs from the
+        # start request only by its upload_id parameter
+        if request.method == "POST" and request.url.path.startswith("/upload/") and "upload_id" in request.query_params:
+            return await upload_chunk(request)
+        return await call_next(request)
+
+    @app.get("/{version}/files/{file_id}")
+    async def get_file(version: str, file_id: str, request: Request):
+        fake.counters["files_get"] += 1
+        resource = fake.file_resource(f"files/{file_id}")
+        if resource is None:
+            return error(404, "NOT_FOUND", f"File files/{file_id} not found")
+        return resource
+
+    @app.delete("/{version}/files/{file_id}")
+    async def delete_file(version: str, file_id: str):
+        fake.files.pop(f"files/{file_id}", None)
+        return {}
+
+    @app.get("/stats")
+    async def stats():
+        return {"counters": fake.counters, "files": len(fake.files), "keys": len(fake.requests)}
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8101)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,762 @@
+"""
+Local stand-in for Supabase: PostgREST (/rest/v1) and Auth (/auth/v1).
+
+Rows live in memory, one dict per table of supabase_schema.sql (plus the
+legacy `users` table). The PostgREST subset the API relies on is supported:
+column selection with aliases and the computed card_count/question_count
+columns, eq/neq/gt/gte/lt/lte/like/ilike/in/is/cs/cd/ov filters with `not.`,
+nested or=/and= trees, order, limit/offset and Range, Prefer return/count/
+resolution, upserts with on_conflict, and the RPC functions the services call
+(implemented here in Python with the same inputs and outputs).
+
+Auth issues HS256 access tokens signed with FAKE_SUPABASE_JWT_SECRET, with
+the profile claims custom_access_token_hook would add, so the API verifies
+them locally when started with the same SUPABASE_JWT_SECRET.
+
+Run with:
+    python -m loadtest.fake_supabase --port 8102
+then start the API with SUPABASE_URL=http://127.0.0.1:8102, SUPABASE_KEY set
+to the printed service key and SUPABASE_JWT_SECRET=$FAKE_SUPABASE_JWT_SECRET.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from jose import JWTError, jwt
+
+FAKE_SUPABASE_JWT_SECRET = os.getenv("FAKE_SUPABASE_JWT_SECRET", "fake-supabase-jwt-secret-for-load-tests")
+FAKE_SUPABASE_LATENCY_MS = float(os.getenv("FAKE_SUPABASE_LATENCY_MS", "5"))
+FAKE_SUPABASE_TOKEN_TTL = int(os.getenv("FAKE_SUPABASE_TOKEN_TTL", "3600"))
+# Optional JSON file of {table: [rows]} loaded at startup
+FAKE_SUPABASE_SEED = os.getenv("FAKE_SUPABASE_SEED")
+
+# Table -> column defaults applied on insert (id and created_at are always filled)
+TABLES: Dict[str, Dict[str, Any]] = {
+    "users": {"updated_at": None},
+    "user_profiles": {"category": None, "updated_at": None},
+    "user_notes": {"title": None, "source_pdf_name": None, "updated_at": None},
+    "user_flashcards": {"deck_title": None, "cards": [], "source_pdf_name": None},
+    "user_quizzes": {"title": None, "questions": [], "score": None, "total_questions": None, "source_pdf_name": None},
+    "user_mindmaps": {"title": None, "data": {}, "source_pdf_name": None},
+    "question_papers": {"total_marks": None, "duration_minutes": None, "instructions": None, "updated_at": None},
+    "questions": {"is_starred": False, "marks": 1, "category": None, "user_id": None, "updated_at": None,
+                  "minhash": None, "similarity_bands": None},
+}
+
+# Columns besides the primary key that reject duplicates
+UNIQUE_COLUMNS = {"users": ("email",)}
+
+# Computed columns (functions taking the row in supabase_schema.sql)
+COMPUTED: Dict[str, Dict[str, Callable[[dict], Any]]] = {
+    "user_flashcards": {"card_count": lambda row: len(row.get("cards") or [])},
+    "user_quizzes": {"question_count": lambda row: len(row.get("questions") or [])},
+    "question_papers": {"question_count": lambda row: len(row.get("questions") or [])},
+}
+
+SEARCH_COLUMNS = ("question_text", "topic", "option_a", "option_b", "option_c", "option_d", "answer_text")
+
+
+class PostgrestError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# --- Filter parsing -------------------------------------------------------
+
+def split_top_level(text: str) -> List[str]:
+    """Split on commas that are not inside (), {} or double quotes"""
+    parts, depth, quoted, current = [], 0, False, []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\" and quoted and i + 1 < len(text):
+            current.append(text[i:i + 2])
+            i += 2
+            continue
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch in "({":
+            depth += 1
+        elif not quoted and ch in ")}":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append("".join(current))
+            current = []
+            i += 1
+            continue
+        current.append(ch)
+        i += 1
+    if current or parts:
+        parts.append("".join(current))
+    return parts
+
+
+def unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+
+def parse_list(value: str) -> List[str]:
+    """`(a,b)` or `{a,b}` -> ["a", "b"]"""
+    inner = value.strip()[1:-1]
+    return [unquote(v) for v in split_top_level(inner)] if inner else []
+
+
+def coerce(raw: str, sample: Any) -> Any:
+    """Interpret a filter value with the type of the column value it is compared to"""
+    if isinstance(sample, bool):
+        return raw.lower() == "true"
+    if isinstance(sample, (int, float)):
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+def comparable(value: Any) -> Any:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def like_regex(pattern: str, flags: int = 0):
+    escaped = "".join(".*" if c in "*%" else "." if c == "_" else re.escape(c) for c in pattern)
+    return re.compile(f"^{escaped}$", flags | re.DOTALL)
+
+
+def match_operator(value: Any, operator: str, raw: str) -> bool:
+    if operator == "is":
+        target = raw.lower()
+        if target == "null":
+            return value is None
+        if target in ("true", "false"):
+            return value is (target == "true")
+        return False
+    if operator == "in":
+        if value is None:
+            return False
+        return any(coerce(option, value) == comparable(value) for option in parse_list(raw))
+    if operator in ("cs", "cd", "ov"):
+        if value is None:
+            return False
+        items = {str(v) for v in (value if isinstance(value, list) else [value])}
+        other = set(parse_list(raw))
+        if operator == "cs":
+            return other <= items
+        if operator == "cd":
+            return items <= other
+        return bool(items & other)
+    if operator in ("fts", "plfts", "phfts", "wfts"):
+        terms = re.findall(r"\w+", unquote(raw).split(")", 1)[-1].lower())
+        text = str(value or "").lower()
+        return all(term in text for term in terms)
+    if value is None:
+        return False
+    target = coerce(unquote(raw), value)
+    current = comparable(value)
+    if operator == "eq":
+        return current == target
+    if operator == "neq":
+        return current != target
+    if operator in ("like", "ilike"):
+        return bool(like_regex(unquote(raw), re.IGNORECASE if operator == "ilike" else 0).match(str(value)))
+    try:
+        if operator == "gt":
+            return current > target
+        if operator == "gte":
+            return current >= target
+        if operator == "lt":
+            return current < target
+        if operator == "lte":
+            return current <= target
+    except TypeError:
+        return False
+    raise PostgrestError(400, "PGRST100", f"Unsupported operator: {operator}")
+
+
+def parse_condition(column: str, expression: str) -> Callable[[dict], bool]:
+    """`column=[not.]op.value` -> predicate"""
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    operator, _, raw = expression.partition(".")
+    if column in ("or", "and"):
+        predicate = parse_logic(column, raw or operator)
+    else:
+        predicate = lambda row, c=column, o=operator, r=raw: match_operator(row.get(c), o, r)
+    return (lambda row: not predicate(row)) if negate else predicate
+
+
+def parse_logic(kind: str, group: str) -> Callable[[dict], bool]:
+    """`(a.eq.1,and(b.eq.2,c.lt.3))` -> predicate combining its members with `kind`"""
+    group = group.strip()
+    if not (group.startswith("(") and group.endswith(")")):
+        raise PostgrestError(400, "PGRST100", f"Malformed logic tree: {group}")
+    members = []
+    for item in split_top_level(group[1:-1]):
+        item = item.strip()
+        nested = re.match(r"^(not\.)?(and|or)(\(.*\))$", item, re.DOTALL)
+        if nested:
+            members.append(parse_condition(nested.group(2), (nested.group(1) or "") + nested.group(2) + "." + nested.group(3)))
+            continue
+        column, _, expression = item.partition(".")
+        members.append(parse_condition(column, expression))
+    combine = any if kind == "or" else all
+    return lambda row: combine(m(row) for m in members)
+
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def build_filters(params: List[Tuple[str, str]]) -> List[Callable[[dict], bool]]:
+    filters = []
+    for key, value in params:
+        if key in RESERVED_PARAMS:
+            continue
+        if key in ("or", "and"):
+            filters.append(parse_logic(key, value))
+        elif key in ("not.or", "not.and"):
+            predicate = parse_logic(key[4:], value)
+            filters.append(lambda row, p=predicate: not p(row))
+        else:
+            filters.append(parse_condition(key, value))
+    return filters
+
+
+def sort_rows(rows: List[dict], order: Optional[str]) -> List[dict]:
+    if not order:
+        return rows
+    for term in reversed(split_top_level(order)):
+        parts = term.strip().split(".")
+        column = parts[0]
+        descending = "desc" in parts[1:]
+        nulls_first = "nullsfirst" in parts[1:] or (descending and "nullslast" not in parts[1:])
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: comparable(r[column]), reverse=descending)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+def project(row: dict, select: str, computed: Dict[str, Callable[[dict], Any]]) -> dict:
+    if not select or select.strip() == "*":
+        return dict(row)
+    result = {}
+    for column in split_top_level(select):
+        column = column.strip()
+        if not column or "(" in column:
+            # Embedded resources are not modelled
+            continue
+        if column == "*":
+            result.update(row)
+            continue
+        base = column.split("::")[0]
+        alias, _, name = base.partition(":") if ":" in base else (base, "", base)
+        result[alias] = computed[name](row) if name in computed else row.get(name)
+    return result
+
+
+def prefer(request: Request) -> Dict[str, str]:
+    values = {}
+    for part in request.headers.get("prefer", "").split(","):
+        key, _, value = part.strip().partition("=")
+        if key:
+            values[key] = value
+    return values
+
+
+def requested_range(request: Request) -> Tuple[int, Optional[int]]:
+    """(offset, limit) from limit/offset parameters or a Range header"""
+    offset = int(request.query_params.get("offset", 0))
+    limit = request.query_params.get("limit")
+    limit = int(limit) if limit is not None else None
+    header = request.headers.get("range")
+    if header and "-" in header:
+        start, _, end = header.partition("-")
+        offset = int(start)
+        if end:
+            limit = int(end) - offset + 1
+    return offset, limit
+
+
+# --- Store ----------------------------------------------------------------
+
+class FakeSupabase:
+    def __init__(self, jwt_secret: str = FAKE_SUPABASE_JWT_SECRET, latency_ms: float = FAKE_SUPABASE_LATENCY_MS):
+        self.jwt_secret = jwt_secret
+        self.latency_ms = latency_ms
+        self.tables: Dict[str, Dict[str, dict]] = {name: {} for name in TABLES}
+        # auth user id -> {"user": ..., "password": ...}; email -> id
+        self.auth_users: Dict[str, dict] = {}
+        self.auth_emails: Dict[str, str] = {}
+        self.refresh_tokens: Dict[str, str] = {}
+        self.counters: Counter = Counter()
+        self.rpcs: Dict[str, Callable[[dict], Any]] = {
+            "question_statistics": self.question_statistics,
+            "search_questions": self.search_questions,
+            "question_facets": self.question_facets,
+            "toggle_question_star": self.toggle_question_star,
+            "set_questions_starred": self.set_questions_starred,
+            "blueprint_candidates": self.blueprint_candidates,
+            "near_duplicate_candidates": self.near_duplicate_candidates,
+            "set_question_signatures": self.set_question_signatures,
+        }
+
+    async def delay(self):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    def table(self, name: str) -> Dict[str, dict]:
+        if name not in self.tables:
+            raise PostgrestError(404, "PGRST205", f"Could not find the table 'public.{name}' in the schema cache")
+        return self.tables[name]
+
+    def load(self, seed: Dict[str, List[dict]]):
+        for name, rows in seed.items():
+            for row in rows:
+                self.insert(name, row, merge=True)
+
+    def insert(self, name: str, values: dict, merge: bool = False, ignore: bool = False,
+               conflict: Tuple[str, ...] = ("id",)) -> Optional[dict]:
+        rows = self.table(name)
+        stamp = now_iso()
+        row = {**json.loads(json.dumps(TABLES[name])), "created_at": stamp, **values}
+        row.setdefault("id", str(uuid.uuid4()))
+        if "updated_at" in row and row["updated_at"] is None:
+            row["updated_at"] = stamp
+
+        existing = next(
+            (r for r in rows.values() if all(r.get(c) == row.get(c) for c in conflict)), None
+        ) if conflict != ("id",) else rows.get(str(row["id"]))
+        if existing is not None:
+            if ignore:
+                return None
+            if not merge:
+                raise PostgrestError(409, "23505", f"duplicate key value violates unique constraint \"{name}_pkey\"")
+            existing.update(values)
+            if "updated_at" in existing and "updated_at" not in values:
+                existing["updated_at"] = stamp
+            return existing
+
+        for column in UNIQUE_COLUMNS.get(name, ()):
+            if any(r.get(column) == row.get(column) for r in rows.values()):
+                raise PostgrestError(409, "23505", f"duplicate key value violates unique constraint \"{name}_{column}_key\"")
+        row["id"] = str(row["id"])
+        rows[row["id"]] = row
+        return row
+
+    def questions(self, params: dict, with_query: bool = True) -> List[dict]:
+        """Questions matching the p_* filters shared by the question RPCs"""
+        equal = {
+            "subject": params.get("p_subject"),
+            "class_grade": params.get("p_class_grade"),
+            "topic": params.get("p_topic"),
+            "difficulty": params.get("p_difficulty"),
+            "question_type": params.get("p_question_type"),
+            "category": params.get("p_category"),
+            "user_id": params.get("p_user_id"),
+        }
+        starred = params.get("p_is_starred")
+        terms = re.findall(r"\w+", (params.get("p_query") or "").lower()) if with_query else []
+        matched = []
+        for row in self.tables["questions"].values():
+            if any(v is not None and row.get(k) != v for k, v in equal.items()):
+                continue
+            if starred is not None and bool(row.get("is_starred")) != starred:
+                continue
+            if terms:
+                text = " ".join(str(row.get(c) or "") for c in SEARCH_COLUMNS).lower()
+                hits = sum(term in text for term in terms)
+                if not hits:
+                    continue
+                row = dict(row, _rank=hits / len(terms))
+            matched.append(row)
+        return matched
+
+    # --- RPC functions (same contract as supabase_schema.sql) ---
+
+    def question_statistics(self, params: dict) -> dict:
+        rows = self.questions(params, with_query=False)
+
+        def group(column):
+            return dict(Counter(str(r.get(column)) if r.get(column) is not None else "null" for r in rows))
+
+        return {
+            "total_questions": len(rows),
+            "starred_count": sum(1 for r in rows if r.get("is_starred")),
+            "by_type": group("question_type"),
+            "by_subject": group("subject"),
+            "by_difficulty": group("difficulty"),
+            "by_class": group("class_grade"),
+        }
+
+    def search_questions(self, params: dict) -> List[dict]:
+        if not params.get("p_query"):
+            return []
+        rows = sort_rows(self.questions(params), "created_at.desc,id.desc")
+        rows.sort(key=lambda r: r["_rank"], reverse=True)
+        offset, limit = params.get("p_offset") or 0, params.get("p_limit") or 20
+        columns = params.get("p_columns")
+        return [
+            {
+                "question": {k: v for k, v in r.items() if k != "_rank" and (columns is None or k in columns)},
+                "rank": r["_rank"],
+                "total_count": len(rows),
+            }
+            for r in rows[offset:offset + limit]
+        ]
+
+    def question_facets(self, params: dict) -> dict:
+        rows = self.questions(params)
+        facets = {}
+        for facet in ("subject", "topic", "difficulty", "question_type"):
+            counts = Counter(str(r.get(facet)) if r.get(facet) is not None else "null" for r in rows)
+            if counts:
+                facets[facet] = dict(counts)
+        return facets
+
+    def toggle_question_star(self, params: dict) -> List[dict]:
+        row = self.tables["questions"].get(str(params.get("p_question_id")))
+        if row is None:
+            return []
+        row["is_starred"] = not row.get("is_starred")
+        return [dict(row)]
+
+    def set_questions_starred(self, params: dict) -> List[str]:
+        updated = []
+        for qid in params.get("p_question_ids") or []:
+            row = self.tables["questions"].get(str(qid))
+            if row is not None and row.get("is_starred") != params.get("p_is_starred"):
+                row["is_starred"] = params.get("p_is_starred")
+                updated.append(row["id"])
+        return updated
+
+    def blueprint_candidates(self, params: dict) -> List[dict]:
+        types = set(params.get("p_question_types") or [])
+        topics = params.get("p_topics")
+        buckets: Dict[Tuple[Any, Any], List[dict]] = {}
+        for row in self.questions({k: v for k, v in params.items() if k != "p_topics"}, with_query=False):
+            if row.get("question_type") not in types or (topics is not None and row.get("topic") not in topics):
+                continue
+            buckets.setdefault((row.get("question_type"), row.get("difficulty")), []).append(row)
+        columns = ("id", "question_type", "difficulty", "topic", "marks", "question_text",
+                   "option_a", "option_b", "option_c", "option_d")
+        selected = []
+        seed = params.get("p_seed") or ""
+        for rows in buckets.values():
+            rows.sort(key=lambda r: hashlib.md5(f"{r['id']}{seed}".encode()).hexdigest())
+            for row in rows[:params.get("p_per_bucket") or 0]:
+                selected.append({c: row.get(c) for c in columns})
+        return selected
+
+    def near_duplicate_candidates(self, params: dict) -> List[dict]:
+        candidates = []
+        for index, keys in enumerate(params.get("p_row_bands") or []):
+            shared = [
+                (len(set(keys) & set(row.get("similarity_bands") or [])), row)
+                for row in self.tables["questions"].values()
+            ]
+            shared = sorted((item for item in shared if item[0]), key=lambda item: (-item[0], item[1]["id"]))
+            candidates.extend(
+                {"row_index": index, "id": row["id"], "minhash": row.get("minhash")}
+                for _, row in shared[:params.get("p_per_row", 50)]
+            )
+        return candidates
+
+    def set_question_signatures(self, params: dict) -> int:
+        updated = 0
+        for item in params.get("p_rows") or []:
+            row = self.tables["questions"].get(str(item.get("id")))
+            if row is not None and row.get("minhash") is None:
+                row["minhash"] = item.get("minhash")
+                row["similarity_bands"] = item.get("similarity_bands")
+                updated += 1
+        return updated
+
+    # --- Auth ---
+
+    def issue_session(self, user: dict) -> dict:
+        now = int(time.time())
+        app_metadata = dict(user.get("app_metadata") or {})
+        # What custom_access_token_hook adds when the user has a profile
+        profile = self.tables["user_profiles"].get(user["id"])
+        if profile:
+            app_metadata.update({"profile_role": profile.get("role"), "profile_category": profile.get("category")})
+        claims = {
+            "sub": user["id"],
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": user["email"],
+            "iat": now,
+            "exp": now + FAKE_SUPABASE_TOKEN_TTL,
+            "app_metadata": app_metadata,
+            "user_metadata": user.get("user_metadata") or {},
+        }
+        refresh_token = uuid.uuid4().hex
+        self.refresh_tokens[refresh_token] = user["id"]
+        return {
+            "access_token": jwt.encode(claims, self.jwt_secret, algorithm="HS256"),
+            "token_type": "bearer",
+            "expires_in": FAKE_SUPABASE_TOKEN_TTL,
+            "expires_at": claims["exp"],
+            "refresh_token": refresh_token,
+            "user": user,
+        }
+
+    def service_key(self) -> str:
+        """A service_role key for SUPABASE_KEY (the fake does not enforce RLS)"""
+        now = int(time.time())
+        claims = {"iss": "supabase", "role": "service_role", "iat": now, "exp": now + 10 * 365 * 86400}
+        return jwt.encode(claims, self.jwt_secret, algorithm="HS256")
+
+    def sign_up(self, email: str, password: str, metadata: Optional[dict] = None) -> dict:
+        if email in self.auth_emails:
+            raise PostgrestError(422, "user_already_exists", "User already registered")
+        stamp = now_iso()
+        user = {
+            "id": str(uuid.uuid4()),
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": email,
+            "email_confirmed_at": stamp,
+            "app_metadata": {"provider": "email", "providers": ["email"]},
+            "user_metadata": metadata or {},
+            "created_at": stamp,
+            "updated_at": stamp,
+        }
+        self.auth_users[user["id"]] = {"user": user, "password": password}
+        self.auth_emails[email] = user["id"]
+        return user
+
+
+def postgrest_error(exc: PostgrestError) -> JSONResponse:
+    return JSONResponse(
+        status_code=exc.status,
+        content={"code": exc.code, "message": exc.message, "details": None, "hint": None},
+    )
+
+
+def auth_error(status: int, message: str) -> JSONResponse:
+    return JSONResponse(status_code=status, content={"code": status, "error": message, "msg": message, "message": message})
+
+
+def create_app(fake: Optional[FakeSupabase] = None) -> FastAPI:
+    fake = fake or FakeSupabase()
+    app = FastAPI(title="Fake Supabase")
+    app.state.fake = fake
+
+    @app.exception_handler(PostgrestError)
+    async def handle_postgrest_error(request: Request, exc: PostgrestError):
+        return postgrest_error(exc)
+
+    def respond(request: Request, rows: List[dict], status: int = 200, total: Optional[int] = None,
+                offset: int = 0, computed: Optional[dict] = None) -> Response:
+        preferences = prefer(request)
+        headers = {}
+        if "count" in preferences:
+            count = total if total is not None else len(rows)
+            end = offset + len(rows) - 1
+            headers["Content-Range"] = f"{offset}-{end}/{count}" if rows else f"*/{count}"
+        if request.method != "GET" and preferences.get("return", "minimal") != "representation":
+            return Response(status_code=204 if status == 200 else status, headers=headers)
+        select = request.query_params.get("select", "*")
+        body = [project(r, select, computed or {}) for r in rows]
+        if "vnd.pgrst.object" in request.headers.get("accept", ""):
+            if len(body) != 1:
+                raise PostgrestError(406, "PGRST116", "JSON object requested, multiple (or no) rows returned")
+            return JSONResponse(body[0], status_code=status, headers=headers)
+        return JSONResponse(body, status_code=status, headers=headers)
+
+    def filtered(name: str, request: Request) -> List[dict]:
+        filters = build_filters(list(request.query_params.multi_items()))
+        rows = [r for r in fake.table(name).values() if all(f(r) for f in filters)]
+        orders = request.query_params.getlist("order")
+        for order in reversed(orders):
+            rows = sort_rows(rows, order)
+        return rows
+
+    @app.get("/rest/v1/{name}")
+    async def select(name: str, request: Request):
+        await fake.delay()
+        fake.counters[f"GET {name}"] += 1
+        rows = filtered(name, request)
+        offset, limit = requested_range(request)
+        page = rows[offset:offset + limit if limit is not None else None]
+        return respond(request, page, total=len(rows), offset=offset, computed=COMPUTED.get(name))
+
+    @app.post("/rest/v1/rpc/{function}")
+    async def rpc(function: str, request: Request):
+        await fake.delay()
+        fake.counters[f"RPC {function}"] += 1
+        handler = fake.rpcs.get(function)
+        if handler is None:
+            raise PostgrestError(404, "PGRST202", f"Could not find the function public.{function}")
+        body = await request.body()
+        result = handler(json.loads(body) if body else {})
+        if isinstance(result, list) and result and isinstance(result[0], dict):
+            filters = build_filters(list(request.query_params.multi_items()))
+            result = sort_rows([r for r in result if all(f(r) for f in filters)], request.query_params.get("order"))
+            offset, limit = requested_range(request)
+            result = result[offset:offset + limit if limit is not None else None]
+            result = [project(r, request.query_params.get("select", "*"), {}) for r in result]
+        return JSONResponse(result)
+
+    @app.post("/rest/v1/{name}")
+    async def insert(name: str, request: Request):
+        await fake.delay()
+        fake.counters[f"POST {name}"] += 1
+        fake.table(name)
+        payload = await request.json()
+        values = payload if isinstance(payload, list) else [payload]
+        resolution = prefer(request).get("resolution")
+        conflict = tuple(c.strip() for c in request.query_params.get("on_conflict", "id").split(","))
+        rows = []
+        for item in values:
+            row = fake.insert(
+                name, item,
+                merge=resolution == "merge-duplicates",
+                ignore=resolution == "ignore-duplicates",
+                conflict=conflict
+            )
+            if row is not None:
+                rows.append(row)
+        return respond(request, rows, status=201, computed=COMPUTED.get(name))
+
+    @app.patch("/rest/v1/{name}")
+    async def update(name: str, request: Request):
+        await fake.delay()
+        fake.counters[f"PATCH {name}"] += 1
+        values = await request.json()
+        rows = filtered(name, request)
+        stamp = now_iso()
+        for row in rows:
+            row.update(values)
+            if "updated_at" in row and "updated_at" not in values:
+                row["updated_at"] = stamp
+        return respond(request, rows, computed=COMPUTED.get(name))
+
+    @app.delete("/rest/v1/{name}")
+    async def delete(name: str, request: Request):
+        await fake.delay()
+        fake.counters[f"DELETE {name}"] += 1
+        rows = filtered(name, request)
+        table = fake.table(name)
+        for row in rows:
+            table.pop(row["id"], None)
+        return respond(request, rows, computed=COMPUTED.get(name))
+
+    # --- Auth ---
+
+    def bearer_user(request: Request) -> Optional[dict]:
+        token = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        try:
+            claims = jwt.decode(token, fake.jwt_secret, algorithms=["HS256"], audience="authenticated")
+        except JWTError:
+            return None
+        entry = fake.auth_users.get(claims.get("sub"))
+        return entry["user"] if entry else None
+
+    @app.post("/auth/v1/signup")
+    async def sign_up(request: Request):
+        await fake.delay()
+        body = await request.json()
+        if not body.get("email") or not body.get("password"):
+            return auth_error(400, "Email and password are required")
+        try:
+            user = fake.sign_up(body["email"], body["password"], body.get("data"))
+        except PostgrestError as exc:
+            return auth_error(exc.status, exc.message)
+        return fake.issue_session(user)
+
+    @app.post("/auth/v1/token")
+    async def token(request: Request):
+        await fake.delay()
+        body = await request.json()
+        grant_type = request.query_params.get("grant_type")
+        if grant_type == "password":
+            user_id = fake.auth_emails.get(body.get("email", ""))
+            entry = fake.auth_users.get(user_id)
+            if entry is None or entry["password"] != body.get("password"):
+                return auth_error(400, "Invalid login credentials")
+            return fake.issue_session(entry["user"])
+        if grant_type == "refresh_token":
+            user_id = fake.refresh_tokens.pop(body.get("refresh_token", ""), None)
+            if user_id is None:
+                return auth_error(400, "Invalid Refresh Token")
+            return fake.issue_session(fake.auth_users[user_id]["user"])
+        return auth_error(400, f"Unsupported grant type: {grant_type}")
+
+    @app.get("/auth/v1/user")
+    async def get_user(request: Request):
+        await fake.delay()
+        fake.counters["GET auth/user"] += 1
+        user = bearer_user(request)
+        if user is None:
+            return auth_error(401, "invalid JWT")
+        return user
+
+    @app.post("/auth/v1/logout")
+    async def logout():
+        return Response(status_code=204)
+
+    @app.get("/auth/v1/.well-known/jwks.json")
+    async def jwks():
+        # Tokens are HS256; verifiers use the shared secret instead
+        return {"keys": []}
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "rows": {name: len(rows) for name, rows in fake.tables.items()},
+            "auth_users": len(fake.auth_users),
+            "requests": dict(fake.counters),
+        }
+
+    return app
+
+
+def build_default() -> FakeSupabase:
+    fake = FakeSupabase()
+    if FAKE_SUPABASE_SEED:
+        with open(FAKE_SUPABASE_SEED, encoding="utf-8") as f:
+            fake.load(json.load(f))
+    return fake
+
+
+app = create_app(build_default())
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local stand-in for Supabase (PostgREST + Auth)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8102)
+    args = parser.parse_args()
+    print(f"SUPABASE_URL=http://{args.host}:{args.port}")
+    print(f"SUPABASE_KEY={app.state.fake.service_key()}")
+    print(f"SUPABASE_JWT_SECRET={app.state.fake.jwt_secret}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
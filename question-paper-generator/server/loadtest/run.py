@@ -0,0 +1,280 @@
+"""
+Run load-test scenarios against a running API and write the results as JSON.
+
+    python -m loadtest.run --base-url http://127.0.0.1:8000 \\
+        --scenario teacher_browse --scenario paper_download \\
+        --users 20 --duration 60 --output results.json \\
+        --baseline last-release.json
+
+For every scenario and step the report has throughput, p50/p95/p99 latency,
+error and 429 rates. Event-loop lag is sampled two ways: the latency of a
+trivial API route probed during the run (queueing behind blocked handlers
+shows up here), and the load generator's own loop lag, which must stay low
+for the numbers to be trusted. With --baseline, the run fails (exit code 1)
+when a step's p95 or error rate regresses beyond the tolerance.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from loadtest.scenarios import SCENARIOS, Scenario, VirtualUser, login
+
+# How often lag is sampled
+PROBE_INTERVAL_SECONDS = 0.5
+LAG_INTERVAL_SECONDS = 0.1
+
+# Substrings of error bodies that mean an upstream (Gemini) quota was hit;
+# the AI routes surface those as 400s with the provider's message
+RATE_LIMIT_MARKERS = ("429", "resource_exhausted", "quota")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for no samples)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def summarize(values: List[float]) -> dict:
+    return {
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "max": round(max(values), 2) if values else 0.0,
+        "mean": round(sum(values) / len(values), 2) if values else 0.0,
+    }
+
+
+def is_rate_limited(res: httpx.Response) -> bool:
+    if res.status_code == 429:
+        return True
+    if res.status_code < 400:
+        return False
+    body = res.text[:2000].lower()
+    return any(marker in body for marker in RATE_LIMIT_MARKERS)
+
+
+class Recorder:
+    """Latencies and outcomes per step"""
+
+    def __init__(self):
+        # step -> {"latencies": [...], "errors": int, "rate_limited": int, "statuses": {...}}
+        self.steps: Dict[str, dict] = {}
+
+    def record(self, step: str, elapsed_ms: float, res: Optional[httpx.Response]):
+        stats = self.steps.setdefault(step, {"latencies": [], "errors": 0, "rate_limited": 0, "statuses": {}})
+        stats["latencies"].append(elapsed_ms)
+        status = str(res.status_code) if res is not None else "exception"
+        stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+        if res is None or res.status_code >= 400:
+            stats["errors"] += 1
+        if res is not None and is_rate_limited(res):
+            stats["rate_limited"] += 1
+
+    def report(self, duration: float) -> dict:
+        steps = {}
+        all_latencies: List[float] = []
+        errors = rate_limited = 0
+        for name, stats in sorted(self.steps.items()):
+            count = len(stats["latencies"])
+            all_latencies.extend(stats["latencies"])
+            errors += stats["errors"]
+            rate_limited += stats["rate_limited"]
+            steps[name] = {
+                "requests": count,
+                "throughput_rps": round(count / duration, 2) if duration else 0.0,
+                "latency_ms": summarize(stats["latencies"]),
+                "error_rate": round(stats["errors"] / count, 4) if count else 0.0,
+                "rate_limited_rate": round(stats["rate_limited"] / count, 4) if count else 0.0,
+                "statuses": stats["statuses"],
+            }
+        total = len(all_latencies)
+        return {
+            "requests": total,
+            "throughput_rps": round(total / duration, 2) if duration else 0.0,
+            "latency_ms": summarize(all_latencies),
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "rate_limited_rate": round(rate_limited / total, 4) if total else 0.0,
+            "steps": steps,
+        }
+
+
+async def probe_server(client: httpx.AsyncClient, samples: List[float], stop: asyncio.Event):
+    """Latency of GET / — it does no work, so anything above network time is queueing"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            await client.get("/")
+            samples.append((time.perf_counter() - start) * 1000)
+        except httpx.HTTPError:
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=PROBE_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def measure_loop_lag(samples: List[float], stop: asyncio.Event):
+    """How late this process's own event loop wakes up"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL_SECONDS)
+        samples.append(max(0.0, (time.perf_counter() - start - LAG_INTERVAL_SECONDS) * 1000))
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    shared: dict,
+    recorder: Recorder,
+    deadline: float,
+    think_time: float,
+    seed: int
+):
+    user = VirtualUser(client, await login(client, scenario.role))
+    rng = random.Random(seed)
+    user.state["rng"] = rng
+    while time.monotonic() < deadline:
+        step = scenario.pick(rng)
+        start = time.perf_counter()
+        res = None
+        try:
+            res = await step.call(user, shared)
+        except httpx.HTTPError:
+            pass
+        recorder.record(step.name, (time.perf_counter() - start) * 1000, res)
+        if think_time:
+            await asyncio.sleep(rng.uniform(0, 2 * think_time))
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    users: int,
+    duration: float,
+    think_time: float = 0.0,
+    ramp_up: float = 0.0
+) -> dict:
+    """Run one scenario with `users` concurrent virtual users for `duration` seconds"""
+    shared: dict = {}
+    if scenario.setup:
+        await scenario.setup(client, shared)
+
+    recorder = Recorder()
+    probe_samples: List[float] = []
+    lag_samples: List[float] = []
+    stop = asyncio.Event()
+    monitors = [
+        asyncio.create_task(probe_server(client, probe_samples, stop)),
+        asyncio.create_task(measure_loop_lag(lag_samples, stop)),
+    ]
+
+    started = time.monotonic()
+    deadline = started + duration
+
+    async def delayed_user(i: int):
+        if ramp_up:
+            await asyncio.sleep(ramp_up * i / users)
+        await virtual_user(client, scenario, shared, recorder, deadline, think_time, seed=i)
+
+    try:
+        await asyncio.gather(*(delayed_user(i) for i in range(users)))
+    finally:
+        stop.set()
+        await asyncio.gather(*monitors)
+    elapsed = time.monotonic() - started
+
+    return {
+        "description": scenario.description,
+        "users": users,
+        "duration_seconds": round(elapsed, 2),
+        **recorder.report(elapsed),
+        "event_loop_lag_ms": {
+            "server_probe": summarize(probe_samples),
+            "load_generator": summarize(lag_samples),
+        },
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Regressions against a previous report: a step whose p95 grew by more than
+    `tolerance` (fraction), or whose error or 429 rate rose by more than
+    `tolerance` percentage points.
+    """
+    regressions = []
+    for name, scenario in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        for step, stats in scenario["steps"].items():
+            old = before.get("steps", {}).get(step)
+            if not old:
+                continue
+            old_p95, new_p95 = old["latency_ms"]["p95"], stats["latency_ms"]["p95"]
+            if old_p95 and new_p95 > old_p95 * (1 + tolerance):
+                regressions.append(f"{name}/{step}: p95 {old_p95:.0f} ms -> {new_p95:.0f} ms")
+            for rate in ("error_rate", "rate_limited_rate"):
+                if stats[rate] > old[rate] + tolerance:
+                    regressions.append(f"{name}/{step}: {rate} {old[rate]:.2%} -> {stats[rate]:.2%}")
+    return regressions
+
+
+async def main(args) -> int:
+    limits = httpx.Limits(max_connections=args.users + 8, max_keepalive_connections=args.users + 8)
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "base_url": args.base_url,
+        "scenarios": {},
+    }
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        for name in args.scenario:
+            print(f"Running {name}: {args.users} users for {args.duration}s...", file=sys.stderr)
+            results["scenarios"][name] = await run_scenario(
+                client, SCENARIOS[name], args.users, args.duration, args.think_time, args.ramp_up
+            )
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results["regressions"] = regressions
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per scenario")
+    parser.add_argument("--ramp-up", type=float, default=0, help="Seconds to start all users")
+    parser.add_argument("--think-time", type=float, default=0, help="Mean pause between a user's requests")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed p95 growth (fraction) and error-rate rise (points)")
+    args = parser.parse_args()
+    args.scenario = args.scenario or list(SCENARIOS)
+    sys.exit(asyncio.run(main(args)))
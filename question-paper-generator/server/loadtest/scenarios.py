@@ -0,0 +1,266 @@
+"""
+Traffic mixes for the load tests.
+
+A scenario is a set of weighted steps; every virtual user picks steps at
+random by weight until the run ends. `setup` runs once per scenario (e.g. to
+seed the question bank) and `login` once per virtual user.
+"""
+
+import json
+import os
+import random
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+API_PREFIX = "/api/v1"
+
+# Shared bearer token (e.g. for a real Supabase project); otherwise every
+# virtual user signs up through SUPABASE_URL (the stand-in accepts anyone)
+LOADTEST_TOKEN = os.getenv("LOADTEST_TOKEN")
+LOADTEST_SEED_QUESTIONS = int(os.getenv("LOADTEST_SEED_QUESTIONS", "500"))
+
+SUBJECTS = ("Physics", "Chemistry", "Biology", "Mathematics")
+TOPICS = ("Motion", "Energy", "Cells", "Algebra", "Acids", "Optics")
+DIFFICULTIES = ("EASY", "MEDIUM", "HARD")
+QUESTION_TYPES = ("MCQ", "LONG", "TRUE_FALSE", "FILL_BLANK")
+SEARCH_TERMS = ("energy", "velocity", "photosynthesis", "equation", "reaction")
+# Varied wording, so seeded questions are not reported as near-duplicates
+FILLER_WORDS = (
+    "pressure", "temperature", "mass", "light", "current", "charge", "volume", "density",
+    "friction", "gravity", "acid", "base", "enzyme", "membrane", "angle", "vector",
+    "graph", "ratio", "speed", "heat", "wave", "field", "orbit", "cell",
+)
+
+SAMPLE_CONTENT = (
+    "Photosynthesis converts light energy into chemical energy. Chlorophyll absorbs "
+    "red and blue light; the light reactions split water and release oxygen, and the "
+    "Calvin cycle fixes carbon dioxide into glucose using ATP and NADPH. "
+) * 20
+
+# Smallest well-formed one-page PDF, for upload paths that never parse it locally
+SAMPLE_PDF = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+
+class VirtualUser:
+    """One simulated client: its HTTP client, auth headers and scratch state"""
+
+    def __init__(self, client: httpx.AsyncClient, headers: Optional[Dict[str, str]] = None):
+        self.client = client
+        self.headers = headers or {}
+        self.state: dict = {}
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.client.get(API_PREFIX + path, headers=self.headers, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.client.post(API_PREFIX + path, headers=self.headers, **kwargs)
+
+
+StepFunc = Callable[[VirtualUser, dict], Awaitable[httpx.Response]]
+
+
+class Step:
+    def __init__(self, name: str, weight: float, call: StepFunc):
+        self.name = name
+        self.weight = weight
+        self.call = call
+
+
+class Scenario:
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        steps: List[Step],
+        setup: Optional[Callable[[httpx.AsyncClient, dict], Awaitable[None]]] = None,
+        role: Optional[str] = None
+    ):
+        self.name = name
+        self.description = description
+        self.steps = steps
+        self.setup = setup
+        # Profile role created for each virtual user (None: no login needed)
+        self.role = role
+
+    def pick(self, rng: random.Random) -> Step:
+        return rng.choices(self.steps, weights=[s.weight for s in self.steps])[0]
+
+
+async def login(client: httpx.AsyncClient, role: Optional[str]) -> Dict[str, str]:
+    """Bearer headers for a new virtual user, with a profile of `role`"""
+    if role is None:
+        return {}
+    if LOADTEST_TOKEN:
+        headers = {"Authorization": f"Bearer {LOADTEST_TOKEN}"}
+    else:
+        supabase_url = os.environ["SUPABASE_URL"].rstrip("/")
+        apikey = os.getenv("SUPABASE_ANON_KEY") or os.getenv("SUPABASE_KEY", "")
+        async with httpx.AsyncClient(timeout=30) as auth:
+            res = await auth.post(
+                f"{supabase_url}/auth/v1/signup",
+                json={"email": f"loadtest+{uuid.uuid4().hex[:12]}@example.com", "password": uuid.uuid4().hex},
+                headers={"apikey": apikey},
+            )
+            res.raise_for_status()
+        headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+    res = await client.post(
+        f"{API_PREFIX}/profile/profile", json={"role": role, "category": "school"}, headers=headers
+    )
+    res.raise_for_status()
+    return headers
+
+
+# --- Student: PDF processing and AI generation ---
+
+async def process_pdf(user: VirtualUser, shared: dict) -> httpx.Response:
+    return await user.post(
+        "/ai/process-pdf",
+        files={"file": ("chapter.pdf", SAMPLE_PDF, "application/pdf")},
+        data={"topic": "Photosynthesis"},
+    )
+
+
+def generate(endpoint: str, **fields) -> StepFunc:
+    async def call(user: VirtualUser, shared: dict) -> httpx.Response:
+        return await user.post(f"/ai/{endpoint}", data={"content": SAMPLE_CONTENT, **fields})
+    return call
+
+
+# --- Teacher: browsing the question bank ---
+
+def sample_question(rng: random.Random, i: int) -> dict:
+    question_type = rng.choice(QUESTION_TYPES)
+    topic = rng.choice(TOPICS)
+    question = {
+        "question_type": question_type,
+        "subject": rng.choice(SUBJECTS),
+        "class_grade": str(rng.randint(8, 12)),
+        "topic": topic,
+        "difficulty": rng.choice(DIFFICULTIES),
+        "category": "school",
+        "question_text": f"Explain how {rng.choice(SEARCH_TERMS)} relates to {topic.lower()} when "
+                         + " ".join(rng.sample(FILLER_WORDS, 6)) + ".",
+        "answer_text": "See the worked solution.",
+        "marks": rng.choice((1, 2, 3, 5)),
+    }
+    if question_type == "MCQ":
+        question.update({"option_a": "One", "option_b": "Two", "option_c": "Three", "option_d": "Four"})
+    return question
+
+
+async def seed_questions(client: httpx.AsyncClient, shared: dict):
+    """Import LOADTEST_SEED_QUESTIONS questions and remember their ids"""
+    rng = random.Random(7)
+    body = "\n".join(json.dumps(sample_question(rng, i)) for i in range(LOADTEST_SEED_QUESTIONS))
+    res = await client.post(
+        f"{API_PREFIX}/questions/import",
+        content=body.encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+        timeout=300,
+    )
+    res.raise_for_status()
+
+    ids: List[str] = []
+    cursor = None
+    while True:
+        params = {"fields": "id", "page_size": 100, "include_total": "false"}
+        if cursor:
+            params["cursor"] = cursor
+        page = (await client.get(f"{API_PREFIX}/questions/", params=params)).json()
+        ids.extend(q["id"] for q in page["questions"])
+        cursor = page.get("next_cursor")
+        if not cursor:
+            break
+    shared["question_ids"] = ids
+
+
+async def browse_questions(user: VirtualUser, shared: dict) -> httpx.Response:
+    rng = user.state.setdefault("rng", random.Random())
+    params = {"page_size": 20, "fields": "summary"}
+    for name, values in (("subject", SUBJECTS), ("difficulty", DIFFICULTIES), ("question_type", QUESTION_TYPES)):
+        if rng.random() < 0.4:
+            params[name] = rng.choice(values)
+    # Continue the previous listing half of the time, as a scrolling client would
+    cursor = user.state.get("cursor")
+    if cursor and rng.random() < 0.5:
+        params["cursor"] = cursor
+    res = await user.get("/questions/", params=params)
+    if res.status_code == 200:
+        user.state["cursor"] = res.json().get("next_cursor")
+    return res
+
+
+async def search_questions(user: VirtualUser, shared: dict) -> httpx.Response:
+    rng = user.state.setdefault("rng", random.Random())
+    params = {"search": rng.choice(SEARCH_TERMS), "page_size": 20, "include_facets": "true"}
+    return await user.get("/questions/", params=params)
+
+
+async def question_stats(user: VirtualUser, shared: dict) -> httpx.Response:
+    return await user.get("/questions/stats/overview")
+
+
+# --- Teacher: paper downloads ---
+
+async def download_paper(user: VirtualUser, shared: dict) -> httpx.Response:
+    rng = user.state.setdefault("rng", random.Random())
+    ids = shared.get("question_ids") or []
+    chosen = rng.sample(ids, min(len(ids), rng.randint(10, 30)))
+    return await user.post(
+        "/questions/generate-pdf",
+        json={"question_ids": chosen, "title": "Load Test Paper", "duration": 90},
+    )
+
+
+STUDENT_STEPS = [
+    Step("process-pdf", 2, process_pdf),
+    Step("generate-notes", 1, generate("generate-notes", topic="Photosynthesis")),
+    Step("generate-flashcards", 1, generate("generate-flashcards", num_cards=10)),
+    Step("generate-quiz", 1, generate("generate-quiz", num_questions=10)),
+    Step("generate-mindmap", 1, generate("generate-mindmap", topic="Photosynthesis")),
+]
+
+BROWSE_STEPS = [
+    Step("list-questions", 6, browse_questions),
+    Step("search-questions", 3, search_questions),
+    Step("question-stats", 1, question_stats),
+]
+
+DOWNLOAD_STEPS = [Step("generate-pdf", 1, download_paper)]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "student_pdf": Scenario(
+        "student_pdf",
+        "Students uploading chapters and generating notes, flashcards, quizzes and mind maps",
+        STUDENT_STEPS,
+        role="student",
+    ),
+    "teacher_browse": Scenario(
+        "teacher_browse",
+        "Teachers filtering, paging and searching the question bank",
+        BROWSE_STEPS,
+        setup=seed_questions,
+    ),
+    "paper_download": Scenario(
+        "paper_download",
+        "Teachers rendering question papers to PDF",
+        DOWNLOAD_STEPS,
+        setup=seed_questions,
+    ),
+    "mixed": Scenario(
+        "mixed",
+        "Production-like blend: mostly browsing, some downloads and AI generation",
+        [Step(s.name, s.weight * 3, s.call) for s in BROWSE_STEPS]
+        + [Step(s.name, s.weight * 2, s.call) for s in DOWNLOAD_STEPS]
+        + [Step(s.name, s.weight * 0.5, s.call) for s in STUDENT_STEPS],
+        setup=seed_questions,
+        role="student",
+    ),
+}
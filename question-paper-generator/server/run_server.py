@@ -1,3 +1,4 @@
+# Development runner (auto-reload, single process). Production: serve.py
 import uvicorn
 import os
 
@@ -0,0 +1,90 @@
+"""
+Production entry point: `python serve.py`.
+
+run_server.py stays the development runner (auto-reload, one process).
+This one runs WEB_CONCURRENCY worker processes on uvloop and httptools and,
+on SIGTERM, stops accepting connections and lets in-flight requests (Gemini
+calls included) finish for up to GRACEFUL_TIMEOUT seconds before exiting.
+
+Environment:
+    HOST, PORT              bind address (default 0.0.0.0:8000)
+    WEB_CONCURRENCY         worker processes (default: CPU count, at most 4)
+    KEEP_ALIVE              idle keep-alive timeout in seconds (default 15;
+                            keep it above the load balancer's idle timeout)
+    BACKLOG                 listen backlog (default 2048)
+    LIMIT_CONCURRENCY       per-worker connection cap before 503s (default: none)
+    GRACEFUL_TIMEOUT        seconds to drain on shutdown (default 120, which
+                            covers a Gemini call and its retries)
+    FORWARDED_ALLOW_IPS     proxies trusted for X-Forwarded-* (default 127.0.0.1)
+    METRICS_TOKEN           bearer token Prometheus scrapes /metrics with
+                            (unset: /metrics is not served)
+
+With more than one worker, Prometheus samples and Gemini key cooldowns are
+shared through a per-run directory (PROMETHEUS_MULTIPROC_DIR and
+KEY_STATE_BACKEND=sqlite) unless those are set explicitly. The question
+library cache needs QUESTION_CACHE_REDIS_URL to stay coherent across
+workers; without it, it is disabled. Log files (LOG_FILE, AI_LOG_FILE) are
+not rotated by the workers then; rotate them with logrotate or log to stdout.
+"""
+
+import os
+import shutil
+import tempfile
+
+import uvicorn
+
+
+def default_workers() -> int:
+    # Gemini and the database are I/O-bound; beyond a few workers the key
+    # quota, not the CPU, is the limit
+    return min(os.cpu_count() or 1, 4)
+
+
+def server_options(env=os.environ) -> dict:
+    """uvicorn.run keyword arguments for the environment"""
+    limit = env.get("LIMIT_CONCURRENCY")
+    return {
+        "host": env.get("HOST", "0.0.0.0"),
+        "port": int(env.get("PORT", 8000)),
+        "workers": int(env.get("WEB_CONCURRENCY", default_workers())),
+        "loop": "uvloop",
+        "http": "httptools",
+        "timeout_keep_alive": int(env.get("KEEP_ALIVE", 15)),
+        "backlog": int(env.get("BACKLOG", 2048)),
+        "limit_concurrency": int(limit) if limit else None,
+        "timeout_graceful_shutdown": int(env.get("GRACEFUL_TIMEOUT", 120)),
+        "proxy_headers": True,
+        "forwarded_allow_ips": env.get("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        "access_log": env.get("ACCESS_LOG", "false").lower() == "true",
+        # Logging is configured by the app (app/core/structured_logging.py)
+        "log_config": None,
+    }
+
+
+def main():
+    options = server_options()
+    runtime_dir = None
+    if options["workers"] > 1:
+        # Per-run state the workers share; set before they start so they inherit it
+        runtime_dir = tempfile.mkdtemp(prefix="qpg-server-")
+        # Workers read it to know that per-process caches are not coherent
+        os.environ["WEB_CONCURRENCY"] = str(options["workers"])
+        if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+            # Each worker writes its samples here; /metrics aggregates them
+            os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(runtime_dir, "metrics")
+            os.mkdir(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+        if not os.getenv("KEY_STATE_BACKEND"):
+            # One worker's 429 takes the key out of rotation for all of them
+            os.environ["KEY_STATE_BACKEND"] = "sqlite"
+            os.environ.setdefault("KEY_STATE_PATH", os.path.join(runtime_dir, "key-state.sqlite"))
+
+    print(f"Starting {options['workers']} worker(s) on {options['host']}:{options['port']}")
+    try:
+        uvicorn.run("app.main:app", **options)
+    finally:
+        if runtime_dir:
+            shutil.rmtree(runtime_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
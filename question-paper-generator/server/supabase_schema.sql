@@ -97,3 +97,416 @@ create policy "Users can CRUD their own notes"
   using ( auth.uid() = user_id );
 
 -- (Repeat RLS for other tables if needed, omitted here for brevity but recommended)
+
+-- Question statistics (used by /questions/stats/overview)
+-- Counts are aggregated in the database so only the summary is transferred.
+-- Missing values are grouped under the key 'null', as the API always reported them.
+create or replace function public.question_statistics(
+  p_category text default null,
+  p_user_id uuid default null
+)
+returns jsonb
+language sql
+stable
+as $$
+  with scoped as (
+    select question_type, subject, difficulty, class_grade, is_starred
+    from public.questions
+    where (p_category is null or category = p_category)
+      and (p_user_id is null or user_id = p_user_id)
+  )
+  select jsonb_build_object(
+    'total_questions', (select count(*) from scoped),
+    'starred_count', (select count(*) from scoped where is_starred),
+    'by_type', coalesce((
+      select jsonb_object_agg(k, n) from (
+        select coalesce(question_type::text, 'null') as k, count(*) as n from scoped group by 1
+      ) t), '{}'::jsonb),
+    'by_subject', coalesce((
+      select jsonb_object_agg(k, n) from (
+        select coalesce(subject, 'null') as k, count(*) as n from scoped group by 1
+      ) t), '{}'::jsonb),
+    'by_difficulty', coalesce((
+      select jsonb_object_agg(k, n) from (
+        select coalesce(difficulty, 'null') as k, count(*) as n from scoped group by 1
+      ) t), '{}'::jsonb),
+    'by_class', coalesce((
+      select jsonb_object_agg(k, n) from (
+        select coalesce(class_grade, 'null') as k, count(*) as n from scoped group by 1
+      ) t), '{}'::jsonb)
+  );
+$$;
+
+-- Question library listing indexes
+-- The library is keyset-paginated newest first on (created_at, id); each index
+-- leads with an equality filter from QuestionFilter so a filtered page is a
+-- single index range scan.
+create index if not exists idx_questions_created_id
+  on public.questions(created_at desc, id desc);
+create index if not exists idx_questions_category_created_id
+  on public.questions(category, created_at desc, id desc);
+create index if not exists idx_questions_subject_created_id
+  on public.questions(subject, class_grade, topic, created_at desc, id desc);
+create index if not exists idx_questions_class_created_id
+  on public.questions(class_grade, created_at desc, id desc);
+create index if not exists idx_questions_type_created_id
+  on public.questions(question_type, created_at desc, id desc);
+create index if not exists idx_questions_difficulty_created_id
+  on public.questions(difficulty, created_at desc, id desc);
+create index if not exists idx_questions_starred_created_id
+  on public.questions(created_at desc, id desc) where is_starred;
+
+-- Question search
+-- Full-text search over question text, topic, options and answer, with a
+-- trigram fallback for typos and partial tokens (e.g. "sin2x", "photosynth").
+create extension if not exists pg_trgm;
+
+create or replace function public.question_search_vector(
+  question_text text, topic text,
+  option_a text, option_b text, option_c text, option_d text,
+  answer_text text
+)
+returns tsvector
+language sql
+immutable
+as $$
+  select
+    setweight(to_tsvector('english', coalesce(question_text, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(topic, '')), 'B') ||
+    setweight(to_tsvector('english', concat_ws(' ', option_a, option_b, option_c, option_d)), 'C') ||
+    setweight(to_tsvector('english', coalesce(answer_text, '')), 'D');
+$$;
+
+create index if not exists idx_questions_search_vector
+  on public.questions using gin (
+    public.question_search_vector(question_text, topic, option_a, option_b, option_c, option_d, answer_text)
+  );
+create index if not exists idx_questions_question_text_trgm
+  on public.questions using gin (question_text gin_trgm_ops);
+create index if not exists idx_questions_topic_trgm
+  on public.questions using gin (topic gin_trgm_ops);
+
+-- Ranked search used by /questions?search=...
+-- Full-text matches rank first; trigram-only matches follow by word similarity.
+-- `p_columns` projects each returned question to those columns (all when null).
+drop function if exists public.search_questions(text, text, text, text, text, text, boolean, text, integer, integer);
+create or replace function public.search_questions(
+  p_query text,
+  p_subject text default null,
+  p_class_grade text default null,
+  p_topic text default null,
+  p_difficulty text default null,
+  p_question_type text default null,
+  p_is_starred boolean default null,
+  p_category text default null,
+  p_limit integer default 20,
+  p_offset integer default 0,
+  p_columns text[] default null
+)
+returns table (question jsonb, rank real, total_count bigint)
+language sql
+stable
+as $$
+  with params as (
+    select websearch_to_tsquery('english', p_query) as tsq
+  ),
+  matches as (
+    select
+      q,
+      ts_rank_cd(
+        public.question_search_vector(q.question_text, q.topic, q.option_a, q.option_b, q.option_c, q.option_d, q.answer_text),
+        params.tsq
+      ) as fts_rank,
+      greatest(word_similarity(p_query, q.question_text), word_similarity(p_query, q.topic)) as trgm_rank
+    from public.questions q, params
+    where (p_subject is null or q.subject = p_subject)
+      and (p_class_grade is null or q.class_grade = p_class_grade)
+      and (p_topic is null or q.topic = p_topic)
+      and (p_difficulty is null or q.difficulty = p_difficulty)
+      and (p_question_type is null or q.question_type::text = p_question_type)
+      and (p_is_starred is null or q.is_starred = p_is_starred)
+      and (p_category is null or q.category = p_category)
+      and (
+        public.question_search_vector(q.question_text, q.topic, q.option_a, q.option_b, q.option_c, q.option_d, q.answer_text) @@ params.tsq
+        or p_query <% q.question_text
+        or p_query <% q.topic
+      )
+  )
+  select
+    case
+      when p_columns is null then to_jsonb(m.q)
+      else (select jsonb_object_agg(e.key, e.value) from jsonb_each(to_jsonb(m.q)) e where e.key = any(p_columns))
+    end as question,
+    (m.fts_rank + m.trgm_rank)::real as rank,
+    count(*) over () as total_count
+  from matches m
+  order by m.fts_rank desc, m.trgm_rank desc, (m.q).created_at desc, (m.q).id desc
+  limit p_limit
+  offset p_offset;
+$$;
+
+-- Starring questions
+-- Flip the flag in a single statement so concurrent clicks cannot overwrite each other.
+create or replace function public.toggle_question_star(p_question_id uuid)
+returns setof public.questions
+language sql
+volatile
+as $$
+  update public.questions
+  set is_starred = not coalesce(is_starred, false)
+  where id = p_question_id
+  returning *;
+$$;
+
+-- Star or unstar many questions at once (multi-select); returns the updated ids.
+create or replace function public.set_questions_starred(p_question_ids uuid[], p_is_starred boolean)
+returns setof uuid
+language sql
+volatile
+as $$
+  update public.questions
+  set is_starred = p_is_starred
+  where id = any(p_question_ids)
+    and is_starred is distinct from p_is_starred
+  returning id;
+$$;
+
+-- Computed columns for compact list views (`fields=summary`)
+-- PostgREST exposes a function taking the row type as a selectable column.
+create or replace function public.card_count(public.user_flashcards)
+returns integer
+language sql
+immutable
+as $$
+  select case when jsonb_typeof($1.cards) = 'array'
+    then jsonb_array_length($1.cards) else 0 end;
+$$;
+
+create or replace function public.question_count(public.user_quizzes)
+returns integer
+language sql
+immutable
+as $$
+  select case when jsonb_typeof($1.questions) = 'array'
+    then jsonb_array_length($1.questions) else 0 end;
+$$;
+
+create or replace function public.question_count(public.question_papers)
+returns integer
+language sql
+immutable
+as $$
+  select case when jsonb_typeof($1.questions) = 'array'
+    then jsonb_array_length($1.questions) else 0 end;
+$$;
+
+-- Candidate sampling for blueprint-driven paper assembly
+-- Up to p_per_bucket questions per (question_type, difficulty), in one round trip.
+-- Rows are ranked by md5(id || p_seed): a pseudo-random order that is repeatable,
+-- so the same seed over the same bank returns the same candidates. Matching rows
+-- are located through idx_questions_subject_type.
+drop function if exists public.blueprint_candidates(text, text[], integer, text, text, text[]);
+create or replace function public.blueprint_candidates(
+  p_subject text,
+  p_question_types text[],
+  p_per_bucket integer,
+  p_class_grade text default null,
+  p_category text default null,
+  p_topics text[] default null,
+  p_seed text default ''
+)
+returns table (
+  id uuid,
+  question_type text,
+  difficulty text,
+  topic text,
+  marks integer,
+  question_text text,
+  option_a text,
+  option_b text,
+  option_c text,
+  option_d text
+)
+language sql
+stable
+as $$
+  select c.id, c.question_type, c.difficulty, c.topic, c.marks,
+         c.question_text, c.option_a, c.option_b, c.option_c, c.option_d
+  from (
+    select q.id, q.question_type::text as question_type, q.difficulty::text as difficulty,
+           q.topic::text as topic, q.marks, q.question_text::text as question_text,
+           q.option_a::text as option_a, q.option_b::text as option_b,
+           q.option_c::text as option_c, q.option_d::text as option_d,
+           row_number() over (
+             partition by q.question_type, q.difficulty order by md5(q.id::text || p_seed)
+           ) as rn
+    from public.questions q
+    where q.subject = p_subject
+      and q.question_type::text = any(p_question_types)
+      and (p_class_grade is null or q.class_grade = p_class_grade)
+      and (p_category is null or q.category = p_category)
+      and (p_topics is null or q.topic = any(p_topics))
+  ) c
+  where c.rn <= p_per_bucket;
+$$;
+
+create index if not exists idx_questions_subject_type
+  on public.questions(subject, question_type);
+
+-- Near-duplicate detection
+-- MinHash signature and LSH band keys are computed by the API on write
+-- (app/services/question_similarity.py). Sharing any band makes a candidate.
+alter table public.questions add column if not exists minhash integer[];
+alter table public.questions add column if not exists similarity_bands text[];
+
+create index if not exists idx_questions_similarity_bands
+  on public.questions using gin (similarity_bands);
+
+-- Candidates for several signatures at once: `p_row_bands` is a JSON array
+-- holding the band keys of each signature. Every signature gets its own
+-- candidates, ranked by the number of shared bands (more shared bands, more
+-- similar) and capped at p_per_row, so one common band cannot crowd out the others.
+drop function if exists public.near_duplicate_candidates(text[]);
+create or replace function public.near_duplicate_candidates(p_row_bands jsonb, p_per_row integer default 50)
+returns table (row_index integer, id uuid, minhash integer[])
+language sql
+stable
+as $$
+  select (s.n - 1)::integer as row_index, c.id, c.minhash
+  from jsonb_array_elements(p_row_bands) with ordinality as s(bands, n)
+  cross join lateral (select array(select jsonb_array_elements_text(s.bands)) as keys) k
+  cross join lateral (
+    select q.id, q.minhash
+    from public.questions q
+    where q.similarity_bands && k.keys
+    order by cardinality(array(select unnest(q.similarity_bands) intersect select unnest(k.keys))) desc, q.id
+    limit p_per_row
+  ) c;
+$$;
+
+-- Stores signatures the API computed for rows written before signatures
+-- existed (see QuestionService.get_duplicate_report). `p_rows` is a JSON
+-- array of {id, minhash, similarity_bands}; rows already signed are left alone.
+create or replace function public.set_question_signatures(p_rows jsonb)
+returns integer
+language sql
+as $$
+  with updated as (
+    update public.questions q
+    set minhash = s.minhash, similarity_bands = s.similarity_bands
+    from jsonb_to_recordset(p_rows) as s(id uuid, minhash integer[], similarity_bands text[])
+    where q.id = s.id and q.minhash is null
+    returning 1
+  )
+  select count(*)::integer from updated;
+$$;
+
+-- Facet counts for the question library
+-- Counts per subject, topic, difficulty and type under the same filters as
+-- the listing (including search), in one scan using grouping sets.
+create or replace function public.question_facets(
+  p_query text default null,
+  p_subject text default null,
+  p_class_grade text default null,
+  p_topic text default null,
+  p_difficulty text default null,
+  p_question_type text default null,
+  p_is_starred boolean default null,
+  p_category text default null
+)
+returns jsonb
+language sql
+stable
+as $$
+  with scoped as (
+    select q.subject, q.topic, q.difficulty, q.question_type::text as question_type
+    from public.questions q
+    where (p_subject is null or q.subject = p_subject)
+      and (p_class_grade is null or q.class_grade = p_class_grade)
+      and (p_topic is null or q.topic = p_topic)
+      and (p_difficulty is null or q.difficulty = p_difficulty)
+      and (p_question_type is null or q.question_type::text = p_question_type)
+      and (p_is_starred is null or q.is_starred = p_is_starred)
+      and (p_category is null or q.category = p_category)
+      and (
+        p_query is null
+        or public.question_search_vector(q.question_text, q.topic, q.option_a, q.option_b, q.option_c, q.option_d, q.answer_text)
+           @@ websearch_to_tsquery('english', p_query)
+        or p_query <% q.question_text
+        or p_query <% q.topic
+      )
+  ),
+  grouped as (
+    select
+      case
+        when grouping(subject) = 0 then 'subject'
+        when grouping(topic) = 0 then 'topic'
+        when grouping(difficulty) = 0 then 'difficulty'
+        else 'question_type'
+      end as facet,
+      coalesce(
+        case
+          when grouping(subject) = 0 then subject
+          when grouping(topic) = 0 then topic
+          when grouping(difficulty) = 0 then difficulty
+          else question_type
+        end,
+        'null'
+      ) as value,
+      count(*) as n
+    from scoped
+    group by grouping sets ((subject), (topic), (difficulty), (question_type))
+  )
+  select coalesce(jsonb_object_agg(facet, counts), '{}'::jsonb)
+  from (
+    select facet, jsonb_object_agg(value, n) as counts
+    from grouped
+    group by facet
+  ) f;
+$$;
+
+-- Profile claims in access tokens (optional, PROFILE_CLAIMS_ENABLED=true)
+-- Enable as the Custom Access Token hook in Supabase Auth. The API then reads
+-- role and category from the verified token instead of user_profiles.
+-- Claims are refreshed with the session, so clients should refresh it after
+-- creating or changing their profile.
+create or replace function public.custom_access_token_hook(event jsonb)
+returns jsonb
+language plpgsql
+stable
+as $$
+declare
+  claims jsonb := event->'claims';
+  profile record;
+begin
+  select p.role, p.category into profile
+  from public.user_profiles p
+  where p.id = (event->>'user_id')::uuid;
+
+  if found then
+    claims := jsonb_set(
+      claims,
+      '{app_metadata}',
+      coalesce(claims->'app_metadata', '{}'::jsonb)
+        || jsonb_build_object('profile_role', profile.role, 'profile_category', profile.category)
+    );
+  end if;
+
+  return jsonb_set(event, '{claims}', claims);
+end;
+$$;
+
+grant usage on schema public to supabase_auth_admin;
+grant execute on function public.custom_access_token_hook to supabase_auth_admin;
+revoke execute on function public.custom_access_token_hook from authenticated, anon, public;
+grant select on table public.user_profiles to supabase_auth_admin;
+
+-- Student listings are keyset-paginated newest first per user
+create index if not exists idx_user_notes_user_created_id
+  on public.user_notes(user_id, created_at desc, id desc);
+create index if not exists idx_user_flashcards_user_created_id
+  on public.user_flashcards(user_id, created_at desc, id desc);
+create index if not exists idx_user_quizzes_user_created_id
+  on public.user_quizzes(user_id, created_at desc, id desc);
+create index if not exists idx_user_mindmaps_user_created_id
+  on public.user_mindmaps(user_id, created_at desc, id desc);
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import sys
+
+import httpx
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# app.core.database needs (JWT-shaped) credentials at import time; requests go to the stand-in
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+
+from app.core.database import Database, DatabaseTimeout
+from app.main import app
+from loadtest.fake_supabase import FakeSupabase, create_app
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def database_for(fake: FakeSupabase, timeout: float = 5) -> Database:
+    """A Database whose HTTP session talks to the in-memory stand-in"""
+    database = Database("http://fake-supabase", fake.service_key(), timeout=timeout)
+    database.client.session = httpx.AsyncClient(
+        base_url="http://fake-supabase/rest/v1",
+        headers=database.client.session.headers,
+        transport=httpx.ASGITransport(app=create_app(fake)),
+    )
+    return database
+
+
+def test_session_keeps_a_bounded_pool():
+    database = Database("http://fake-supabase", "key", pool_size=7, timeout=3)
+    pool = database.client.session._transport._pool
+    assert pool._max_connections == 7
+    assert pool._max_keepalive_connections == 7
+    assert database.client.session.timeout.read == 3
+    assert database.client.session.headers["apikey"] == "key"
+
+
+def test_queries_are_timed_per_endpoint():
+    method = "test_queries_are_timed_per_endpoint.<locals>.scenario"
+
+    def count(endpoint):
+        return sample("db_query_duration_seconds_count", method=method, endpoint=endpoint)
+
+    async def scenario():
+        database = database_for(FakeSupabase(latency_ms=0))
+        await database.execute(database.table("questions").insert({"question_text": "Define work."}))
+        await database.execute(database.table("questions").select("id"))
+        await database.execute(database.table("questions").select("id,question_text"))
+
+    reads, writes = count("GET /questions"), count("POST /questions")
+    asyncio.run(scenario())
+    assert count("GET /questions") - reads == 2
+    assert count("POST /questions") - writes == 1
+    assert sample("db_query_errors_total", method=method, endpoint="GET /questions") == 0
+
+
+def test_slow_query_raises_database_timeout():
+    labels = {"method": "test_slow_query_raises_database_timeout.<locals>.scenario",
+              "endpoint": "POST /rpc/question_statistics"}
+
+    async def scenario():
+        database = database_for(FakeSupabase(latency_ms=500), timeout=0.05)
+        try:
+            await database.execute(database.rpc("question_statistics", {}))
+        except DatabaseTimeout as exc:
+            assert str(exc) == "POST /rpc/question_statistics"
+        else:
+            raise AssertionError("Expected DatabaseTimeout")
+
+    errors = sample("db_query_errors_total", **labels)
+    asyncio.run(scenario())
+    assert sample("db_query_errors_total", **labels) - errors == 1
+    assert sample("db_query_duration_seconds_count", **labels) >= 1
+
+
+def test_only_database_timeouts_become_504():
+    assert DatabaseTimeout in app.exception_handlers
+    assert asyncio.TimeoutError not in app.exception_handlers
+
+    handler = app.exception_handlers[DatabaseTimeout]
+    response = asyncio.run(handler(None, DatabaseTimeout("GET /questions")))
+    assert response.status_code == 504
+
+    # Other timeouts (e.g. an AI call) stay unhandled 500s
+    @app.get("/test-other-timeout", include_in_schema=False)
+    async def other_timeout():
+        raise asyncio.TimeoutError()
+
+    try:
+        client = TestClient(app, raise_server_exceptions=False)
+        assert client.get("/test-other-timeout").status_code == 500
+    finally:
+        app.router.routes = [r for r in app.router.routes if getattr(r, "path", None) != "/test-other-timeout"]
+
+
+if __name__ == "__main__":
+    test_session_keeps_a_bounded_pool()
+    test_queries_are_timed_per_endpoint()
+    test_slow_query_raises_database_timeout()
+    test_only_database_timeouts_become_504()
+    print("PASS")
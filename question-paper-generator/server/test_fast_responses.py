@@ -0,0 +1,82 @@
+import io
+import os
+import sys
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# app.core.database needs (JWT-shaped) credentials at import time; no request is sent
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+
+from app.api.v1.endpoints.questions import get_question_service
+from app.core.compression import CompressionMiddleware, choose_encoding
+from app.main import app
+from app.models.question import QuestionListResponse
+from loadtest.bench_json import payloads
+
+ROWS = payloads()["questions_page_100"]["questions"][:20]
+
+
+def test_question_listing_serializes_rows_without_revalidation():
+    class Service:
+        async def get_all_questions(self, filters, page, page_size, cursor=None, include_total=True, columns="*"):
+            return ROWS, 45, "next"
+
+    app.dependency_overrides[get_question_service] = lambda: Service()
+    try:
+        body = TestClient(app).get("/api/v1/questions/", params={"page_size": 20}).json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert body["questions"] == ROWS
+    assert (body["total"], body["total_pages"], body["next_cursor"]) == (45, 3, "next")
+    assert "facets" not in body
+    # Still the documented shape
+    QuestionListResponse(**body)
+
+
+def test_large_json_is_compressed_and_streams_are_not():
+    demo = FastAPI()
+    demo.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @demo.get("/big")
+    def big():
+        return ORJSONResponse(ROWS)
+
+    @demo.get("/small")
+    def small():
+        return ORJSONResponse({"ok": True})
+
+    @demo.get("/pdf")
+    def pdf():
+        return StreamingResponse(io.BytesIO(b"%PDF-1.4" + b"x" * 5000), media_type="application/pdf")
+
+    client = TestClient(demo)
+    res = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    # Content-Length is the compressed size; httpx hands back the decoded body
+    assert int(res.headers["content-length"]) < len(res.content) / 3
+    assert res.json() == ROWS
+    assert res.headers["vary"] == "Accept-Encoding"
+
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/pdf", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_encoding_negotiation():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding("") is None
+
+
+if __name__ == "__main__":
+    test_question_listing_serializes_rows_without_revalidation()
+    test_large_json_is_compressed_and_streams_are_not()
+    test_encoding_negotiation()
+    print("PASS")
@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Loaded on first use (get_ai_service / get_pdf_service), never by importing the app
+LAZY_MODULES = ("matplotlib", "reportlab", "PyPDF2", "google.genai", "json_repair")
+# Wall-clock budget for `import app.main` in a fresh interpreter; override on slow machines
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "3.0"))
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def import_report():
+    """Import app.main with -X importtime; returns the probe result and the slowest modules"""
+    env = dict(os.environ)
+    env.setdefault("SUPABASE_URL", "http://localhost:54321")
+    env.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", PROBE],
+        cwd=SERVER_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+    # "import time: self [us] | cumulative | imported package"
+    timings = []
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "self [us]" not in line:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            timings.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return json.loads(proc.stdout.strip().splitlines()[-1]), timings
+
+
+def test_app_import_stays_within_budget():
+    result, timings = import_report()
+    print(f"\nimport app.main: {result['seconds']:.2f}s (budget {IMPORT_BUDGET_SECONDS:.2f}s)")
+    for cumulative_us, self_us, name in sorted(timings, reverse=True)[:15]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:8.1f} ms self  {name}")
+
+    assert result["loaded"] == [], f"Imported eagerly: {result['loaded']}"
+    assert result["seconds"] <= IMPORT_BUDGET_SECONDS
+
+
+if __name__ == "__main__":
+    test_app_import_stays_within_budget()
+    print("PASS")
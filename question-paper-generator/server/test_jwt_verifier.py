@@ -0,0 +1,112 @@
+import asyncio
+import os
+import sys
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from prometheus_client import REGISTRY
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.jwt_verifier import JWTVerifier, TokenVerificationError, VerifierUnavailable
+
+SECRET = "test-secret-with-enough-length-for-hs256"
+
+
+def claims(**overrides):
+    now = int(time.time())
+    return {"sub": "user-1", "aud": "authenticated", "role": "authenticated",
+            "email": "a@example.com", "iat": now, "exp": now + 3600, **overrides}
+
+
+def rsa_key(kid):
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_pem = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    public_jwk["kid"] = kid
+    return private_pem, public_jwk
+
+
+class FakeJWKSVerifier(JWTVerifier):
+    """Serves the JWKS from memory and counts fetches"""
+
+    def __init__(self, keys, **kwargs):
+        super().__init__(secret=None, jwks_url="http://auth.test/jwks", **kwargs)
+        self.published = keys
+        self.fetches = 0
+
+    async def _fetch_jwks(self):
+        self.fetches += 1
+        return self.published
+
+
+def test_hs256_tokens_are_verified_locally_and_cached():
+    async def scenario():
+        verifier = JWTVerifier(secret=SECRET, jwks_url=None)
+        token = jwt.encode(claims(), SECRET, algorithm="HS256")
+        hits = REGISTRY.get_sample_value("cache_lookups_total", {"cache": "auth_tokens", "result": "hit"}) or 0.0
+        assert (await verifier.verify(token))["sub"] == "user-1"
+        assert (await verifier.verify(token))["email"] == "a@example.com"
+        assert REGISTRY.get_sample_value("cache_lookups_total", {"cache": "auth_tokens", "result": "hit"}) - hits == 1
+
+        for bad in (
+            jwt.encode(claims(exp=int(time.time()) - 10), SECRET, algorithm="HS256"),
+            jwt.encode(claims(aud="other"), SECRET, algorithm="HS256"),
+            jwt.encode(claims(), "another-secret-of-sufficient-length!!", algorithm="HS256"),
+            "not-a-jwt",
+        ):
+            try:
+                await verifier.verify(bad)
+                assert False, "token should be rejected"
+            except TokenVerificationError:
+                pass
+
+    asyncio.run(scenario())
+
+
+def test_jwks_keys_are_cached_and_refreshed_on_rotation():
+    async def scenario():
+        old_private, old_public = rsa_key("old")
+        new_private, new_public = rsa_key("new")
+        verifier = FakeJWKSVerifier([old_public], min_refresh_seconds=0, cache_ttl=0)
+
+        old_token = jwt.encode(claims(), old_private, algorithm="RS256", headers={"kid": "old"})
+        await verifier.verify(old_token)
+        await verifier.verify(old_token)
+        assert verifier.fetches == 1
+
+        verifier.published = [old_public, new_public]
+        new_token = jwt.encode(claims(sub="user-2"), new_private, algorithm="RS256", headers={"kid": "new"})
+        assert (await verifier.verify(new_token))["sub"] == "user-2"
+        assert verifier.fetches == 2
+
+    asyncio.run(scenario())
+
+
+def test_missing_key_material_is_reported_separately():
+    async def scenario():
+        verifier = FakeJWKSVerifier([])
+        private, _ = rsa_key("k")
+        token = jwt.encode(claims(), private, algorithm="RS256", headers={"kid": "k"})
+        try:
+            await verifier.verify(token)
+            assert False, "verifier has no keys"
+        except VerifierUnavailable:
+            pass
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_hs256_tokens_are_verified_locally_and_cached()
+    test_jwks_keys_are_cached_and_refreshed_on_rotation()
+    test_missing_key_material_is_reported_separately()
+    print("PASS")
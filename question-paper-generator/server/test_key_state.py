@@ -0,0 +1,127 @@
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("GEMINI_API_KEYS", "key-aaaa,key-bbbb")
+
+from app.core.key_manager import KeyManager
+from app.core import key_state
+from app.core.key_state import MemoryKeyState, SQLiteKeyState, key_id
+
+
+def manager(state):
+    km = KeyManager(state=state)
+    km.keys = ["key-aaaa", "key-bbbb"]
+    km.task_keys = {}
+    return km
+
+
+def test_a_cooldown_learned_by_one_worker_applies_to_all():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "keys.sqlite")
+        # Separate connections, as separate worker processes would have
+        first, second = SQLiteKeyState(path), SQLiteKeyState(path)
+        worker_a, worker_b = manager(first), manager(second)
+
+        worker_a.mark_rate_limited("key-aaaa", cooldown_seconds=60)
+        assert {worker_b.get_valid_key() for _ in range(20)} == {"key-bbbb"}
+
+        worker_b.report_success("key-bbbb")
+        worker_a.report_success("key-bbbb")
+        # Counts are written on the next refresh
+        second.flush()
+        assert worker_a.usage() == {
+            "...aaaa": {"calls": 0, "rate_limited": 1},
+            "...bbbb": {"calls": 2, "rate_limited": 0},
+        }
+        # Keys never reach the file in the clear
+        with open(path, "rb") as f:
+            assert b"key-aaaa" not in f.read()
+        first.close()
+        second.close()
+
+
+def test_cooldowns_expire_and_are_never_shortened():
+    state = MemoryKeyState()
+    state.set_cooldown("key-aaaa", time.time() + 60)
+    state.set_cooldown("key-aaaa", time.time() + 1)
+    assert state.cooldowns()[key_id("key-aaaa")] > time.time() + 30
+
+    state.set_cooldown("key-bbbb", time.time() - 1)
+    assert key_id("key-bbbb") not in state.cooldowns()
+
+
+def test_shared_state_is_read_once_per_refresh_and_busy_writes_are_retried():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "keys.sqlite")
+        first, second = SQLiteKeyState(path, refresh_seconds=60), SQLiteKeyState(path, refresh_seconds=0)
+        assert first.cooldowns() == {}
+
+        # Within the refresh window another worker's cooldown is not re-read...
+        second.set_cooldown("key-aaaa", time.time() + 60)
+        assert first.cooldowns() == {}
+        # ...but this worker's own applies at once
+        first.set_cooldown("key-bbbb", time.time() + 60)
+        assert set(first.cooldowns()) == {key_id("key-aaaa"), key_id("key-bbbb")}
+
+        # Another process holds the write lock: nothing blocks or raises
+        blocker = sqlite3.connect(path, isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+        started = time.perf_counter()
+        second.record_use("key-bbbb")
+        second.set_cooldown("key-bbbb", time.time() + 120)
+        assert set(second.cooldowns()) == {key_id("key-aaaa"), key_id("key-bbbb")}
+        assert time.perf_counter() - started < 1
+        blocker.execute("ROLLBACK")
+        blocker.close()
+
+        # The skipped writes go out with the next refresh
+        second.flush()
+        assert first.usage()[key_id("key-bbbb")] == {"calls": 1, "rate_limited": 2}
+        assert first.cooldowns()[key_id("key-bbbb")] > time.time() + 90
+        first.close()
+        second.close()
+
+
+def test_busy_refresh_waits_for_the_next_interval():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "keys.sqlite")
+        state = SQLiteKeyState(path, refresh_seconds=60)
+        attempts = []
+        handler = logging.Handler()
+        handler.emit = attempts.append
+        key_state.logger.addHandler(handler)
+
+        blocker = sqlite3.connect(path, isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+        try:
+            for _ in range(5):
+                assert state.cooldowns() == {}
+        finally:
+            blocker.execute("ROLLBACK")
+            blocker.close()
+            key_state.logger.removeHandler(handler)
+
+        # One busy attempt, not one per call
+        assert len(attempts) == 1
+        state.close()
+
+
+def test_default_path_is_private_to_the_app():
+    assert not key_state.KEY_STATE_PATH.startswith(tempfile.gettempdir() + os.sep)
+    assert os.path.join("question-paper-generator", "gemini-key-state.sqlite") in key_state.KEY_STATE_PATH
+
+
+if __name__ == "__main__":
+    test_a_cooldown_learned_by_one_worker_applies_to_all()
+    test_cooldowns_expire_and_are_never_shortened()
+    test_shared_state_is_read_once_per_refresh_and_busy_writes_are_retried()
+    test_busy_refresh_waits_for_the_next_interval()
+    test_default_path_is_private_to_the_app()
+    print("PASS")
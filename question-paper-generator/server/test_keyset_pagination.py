@@ -0,0 +1,82 @@
+import os
+import sys
+from uuid import uuid4
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from postgrest import SyncPostgrestClient
+
+from app.core.pagination import encode_cursor, decode_cursor, apply_keyset, split_page
+
+
+ROW_ID = "5f0c6a4e-8d2b-4c1e-9a57-3b1f2d4e6a80"
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("2024-05-01T10:00:00.123456+00:00", ROW_ID)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == ("2024-05-01T10:00:00.123456+00:00", ROW_ID)
+
+    for bad in ["", "not-a-cursor", encode_cursor("2024-05-01T10:00:00+00:00", ROW_ID)[:-2]]:
+        try:
+            decode_cursor(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"Expected ValueError for {bad!r}")
+
+
+def test_cursor_values_cannot_inject_filters():
+    ts = "2024-05-01T10:00:00+00:00"
+    for created_at, row_id in [
+        (ts + '",id.gt."0', ROW_ID),
+        (ts, ROW_ID + '"),or(id.not.is.null'),
+        ("t1", ROW_ID),
+        (ts, "1"),
+        (1714557600, ROW_ID),
+    ]:
+        try:
+            decode_cursor(encode_cursor(created_at, row_id))
+        except ValueError:
+            continue
+        raise AssertionError(f"Expected ValueError for {(created_at, row_id)!r}")
+
+    client = SyncPostgrestClient("http://localhost:3000")
+    try:
+        apply_keyset(client.from_("questions").select("*"), encode_cursor(ts + '",id.gt."0', ROW_ID))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("apply_keyset accepted a crafted cursor")
+
+
+def test_apply_keyset_builds_single_order_and_or_filter():
+    client = SyncPostgrestClient("http://localhost:3000")
+    query = client.from_("questions").select("*")
+    ts = "2024-05-01T10:00:00+00:00"
+
+    query = apply_keyset(query, encode_cursor(ts, ROW_ID))
+
+    assert query.params.get_list("order") == ["created_at.desc,id.desc"]
+    assert query.params.get("or") == (
+        f'(created_at.lt."{ts}",and(created_at.eq."{ts}",id.lt."{ROW_ID}"))'
+    )
+
+
+def test_split_page():
+    rows = [{"id": str(uuid4()), "created_at": f"2024-05-0{i + 1}T10:00:00+00:00"} for i in range(3)]
+
+    page, next_cursor = split_page(rows, 2)
+    assert page == rows[:2]
+    assert decode_cursor(next_cursor) == (rows[1]["created_at"], rows[1]["id"])
+
+    page, next_cursor = split_page(rows, 3)
+    assert page == rows and next_cursor is None
+
+
+if __name__ == "__main__":
+    test_cursor_round_trip()
+    test_cursor_values_cannot_inject_filters()
+    test_apply_keyset_builds_single_order_and_or_filter()
+    test_split_page()
+    print("PASS")
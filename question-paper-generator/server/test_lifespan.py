@@ -0,0 +1,58 @@
+import os
+import sys
+
+from fastapi.testclient import TestClient
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# app.core.database needs (JWT-shaped) credentials at import time; nothing listens there
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+os.environ.setdefault("GEMINI_API_KEYS", "key-aaaa,key-bbbb")
+
+from app.api.v1.endpoints.ai import get_ai_service
+from app.api.v1.endpoints.questions import get_pdf_service
+from app import main
+from app.main import app
+from serve import server_options
+
+
+def test_startup_warms_services_and_survives_an_unreachable_database():
+    get_ai_service.cache_clear()
+    get_pdf_service.cache_clear()
+    with TestClient(app) as client:
+        # Created during startup, before any request; PDF stays lazy by default
+        assert get_ai_service.cache_info().currsize == 1
+        assert get_pdf_service.cache_info().currsize == 0
+        ai_service = get_ai_service()
+        assert set(ai_service._clients) == set(ai_service.key_manager.keys)
+        assert client.get("/").status_code == 200
+
+
+def test_pdf_is_warmed_only_when_listed():
+    get_pdf_service.cache_clear()
+    original = main.WARMUP_SERVICES
+    main.WARMUP_SERVICES = {"pdf"}
+    try:
+        with TestClient(app):
+            assert get_pdf_service.cache_info().currsize == 1
+    finally:
+        main.WARMUP_SERVICES = original
+
+
+def test_production_options_come_from_the_environment():
+    options = server_options({"WEB_CONCURRENCY": "3", "KEEP_ALIVE": "75", "GRACEFUL_TIMEOUT": "30"})
+    assert options["workers"] == 3
+    assert options["loop"] == "uvloop" and options["http"] == "httptools"
+    assert options["timeout_keep_alive"] == 75
+    assert options["timeout_graceful_shutdown"] == 30
+    assert options["limit_concurrency"] is None
+    assert server_options({})["workers"] >= 1
+
+
+if __name__ == "__main__":
+    test_startup_warms_services_and_survives_an_unreachable_database()
+    test_pdf_is_warmed_only_when_listed()
+    test_production_options_come_from_the_environment()
+    print("PASS")
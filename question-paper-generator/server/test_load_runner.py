@@ -0,0 +1,79 @@
+import asyncio
+import os
+import sys
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from loadtest.run import compare, percentile, run_scenario
+from loadtest.scenarios import Scenario, Step
+
+
+def test_percentiles_use_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 95) == 0.0
+
+
+def test_scenario_report_counts_errors_and_rate_limits():
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {"status": "ok"}
+
+    @app.get("/api/v1/ok")
+    async def ok():
+        return {}
+
+    @app.get("/api/v1/quota")
+    async def quota():
+        # How the AI routes surface an upstream Gemini 429
+        raise HTTPException(status_code=400, detail="429 RESOURCE_EXHAUSTED. Please retry in 3.0s.")
+
+    def call(path):
+        async def step(user, shared):
+            return await user.get(path)
+        return step
+
+    async def scenario_run():
+        scenario = Scenario("probe", "test", [Step("ok", 3, call("/ok")), Step("quota", 1, call("/quota"))])
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            return await run_scenario(client, scenario, users=3, duration=0.3)
+
+    report = asyncio.run(scenario_run())
+    steps = report["steps"]
+    assert steps["ok"]["error_rate"] == 0.0
+    assert steps["quota"]["error_rate"] == 1.0
+    assert steps["quota"]["rate_limited_rate"] == 1.0
+    assert report["requests"] == steps["ok"]["requests"] + steps["quota"]["requests"]
+    assert report["throughput_rps"] > 0
+    assert set(report["event_loop_lag_ms"]) == {"server_probe", "load_generator"}
+    assert report["event_loop_lag_ms"]["server_probe"]["max"] > 0
+
+
+def test_compare_flags_latency_and_error_regressions():
+    def report(p95, error_rate):
+        step = {"latency_ms": {"p95": p95}, "error_rate": error_rate, "rate_limited_rate": 0.0}
+        return {"scenarios": {"teacher_browse": {"steps": {"list-questions": step}}}}
+
+    assert compare(report(110, 0.0), report(100, 0.0), tolerance=0.2) == []
+    regressions = compare(report(150, 0.3), report(100, 0.0), tolerance=0.2)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("teacher_browse/list-questions: p95")
+    # Scenarios or steps missing from the baseline are not compared
+    assert compare(report(500, 1.0), {"scenarios": {}}, tolerance=0.2) == []
+
+
+if __name__ == "__main__":
+    test_percentiles_use_nearest_rank()
+    test_scenario_report_counts_errors_and_rate_limits()
+    test_compare_flags_latency_and_error_regressions()
+    print("PASS")
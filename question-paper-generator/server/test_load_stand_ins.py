@@ -0,0 +1,111 @@
+import asyncio
+import json
+import os
+import re
+import sys
+
+import httpx
+from fastapi.testclient import TestClient
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# app.core.database needs (JWT-shaped) credentials at import time; no request is sent
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+
+from app.core.database import Database
+from app.core.jwt_verifier import JWTVerifier
+from app.schemas.ai_schemas import FlashcardListSchema
+from app.services.student_service import StudentService
+from loadtest.fake_gemini import FakeGemini, create_app as create_gemini
+from loadtest.fake_supabase import FakeSupabase, create_app as create_supabase
+
+
+def database_for(fake: FakeSupabase) -> Database:
+    """A Database whose PostgREST requests go to the in-process stand-in"""
+    database = Database("http://fake-supabase", fake.service_key())
+    database.client.session = httpx.AsyncClient(
+        base_url="http://fake-supabase/rest/v1",
+        headers=database.client.session.headers,
+        transport=httpx.ASGITransport(app=create_supabase(fake)),
+    )
+    return database
+
+
+def test_student_service_runs_against_fake_postgrest():
+    fake = FakeSupabase(latency_ms=0)
+    student = StudentService(database_for(fake))
+
+    async def scenario():
+        for i in range(5):
+            await student.create_note("u1", f"Note {i}", "text")
+        await student.create_flashcards("u1", "Deck", [{"front": "a", "back": "b"}] * 3)
+        await student.create_note("u2", "Other user", "text")
+
+        first, cursor = await student.get_notes("u1", columns="id,title", limit=2)
+        second, _ = await student.get_notes("u1", columns="id,title", limit=2, cursor=cursor)
+        rest, last_cursor = await student.get_notes("u1", limit=10, cursor=cursor)
+        decks, _ = await student.get_flashcards("u1", columns="id,card_count")
+        dashboard = await student.get_dashboard("u1", recent=1)
+        return first, second, rest, last_cursor, decks, dashboard
+
+    first, second, rest, last_cursor, decks, dashboard = asyncio.run(scenario())
+    assert [n["title"] for n in first] == ["Note 4", "Note 3"]
+    assert [n["title"] for n in second] == ["Note 2", "Note 1"]
+    assert len(rest) == 3 and last_cursor is None
+    assert set(first[0]) == {"id", "title", "created_at"}
+    assert decks[0]["card_count"] == 3
+    assert dashboard["counts"] == {"notes": 5, "flashcards": 1, "quizzes": 0, "mindmaps": 0}
+    assert dashboard["recent"]["notes"][0]["title"] == "Note 4"
+
+
+def test_fake_auth_tokens_verify_locally_with_profile_claims():
+    fake = FakeSupabase(latency_ms=0)
+    client = TestClient(create_supabase(fake))
+    signup = client.post("/auth/v1/signup", json={"email": "s@example.com", "password": "secret123"}).json()
+    fake.insert("user_profiles", {"id": signup["user"]["id"], "role": "student", "category": "school"})
+
+    login = client.post("/auth/v1/token?grant_type=password", json={"email": "s@example.com", "password": "secret123"})
+    assert login.status_code == 200
+    assert client.post("/auth/v1/token?grant_type=password", json={"email": "s@example.com", "password": "x"}).status_code == 400
+
+    verifier = JWTVerifier(secret=fake.jwt_secret, jwks_url=None)
+    claims = asyncio.run(verifier.verify(login.json()["access_token"]))
+    assert claims["sub"] == signup["user"]["id"]
+    assert claims["app_metadata"]["profile_role"] == "student"
+
+
+def test_fake_gemini_schema_replies_rate_limits_and_file_states():
+    fake = FakeGemini(latency_ms=0, jitter_ms=0, rpm=2, file_active_seconds=0)
+    client = TestClient(create_gemini(fake))
+    schema = FlashcardListSchema.model_json_schema()
+    body = {"contents": [{"parts": [{"text": "cards"}]}], "generationConfig": {"responseJsonSchema": schema}}
+
+    reply = client.post("/v1beta/models/m:generateContent", json=body, headers={"x-goog-api-key": "k1"})
+    text = reply.json()["candidates"][0]["content"]["parts"][0]["text"]
+    FlashcardListSchema.model_validate(json.loads(text))
+
+    client.post("/v1beta/models/m:generateContent", json=body, headers={"x-goog-api-key": "k1"})
+    limited = client.post("/v1beta/models/m:generateContent", json=body, headers={"x-goog-api-key": "k1"})
+    assert limited.status_code == 429
+    assert re.search(r"retry in (\d+\.?\d*)s", limited.json()["error"]["message"])
+    # Quotas are per key
+    assert client.post("/v1beta/models/m:generateContent", json=body, headers={"x-goog-api-key": "k2"}).status_code == 200
+
+    start = client.post(
+        "/upload/v1beta/files", json={"file": {}},
+        headers={"x-goog-api-key": "k3", "x-goog-upload-protocol": "resumable", "x-goog-upload-command": "start"}
+    )
+    upload_url = start.headers["x-goog-upload-url"]
+    final = client.post(upload_url, content=b"%PDF-1.4", headers={"x-goog-upload-command": "upload, finalize"})
+    assert final.headers["x-goog-upload-status"] == "final"
+    name = final.json()["file"]["name"]
+    assert client.get(f"/v1beta/{name}").json()["state"] == "ACTIVE"
+
+
+if __name__ == "__main__":
+    test_student_service_runs_against_fake_postgrest()
+    test_fake_auth_tokens_verify_locally_with_profile_claims()
+    test_fake_gemini_schema_replies_rate_limits_and_file_states()
+    print("PASS")
@@ -0,0 +1,117 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import httpx
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# app.core.database needs (JWT-shaped) credentials at import time; no request is sent
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+
+from app.core.database import Database
+from app.core.key_manager import KeyManager
+from app import main
+from app.main import app
+from app.services.ai_service import AIService
+from app.services.student_service import StudentService
+from loadtest.fake_supabase import FakeSupabase, create_app as create_supabase
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def scrape(client, token="scrape-token", configured="scrape-token"):
+    """GET /metrics with METRICS_TOKEN set to `configured`"""
+    original, main.METRICS_TOKEN = main.METRICS_TOKEN, configured
+    try:
+        headers = {"Authorization": f"Bearer {token}".encode("latin-1")} if token else {}
+        return client.get("/metrics", headers=headers)
+    finally:
+        main.METRICS_TOKEN = original
+
+
+def test_requests_are_timed_per_route_template():
+    client = TestClient(app)
+    before = sample("http_request_duration_seconds_count", method="GET", route="/", status="200")
+    client.get("/")
+    client.get("/")
+    after = sample("http_request_duration_seconds_count", method="GET", route="/", status="200")
+    assert after - before == 2
+
+    body = scrape(client).text
+    assert 'http_request_duration_seconds_bucket{le="0.005",method="GET",route="/",status="200"}' in body
+    assert "gemini_key_pool_available" in body
+    assert "cache_lookups_total" in body
+
+
+def test_metrics_require_the_scrape_token():
+    client = TestClient(app)
+    assert scrape(client, token=None).status_code == 401
+    assert scrape(client, token="wrong").status_code == 401
+    assert scrape(client, token="scrapé").status_code == 401
+    assert scrape(client).status_code == 200
+    # Not served at all without a configured token
+    assert scrape(client, configured=None).status_code == 404
+
+
+def test_db_queries_are_labelled_with_the_calling_service_method():
+    fake = FakeSupabase(latency_ms=0)
+    database = Database("http://fake-supabase", fake.service_key())
+    database.client.session = httpx.AsyncClient(
+        base_url="http://fake-supabase/rest/v1",
+        headers=database.client.session.headers,
+        transport=httpx.ASGITransport(app=create_supabase(fake)),
+    )
+    labels = {"method": "StudentService._list", "endpoint": "GET /user_notes"}
+    before = sample("db_query_duration_seconds_count", **labels)
+    asyncio.run(StudentService(database).get_notes("u1"))
+    assert sample("db_query_duration_seconds_count", **labels) - before == 1
+
+
+def test_gemini_calls_record_latency_tokens_and_rate_limits():
+    usage = SimpleNamespace(prompt_token_count=120, candidates_token_count=30)
+
+    async def generate(client):
+        return SimpleNamespace(text="ok", usage_metadata=usage)
+
+    async def exhausted(client):
+        raise Exception("429 RESOURCE_EXHAUSTED. Please retry in 2.0s.")
+
+    service = AIService.__new__(AIService)
+    tokens_before = sample("gemini_tokens_total", task_type="quiz", kind="prompt")
+    limited_before = sample("gemini_call_duration_seconds_count", task_type="quiz", outcome="rate_limited")
+
+    asyncio.run(service._call(generate, None, "quiz"))
+    try:
+        asyncio.run(service._call(exhausted, None, "quiz"))
+    except Exception:
+        pass
+
+    assert sample("gemini_tokens_total", task_type="quiz", kind="prompt") - tokens_before == 120
+    assert sample("gemini_call_duration_seconds_count", task_type="quiz", outcome="rate_limited") - limited_before == 1
+
+
+def test_key_pool_metrics_follow_cooldowns():
+    os.environ.setdefault("GEMINI_API_KEYS", "key-aaaa,key-bbbb")
+    manager = KeyManager()
+    manager.keys = ["key-aaaa", "key-bbbb"]
+    before = sample("gemini_key_rate_limited_total", key="...aaaa")
+    manager.mark_rate_limited("key-aaaa", cooldown_seconds=60)
+    assert sample("gemini_key_rate_limited_total", key="...aaaa") - before == 1
+    assert sample("gemini_key_pool_available") == 1
+    assert manager.get_valid_key() == "key-bbbb"
+
+
+if __name__ == "__main__":
+    test_requests_are_timed_per_route_template()
+    test_db_queries_are_labelled_with_the_calling_service_method()
+    test_gemini_calls_record_latency_tokens_and_rate_limits()
+    test_key_pool_metrics_follow_cooldowns()
+    print("PASS")
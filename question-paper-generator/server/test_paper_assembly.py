@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import httpx
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# app.core.database needs (JWT-shaped) credentials at import time; no request is sent
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+
+from app.core.database import Database
+from app.schemas.paper_blueprint import PaperBlueprint
+from app.services import paper_assembly_service
+from app.services.paper_assembly_service import PaperAssemblyService, allocate, select_questions
+from loadtest.fake_supabase import FakeSupabase, create_app
+
+
+def make_bank():
+    bank = []
+    for i in range(30):
+        difficulty = ["EASY", "MEDIUM", "HARD"][i % 3]
+        bank.append({"id": f"mcq{i}", "question_type": "MCQ", "difficulty": difficulty,
+                     "topic": f"t{i % 4}", "marks": 1})
+    for i in range(12):
+        difficulty = ["EASY", "MEDIUM", "HARD"][i % 3]
+        bank.append({"id": f"long{i}", "question_type": "LONG", "difficulty": difficulty,
+                     "topic": f"t{i % 4}", "marks": 4 + i % 3})
+    return bank
+
+
+def test_allocate_uses_largest_remainder():
+    assert allocate(10, {"EASY": 0.3, "MEDIUM": 0.5, "HARD": 0.2}) == {"EASY": 3, "MEDIUM": 5, "HARD": 2}
+    assert sum(allocate(7, {"EASY": 1, "MEDIUM": 1, "HARD": 1}).values()) == 7
+
+
+def test_selection_meets_counts_mix_and_marks():
+    selected, shortfall = select_questions(
+        make_bank(),
+        {"MCQ": 10, "LONG": 3},
+        difficulty_mix={"EASY": 0.3, "MEDIUM": 0.5, "HARD": 0.2},
+        target_total_marks=25,
+        rng=random.Random(1)
+    )
+    assert shortfall == {}
+    assert len({q["id"] for q in selected}) == 13
+    mcq = [q for q in selected if q["question_type"] == "MCQ"]
+    assert [sum(q["difficulty"] == d for q in mcq) for d in ("EASY", "MEDIUM", "HARD")] == [3, 5, 2]
+    assert sum(q["marks"] for q in selected) == 25
+
+
+def test_same_seed_gives_same_paper_and_shortfall_is_reported():
+    first, _ = select_questions(make_bank(), {"MCQ": 5}, rng=random.Random(7))
+    second, _ = select_questions(make_bank(), {"MCQ": 5}, rng=random.Random(7))
+    assert [q["id"] for q in first] == [q["id"] for q in second]
+
+    _, shortfall = select_questions(make_bank(), {"LONG": 15, "SHORT": 2})
+    assert shortfall == {"LONG": 3, "SHORT": 2}
+
+
+def test_large_blueprint_hits_marks_target_quickly():
+    rng = random.Random(3)
+    types = ["MCQ", "SHORT", "LONG", "TRUE_FALSE"]
+    bank = [{"id": f"{t}{i}", "question_type": t, "difficulty": ["EASY", "MEDIUM", "HARD"][i % 3],
+             "topic": f"t{i % 7}", "marks": rng.randint(1, 10)} for t in types for i in range(600)]
+
+    start = time.perf_counter()
+    selected, shortfall = select_questions(
+        bank, {t: 100 for t in types}, target_total_marks=700, rng=random.Random(1)
+    )
+    elapsed = time.perf_counter() - start
+
+    assert shortfall == {} and len({q["id"] for q in selected}) == 400
+    assert sum(q["marks"] for q in selected) == 700
+    assert elapsed < 1.0, f"select_questions took {elapsed:.2f}s"
+
+
+def test_seeded_candidate_sample_is_repeatable():
+    fake = FakeSupabase(latency_ms=0)
+    for row in make_bank():
+        values = {k: v for k, v in row.items() if k != "id"}
+        fake.insert("questions", {**values, "subject": "Physics", "question_text": row["id"]})
+    seeds = []
+
+    async def record(request: httpx.Request):
+        seeds.append(json.loads(request.content).get("p_seed"))
+
+    database = Database("http://fake-supabase", fake.service_key())
+    database.client.session = httpx.AsyncClient(
+        base_url="http://fake-supabase/rest/v1",
+        headers=database.client.session.headers,
+        transport=httpx.ASGITransport(app=create_app(fake)),
+        event_hooks={"request": [record]},
+    )
+    service = PaperAssemblyService(database)
+
+    def sample(seed):
+        blueprint = PaperBlueprint(subject="Physics", question_counts={"MCQ": 1}, seed=seed)
+        return [q["question_text"] for q in asyncio.run(service.get_candidates(blueprint))]
+
+    # 10 MCQs per difficulty, MIN_CANDIDATES caps each bucket at 20: every row comes back
+    assert len(sample(3)) == 30
+    assert seeds == ["3"]
+
+    original = paper_assembly_service.MIN_CANDIDATES
+    paper_assembly_service.MIN_CANDIDATES = 4
+    try:
+        assert sample(3) == sample(3)
+        assert len(sample(3)) == 12
+        assert sample(3) != sample(4)
+        sample(None)
+        sample(None)
+        assert seeds[-1] != seeds[-2] and len(seeds[-1]) == 16
+    finally:
+        paper_assembly_service.MIN_CANDIDATES = original
+
+
+if __name__ == "__main__":
+    test_allocate_uses_largest_remainder()
+    test_selection_meets_counts_mix_and_marks()
+    test_same_seed_gives_same_paper_and_shortfall_is_reported()
+    test_large_blueprint_hits_marks_target_quickly()
+    test_seeded_candidate_sample_is_repeatable()
+    print("PASS")
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+
+from prometheus_client import REGISTRY
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.password_hasher import PasswordHasher, PasswordHasherBusy
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def logins():
+    return {outcome: sample("logins_total", outcome=outcome) for outcome in ("succeeded", "failed", "rejected")}
+
+
+def test_hashing_runs_off_the_event_loop():
+    async def scenario():
+        hasher = PasswordHasher(rounds=10, workers=2, queue_limit=8)
+        ticks = 0
+        before = logins()
+        verified = sample("password_hash_duration_seconds_count", operation="verify", outcome="ok")
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        task = asyncio.create_task(ticker())
+        hashed = await hasher.hash("correct horse")
+        valid, new_hash = await hasher.verify("correct horse", hashed)
+        invalid, _ = await hasher.verify("wrong", hashed)
+        task.cancel()
+
+        assert valid and not invalid and new_hash is None
+        assert ticks > 2  # the loop kept serving other work meanwhile
+        after = logins()
+        assert {k: after[k] - before[k] for k in after} == {"succeeded": 1, "failed": 1, "rejected": 0}
+        assert sample("password_hash_duration_seconds_count", operation="verify", outcome="ok") - verified == 2
+        assert sample("password_hash_pending") == 0
+
+    asyncio.run(scenario())
+
+
+def test_outdated_cost_is_upgraded_and_bursts_are_bounded():
+    async def scenario():
+        old = PasswordHasher(rounds=4, workers=1, queue_limit=0)
+        hashed = await old.hash("pw")
+
+        current = PasswordHasher(rounds=5, workers=1, queue_limit=1)
+        rejected_before = sample("logins_total", outcome="rejected")
+        valid, new_hash = await current.verify("pw", hashed)
+        assert valid and new_hash and new_hash.startswith("$2b$05$")
+
+        results = await asyncio.gather(
+            *(current.verify("pw", hashed) for _ in range(4)), return_exceptions=True
+        )
+        rejected = [r for r in results if isinstance(r, PasswordHasherBusy)]
+        assert len(rejected) == 2
+        assert sample("logins_total", outcome="rejected") - rejected_before == 2
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_hashing_runs_off_the_event_loop()
+    test_outdated_cost_is_upgraded_and_bursts_are_bounded()
+    print("PASS")
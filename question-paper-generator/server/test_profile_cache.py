@@ -0,0 +1,92 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# app.core.database needs (JWT-shaped) credentials at import time; no request is sent
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+
+from app.models.profile import ProfileUpdate
+from app.models.user import AuthenticatedUser
+from app.services import profile_service
+from app.services.profile_service import ProfileService
+
+
+class ProfileQuery:
+    def __init__(self, db):
+        self.db = db
+        self.update_data = None
+
+    def select(self, columns):
+        return self
+
+    def update(self, data):
+        self.update_data = data
+        return self
+
+    def eq(self, column, value):
+        return self
+
+
+class ProfileDatabase:
+    """One user_profiles row; counts round trips"""
+
+    def __init__(self, row):
+        self.row = row
+        self.queries = 0
+
+    def table(self, name):
+        return ProfileQuery(self)
+
+    async def execute(self, query):
+        self.queries += 1
+        if query.update_data:
+            self.row = {**self.row, **query.update_data}
+        return SimpleNamespace(data=[self.row])
+
+
+def test_profile_reads_are_cached_and_refreshed_by_updates():
+    async def scenario():
+        profile_service._profile_cache.clear()
+        db = ProfileDatabase({"id": "u1", "role": "student", "category": "school"})
+        service = ProfileService(db)
+
+        await service.get_profile_by_user_id("u1")
+        await service.get_profile_by_user_id("u1")
+        assert db.queries == 1
+
+        await service.update_profile("u1", ProfileUpdate(role="teacher"))
+        identity = await service.get_identity(AuthenticatedUser(id="u1"))
+        assert identity["role"] == "teacher"
+        assert db.queries == 2
+
+    asyncio.run(scenario())
+
+
+def test_identity_comes_from_token_claims_when_enabled():
+    async def scenario():
+        profile_service._profile_cache.clear()
+        db = ProfileDatabase({"id": "u2", "role": "student"})
+        service = ProfileService(db)
+        user = AuthenticatedUser(id="u2", app_metadata={"profile_role": "teacher", "profile_category": "college"})
+
+        profile_service.PROFILE_CLAIMS_ENABLED = True
+        try:
+            identity = await service.get_identity(user)
+        finally:
+            profile_service.PROFILE_CLAIMS_ENABLED = False
+
+        assert identity == {"id": "u2", "role": "teacher", "category": "college"}
+        assert db.queries == 0
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_profile_reads_are_cached_and_refreshed_by_updates()
+    test_identity_comes_from_token_claims_when_enabled()
+    print("PASS")
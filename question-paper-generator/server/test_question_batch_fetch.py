@@ -0,0 +1,89 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+from uuid import uuid4
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# app.core.database needs (JWT-shaped) credentials at import time; no request is sent
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+
+from app.services.question_service import QuestionService, PDF_RENDER_COLUMNS
+
+
+class RecordingQuery:
+    """Minimal stand-in for the PostgREST query builder used by QuestionService"""
+
+    def __init__(self, rows, calls):
+        self.rows = rows
+        self.calls = calls
+        self.columns = None
+        self.ids = None
+
+    def select(self, columns, **kwargs):
+        self.columns = columns
+        return self
+
+    def in_(self, column, values):
+        self.ids = list(values)
+        return self
+
+    def execute(self):
+        self.calls.append((self.columns, self.ids))
+        data = [r for r in self.rows if r["id"] in self.ids]
+        # PostgREST does not guarantee order for in_() filters
+        return SimpleNamespace(data=list(reversed(data)))
+
+
+class RecordingDatabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def table(self, name):
+        return RecordingQuery(self.rows, self.calls)
+
+    async def execute(self, query):
+        return query.execute()
+
+
+def test_batch_fetch_preserves_order_and_reports_missing():
+    ids = [str(uuid4()) for _ in range(3)]
+    missing = str(uuid4())
+    rows = [{"id": i, "question_text": f"Q {i}"} for i in ids]
+    db = RecordingDatabase(rows)
+    service = QuestionService(db)
+
+    requested = [ids[2], missing, ids[0], ids[1], ids[0]]
+    ordered, missing_ids = asyncio.run(
+        service.get_questions_by_ids(requested, columns=PDF_RENDER_COLUMNS)
+    )
+
+    assert [q["id"] for q in ordered] == [ids[2], ids[0], ids[1], ids[0]]
+    assert missing_ids == [missing]
+    # One round trip, no duplicated ids, only the renderer's columns
+    assert len(db.calls) == 1
+    columns, queried_ids = db.calls[0]
+    assert columns == PDF_RENDER_COLUMNS
+    assert len(queried_ids) == 4
+
+
+def test_batch_fetch_adds_id_column_and_skips_empty_requests():
+    qid = str(uuid4())
+    db = RecordingDatabase([{"id": qid}])
+    service = QuestionService(db)
+
+    asyncio.run(service.get_questions_by_ids([qid], columns="question_text"))
+    assert db.calls[0][0] == "id,question_text"
+
+    assert asyncio.run(service.get_questions_by_ids([])) == ([], [])
+    assert len(db.calls) == 1
+
+
+if __name__ == "__main__":
+    test_batch_fetch_preserves_order_and_reports_missing()
+    test_batch_fetch_adds_id_column_and_skips_empty_requests()
+    print("PASS")
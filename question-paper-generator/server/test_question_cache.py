@@ -0,0 +1,219 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+from prometheus_client import REGISTRY
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# app.core.database needs (JWT-shaped) credentials at import time; no request is sent
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+
+from app.models.question import QuestionFilter, QuestionType
+from app.services.question_cache import QuestionCache, SharedCacheTier, _create_question_cache, filter_constraints
+from app.services.question_service import QuestionService
+
+
+def make_cache():
+    cache = QuestionCache(ttl_seconds=60, item_size=10, list_size=10)
+
+    async def add(filters, **params):
+        constraints = filter_constraints(filters)
+        signature = cache.listing_signature(constraints, **params)
+        await cache.set_listing(signature, constraints, ([], 0, None))
+        return signature
+
+    return cache, add
+
+
+def test_write_invalidates_only_affected_listings():
+    async def scenario():
+        cache, add = make_cache()
+        physics = await add(QuestionFilter(subject="Physics"), page=1)
+        maths = await add(QuestionFilter(subject="Maths"), page=1)
+        starred = await add(QuestionFilter(is_starred=True), page=1)
+        mcq = await add(QuestionFilter(question_type=QuestionType.MCQ), page=1)
+        search = await add(QuestionFilter(search="lens"), page=1)
+
+        row = {"id": "q1", "subject": "Physics", "question_type": "LONG", "is_starred": False}
+        await cache.set_question("q1", row)
+
+        # Starring a Physics LONG question: Physics listing shows it, starred listing gains it
+        await cache.invalidate(rows=[row], changed_columns=["is_starred"], question_ids=["q1"])
+
+        assert await cache.get_question("q1") is None
+        assert await cache.get_listing(physics) is None
+        assert await cache.get_listing(starred) is None
+        assert await cache.get_listing(search) is None
+        assert await cache.get_listing(maths) is not None
+        assert await cache.get_listing(mcq) is not None
+
+    asyncio.run(scenario())
+
+
+def test_moving_a_question_invalidates_the_listing_it_left():
+    async def scenario():
+        cache, add = make_cache()
+        maths = await add(QuestionFilter(subject="Maths"), page=1)
+
+        moved = {"id": "q2", "subject": "Physics"}
+        await cache.invalidate(rows=[moved], changed_columns=["subject"])
+
+        assert await cache.get_listing(maths) is None
+
+    asyncio.run(scenario())
+
+
+def test_listing_lookups_are_counted_and_size_is_bounded():
+    def lookups(result):
+        return REGISTRY.get_sample_value("cache_lookups_total", {"cache": "question_listings", "result": result}) or 0.0
+
+    async def scenario():
+        cache, add = make_cache()
+        for page in range(1, 15):
+            await add(None, page=page)
+        hits, misses = lookups("hit"), lookups("miss")
+        signature = cache.listing_signature({}, page=14)
+        await cache.get_listing(signature)
+        await cache.get_listing(cache.listing_signature({}, page=1))
+
+        assert len(cache.listings) == 10
+        assert lookups("hit") - hits == 1
+        assert lookups("miss") - misses == 1
+
+    asyncio.run(scenario())
+
+
+class FacetDatabase:
+    """Answers the question_facets RPC and records its parameters"""
+
+    def __init__(self):
+        self.calls = []
+
+    def rpc(self, func, params):
+        self.calls.append((func, params))
+        return SimpleNamespace(data={"subject": {params["p_subject"] or "Physics": 3}, "topic": {"Optics": 3}})
+
+    async def execute(self, query):
+        return query
+
+
+def test_facets_are_cached_per_filter_until_a_matching_write():
+    async def scenario():
+        db = FacetDatabase()
+        service = QuestionService(db)
+        service.cache = QuestionCache(ttl_seconds=60, item_size=10, list_size=10)
+        physics = QuestionFilter(subject="Physics")
+
+        facets = await service.get_facets(physics)
+        assert facets["subject"] == {"Physics": 3}
+        assert facets["difficulty"] == {}  # every facet is present
+        await service.get_facets(physics)
+        assert len(db.calls) == 1
+        assert db.calls[0][0] == "question_facets" and db.calls[0][1]["p_subject"] == "Physics"
+
+        await service._invalidate(rows=[{"id": "q1", "subject": "Maths"}])
+        await service.get_facets(physics)
+        assert len(db.calls) == 1
+
+        await service._invalidate(rows=[{"id": "q2", "subject": "Physics"}])
+        await service.get_facets(physics)
+        assert len(db.calls) == 2
+
+    asyncio.run(scenario())
+
+
+class InMemoryRedis:
+    """The few redis.asyncio calls SharedCacheTier makes, on a dict"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+
+    def pipeline(self, transaction=True):
+        return InMemoryPipeline(self)
+
+
+class InMemoryPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def incr(self, key):
+        self.calls.append(self.redis.incr(key))
+
+    def expire(self, key, seconds):
+        pass
+
+    async def execute(self):
+        for call in self.calls:
+            await call
+
+
+class InMemorySharedTier(SharedCacheTier):
+    def __init__(self, redis, ttl_seconds=60):
+        self.redis = redis
+        self.ttl_seconds = ttl_seconds
+        self._hits = self._misses = SimpleNamespace(inc=lambda: None)
+
+
+def test_write_on_one_worker_invalidates_the_others():
+    async def scenario():
+        redis = InMemoryRedis()
+        worker_a, worker_b = (
+            QuestionCache(ttl_seconds=60, item_size=10, list_size=10, shared=InMemorySharedTier(redis))
+            for _ in range(2)
+        )
+        physics = worker_b.listing_signature({"subject": "Physics"}, page=1)
+        row = {"id": "q1", "subject": "Physics", "is_starred": False}
+        await worker_b.set_listing(physics, {"subject": "Physics"}, ([row], 1, None))
+        await worker_b.set_question("q1", row)
+        assert await worker_b.get_listing(physics) == ([row], 1, None)
+        assert await worker_b.get_question("q1") == row
+
+        # Worker A stars the question; worker B's in-process entries are stale now
+        await worker_a.invalidate(rows=[{**row, "is_starred": True}], changed_columns=["is_starred"])
+
+        assert len(worker_b.listings) == 1 and len(worker_b.questions) == 1
+        assert await worker_b.get_listing(physics) is None
+        assert await worker_b.get_question("q1") is None
+
+    asyncio.run(scenario())
+
+
+def test_cache_is_disabled_for_several_workers_without_a_shared_tier():
+    cache = _create_question_cache(workers=4)
+    cache.questions.set("q1", (None, {"id": "q1"}))
+    assert len(cache.questions) == 0
+    assert _create_question_cache(workers=1).questions.maxsize > 0
+
+
+if __name__ == "__main__":
+    test_write_invalidates_only_affected_listings()
+    test_moving_a_question_invalidates_the_listing_it_left()
+    test_listing_lookups_are_counted_and_size_is_bounded()
+    test_facets_are_cached_per_filter_until_a_matching_write()
+    test_write_on_one_worker_invalidates_the_others()
+    test_cache_is_disabled_for_several_workers_without_a_shared_tier()
+    print("PASS")
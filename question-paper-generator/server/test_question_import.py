@@ -0,0 +1,221 @@
+import asyncio
+import json
+import os
+import sys
+
+from fastapi import FastAPI
+from postgrest.exceptions import APIError
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# app.core.database needs (JWT-shaped) credentials at import time; no request is sent
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+
+from app.api.v1.endpoints.questions import get_question_service, router
+from app.core.database import DatabaseTimeout
+from app.services.question_import_service import QuestionImportService
+from app.services.question_similarity import match_candidates
+
+
+class RecordingQuestionService:
+    """Stand-in for QuestionService writes; rejects rows whose topic is 'reject'. The bank is what it wrote."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def bulk_upsert_questions(self, rows):
+        if any(row["topic"] == "reject" for row in rows):
+            raise APIError({"message": "constraint violation", "code": "23514"})
+        self.batches.append(rows)
+        return len(rows)
+
+    async def find_near_duplicates(self, rows, exclude_ids=None):
+        bank = [
+            {"id": f"written{i}", "minhash": row["minhash"]}
+            for i, row in enumerate(row for batch in self.batches for row in batch)
+        ]
+        return [match_candidates(row["minhash"], bank) if row["minhash"] else [] for row in rows]
+
+
+async def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def run_import(data: bytes, fmt: str, batch_size: int = 2, chunk_size: int = 7):
+    service = RecordingQuestionService()
+    importer = QuestionImportService(service, batch_size=batch_size)
+
+    async def collect():
+        return [event async for event in importer.import_stream(chunked(data, chunk_size), fmt)]
+
+    return service, asyncio.run(collect())
+
+
+def test_csv_import_streams_batches_and_reports_bad_rows():
+    data = (
+        "question_type,subject,class_grade,topic,question_text,marks,is_starred\n"
+        'MCQ,Physics,12,Optics,"Line one\nline two, with comma",2,true\n'
+        "LONG,Physics,12,Optics,Explain refraction,,\n"
+        "ESSAY,Physics,12,Optics,Bad type,1,false\n"
+        "LONG,Physics,12,reject,Fails on write,1,false\n"
+    ).encode()
+
+    service, events = run_import(data, "csv")
+
+    written = [row for batch in service.batches for row in batch]
+    assert written[0]["question_text"] == "Line one\nline two, with comma"
+    assert written[0]["is_starred"] is True
+    assert written[1]["marks"] == 1  # empty cell falls back to the model default
+
+    errors = [e for e in events if e["type"] == "error"]
+    assert [e["row"] for e in errors] == [3, 4]
+    assert errors[0]["errors"][0]["field"] == "question_type"
+
+    assert any(e["type"] == "progress" for e in events)
+    assert events[-1] == {"type": "summary", "processed": 4, "written": 2, "failed": 2}
+
+
+def test_jsonl_import_separates_upserts_from_inserts():
+    rows = [
+        {"id": "5f8f8c44-4f6c-4b9b-8a57-2f1f3a6f9c11", "question_type": "MCQ", "subject": "Maths",
+         "class_grade": "10", "topic": "Algebra", "question_text": "x + 1 = 2"},
+        {"question_type": "TRUE_FALSE", "subject": "Maths", "class_grade": "10",
+         "topic": "Algebra", "question_text": "0 is even"},
+    ]
+    data = ("\n".join(json.dumps(r) for r in rows) + "\n{not json}\n").encode()
+
+    service, events = run_import(data, "jsonl", batch_size=10)
+
+    assert len(service.batches) == 2
+    assert all("id" in row for row in service.batches[0])
+    assert all("id" not in row for row in service.batches[1])
+    assert events[-1] == {"type": "summary", "processed": 3, "written": 2, "failed": 1}
+
+
+class UnreachableQuestionService(RecordingQuestionService):
+    """Writes time out from the second request on"""
+
+    def __init__(self, fail_lookup=False):
+        super().__init__()
+        self.fail_lookup = fail_lookup
+        self.calls = 0
+
+    async def bulk_upsert_questions(self, rows):
+        self.calls += 1
+        if self.calls > 1:
+            raise DatabaseTimeout("POST /questions")
+        return await super().bulk_upsert_questions(rows)
+
+    async def find_near_duplicates(self, rows, exclude_ids=None):
+        if self.fail_lookup:
+            raise DatabaseTimeout("POST /rpc/near_duplicate_candidates")
+        return await super().find_near_duplicates(rows, exclude_ids)
+
+
+def test_database_outage_stops_the_import_with_a_summary():
+    row = {"question_type": "LONG", "subject": "Maths", "class_grade": "10", "topic": "Algebra"}
+    data = "".join(json.dumps({**row, "question_text": f"Question {i}"}) + "\n" for i in range(9)).encode()
+
+    service = UnreachableQuestionService()
+    importer = QuestionImportService(service, batch_size=3)
+
+    async def collect():
+        return [event async for event in importer.import_stream(chunked(data, 7), "jsonl")]
+
+    events = [e for e in asyncio.run(collect()) if e["type"] != "duplicate"]
+
+    # No row-by-row retry of the batch that timed out, and later batches are not attempted
+    assert service.calls == 2
+    assert [e["type"] for e in events] == ["progress", "error", "summary"]
+    assert events[1]["row"] is None
+    assert "DatabaseTimeout" in events[1]["errors"][0]["message"]
+    assert events[-1] == {"type": "summary", "processed": 6, "written": 3, "failed": 3}
+
+
+def test_failed_duplicate_lookup_ends_with_a_summary():
+    row = {"question_type": "LONG", "subject": "Maths", "class_grade": "10", "topic": "Algebra"}
+    data = "".join(json.dumps({**row, "question_text": f"Question {i}"}) + "\n" for i in range(2)).encode()
+
+    service = UnreachableQuestionService(fail_lookup=True)
+    importer = QuestionImportService(service, batch_size=10)
+
+    async def collect():
+        return [event async for event in importer.import_stream(chunked(data, 7), "jsonl")]
+
+    events = asyncio.run(collect())
+    assert service.calls == 0
+    assert [e["type"] for e in events if e["type"] != "duplicate"] == ["error", "summary"]
+    assert events[-1] == {"type": "summary", "processed": 2, "written": 0, "failed": 2}
+
+
+def test_import_route_reads_a_multi_chunk_body_while_responding():
+    """Through the real route, as a server delivers it: several body messages, then nothing until disconnect"""
+    service = RecordingQuestionService()
+    app = FastAPI()
+    app.include_router(router, prefix="/questions")
+    app.dependency_overrides[get_question_service] = lambda: service
+
+    row = {"question_type": "LONG", "subject": "Maths", "class_grade": "10", "topic": "Algebra"}
+    data = "".join(json.dumps({**row, "question_text": f"Question {i}"}) + "\n" for i in range(5)).encode()
+    chunks = [data[i:i + 40] for i in range(0, len(data), 40)]
+    sent = []
+    finished = asyncio.Event()
+
+    async def receive():
+        if chunks:
+            await asyncio.sleep(0)
+            body = chunks.pop(0)
+            return {"type": "http.request", "body": body, "more_body": bool(chunks)}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            finished.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/questions/import", "raw_path": b"/questions/import",
+        "query_string": b"", "root_path": "", "server": ("test", 80), "client": ("test", 1),
+        "headers": [(b"content-type", b"application/x-ndjson")],
+    }
+    asyncio.run(asyncio.wait_for(app(scope, receive, send), timeout=10))
+
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    events = [json.loads(line) for line in body.decode().splitlines()]
+    assert events[-1] == {"type": "summary", "processed": 5, "written": 5, "failed": 0}
+
+
+def test_import_flags_near_duplicate_rows_but_writes_them():
+    data = (
+        "question_type,subject,class_grade,topic,question_text\n"
+        "LONG,Physics,12,Optics,A lens has a focal length of 20 cm. Find its power.\n"
+        "LONG,Physics,12,Optics,A lens has a focal length of 35 cm. Find its power!\n"
+        "LONG,Physics,12,Optics,Define the critical angle for total internal reflection.\n"
+        "LONG,Physics,12,Optics,A lens has a focal length of 50 cm. Find its power?\n"
+    ).encode()
+
+    service, events = run_import(data, "csv")
+
+    duplicates = [e for e in events if e["type"] == "duplicate"]
+    assert [e["row"] for e in duplicates] == [2, 4]
+    # Row 2 matches an earlier row of its batch
+    assert duplicates[0]["rows"][0]["row"] == 1 and duplicates[0]["matches"] == []
+    # Row 4 is in the next batch: rows 1 and 2 are found in the bank, not in memory
+    assert duplicates[1]["rows"] == []
+    assert {m["id"] for m in duplicates[1]["matches"]} == {"written0", "written1"}
+    assert events[-1]["written"] == 4
+
+
+if __name__ == "__main__":
+    test_csv_import_streams_batches_and_reports_bad_rows()
+    test_jsonl_import_separates_upserts_from_inserts()
+    test_database_outage_stops_the_import_with_a_summary()
+    test_failed_duplicate_lookup_ends_with_a_summary()
+    test_import_route_reads_a_multi_chunk_body_while_responding()
+    test_import_flags_near_duplicate_rows_but_writes_them()
+    print("PASS")
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import os
+import sys
+from uuid import uuid4
+
+import httpx
+import numpy as np
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# app.core.database needs (JWT-shaped) credentials at import time; requests go to the stand-in
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+
+from fastapi import FastAPI
+
+from app.api.v1.endpoints.questions import get_question_service, router
+from app.core.database import Database, DatabaseTimeout
+from app.models.question import QuestionCreate, QuestionFilter, QuestionUpdate
+from app.services import question_service
+from app.services.question_cache import QuestionCache
+from app.services.question_similarity import BANDS, ROWS_PER_BAND, band_keys, signature_columns
+from app.services.question_service import QuestionService
+from loadtest.fake_supabase import FakeSupabase, create_app
+
+
+def service_for(fake: FakeSupabase):
+    """A QuestionService on the in-memory stand-in, plus the RPC calls it makes as (name, params)"""
+    rpc_calls = []
+
+    async def record(request: httpx.Request):
+        if "/rpc/" in request.url.path:
+            rpc_calls.append((request.url.path.rsplit("/", 1)[-1], json.loads(request.content or b"{}")))
+
+    database = Database("http://fake-supabase", fake.service_key())
+    database.client.session = httpx.AsyncClient(
+        base_url="http://fake-supabase/rest/v1",
+        headers=database.client.session.headers,
+        transport=httpx.ASGITransport(app=create_app(fake)),
+        event_hooks={"request": [record]},
+    )
+    question_service._stats_cache.clear()
+    service = QuestionService(database)
+    service.cache = QuestionCache()
+    return service, rpc_calls
+
+
+def new_question(**fields) -> QuestionCreate:
+    values = {"question_type": "LONG", "subject": "Physics", "class_grade": "12", "topic": "Optics",
+              "difficulty": "EASY", "category": "school", "question_text": "Define the focal length of a lens."}
+    return QuestionCreate(**{**values, **fields})
+
+
+def test_statistics_map_the_rpc_result_and_refresh_after_writes():
+    async def scenario():
+        service, rpc_calls = service_for(FakeSupabase(latency_ms=0))
+        first = await service.create_question(new_question())
+        await service.create_question(new_question(subject="Maths", question_type="MCQ", is_starred=True))
+
+        stats = await service.get_statistics(category="school")
+        assert rpc_calls == [("question_statistics", {"p_category": "school", "p_user_id": None})]
+        assert stats["total_questions"] == 2
+        assert stats["starred_count"] == 1
+        assert stats["by_subject"] == {"Physics": 1, "Maths": 1}
+        assert stats["by_type"] == {"LONG": 1, "MCQ": 1}
+
+        # Served from the cache until a write
+        await service.get_statistics(category="school")
+        assert len(rpc_calls) == 1
+
+        await service.update_question(first["id"], QuestionUpdate(subject="Maths"))
+        assert (await service.get_statistics(category="school"))["by_subject"] == {"Maths": 2}
+        await service.create_question(new_question())
+        assert (await service.get_statistics(category="school"))["total_questions"] == 3
+        assert len(rpc_calls) == 3
+
+    asyncio.run(scenario())
+
+
+def test_search_sends_filters_and_columns_to_the_rpc_and_maps_the_page():
+    async def scenario():
+        service, rpc_calls = service_for(FakeSupabase(latency_ms=0))
+        for i in range(5):
+            await service.create_question(new_question(question_text=f"Refraction through prism {i}"))
+        await service.create_question(new_question(question_text="Refraction in water", subject="Chemistry"))
+        await service.create_question(new_question(question_text="Newton's laws of motion"))
+
+        filters = QuestionFilter(search="refraction", subject="Physics", category="school")
+        questions, total, next_cursor = await service.get_all_questions(
+            filters, page=2, page_size=2, columns="question_text,topic"
+        )
+
+        assert rpc_calls == [("search_questions", {
+            "p_query": "refraction", "p_subject": "Physics", "p_class_grade": None, "p_topic": None,
+            "p_difficulty": None, "p_question_type": None, "p_is_starred": None, "p_category": "school",
+            "p_limit": 2, "p_offset": 2, "p_columns": ["question_text", "topic", "id", "created_at"],
+        })]
+        assert total == 5 and next_cursor is None
+        assert len(questions) == 2
+        assert all(set(q) == {"question_text", "topic", "id", "created_at"} for q in questions)
+        assert all(q["question_text"].startswith("Refraction through prism") for q in questions)
+
+        # Last, partial page; all columns when no select list is given
+        questions, total, _ = await service.get_all_questions(filters, page=3, page_size=2, include_total=False)
+        assert len(questions) == 1 and total is None
+        assert "question_type" in questions[0]
+        assert rpc_calls[-1][1]["p_offset"] == 4
+
+    asyncio.run(scenario())
+
+
+def test_toggle_star_calls_the_rpc_and_refreshes_cached_reads():
+    async def scenario():
+        service, rpc_calls = service_for(FakeSupabase(latency_ms=0))
+        question = await service.create_question(new_question())
+        starred = QuestionFilter(is_starred=True)
+
+        # Warm the caches the toggle has to refresh
+        assert (await service.get_question_by_id(question["id"]))["is_starred"] is False
+        assert (await service.get_all_questions(starred))[0] == []
+        assert (await service.get_statistics())["starred_count"] == 0
+
+        row = await service.toggle_star(question["id"])
+        assert rpc_calls[-1] == ("toggle_question_star", {"p_question_id": question["id"]})
+        assert row["id"] == question["id"] and row["is_starred"] is True
+
+        assert (await service.get_question_by_id(question["id"]))["is_starred"] is True
+        assert [q["id"] for q in (await service.get_all_questions(starred))[0]] == [question["id"]]
+        assert (await service.get_statistics())["starred_count"] == 1
+
+        await service.toggle_star(question["id"])
+        assert (await service.get_all_questions(starred))[0] == []
+
+        assert await service.toggle_star(uuid4()) is None
+
+    asyncio.run(scenario())
+
+
+def test_set_starred_sends_unique_ids_and_refreshes_cached_reads():
+    async def scenario():
+        service, rpc_calls = service_for(FakeSupabase(latency_ms=0))
+        first = await service.create_question(new_question())
+        second = await service.create_question(new_question(is_starred=True))
+        starred = QuestionFilter(is_starred=True)
+
+        assert [q["id"] for q in (await service.get_all_questions(starred))[0]] == [second["id"]]
+        assert (await service.get_question_by_id(first["id"]))["is_starred"] is False
+        assert (await service.get_statistics())["starred_count"] == 1
+
+        missing = str(uuid4())
+        updated = await service.set_starred([first["id"], first["id"], second["id"], missing], True)
+        assert rpc_calls[-1] == ("set_questions_starred", {
+            "p_question_ids": [first["id"], second["id"], missing], "p_is_starred": True,
+        })
+        # Only rows whose flag actually changed come back
+        assert updated == [first["id"]]
+
+        listed = {q["id"] for q in (await service.get_all_questions(starred))[0]}
+        assert listed == {first["id"], second["id"]}
+        assert (await service.get_question_by_id(first["id"]))["is_starred"] is True
+        assert (await service.get_statistics())["starred_count"] == 2
+
+        # Nothing changed, nothing to refresh; no ids, no round trip
+        calls = len(rpc_calls)
+        assert await service.set_starred([first["id"]], True) == []
+        assert await service.set_starred([], False) == []
+        assert len(rpc_calls) == calls + 1
+
+    asyncio.run(scenario())
+
+
+def decoys(row: dict, count: int) -> list:
+    """Rows sharing only the first LSH band with `row`: candidates, but not near-duplicates"""
+    signature = np.array(signature_columns(row)["minhash"], dtype=np.int64)
+    rows = []
+    for i in range(count):
+        decoy = signature.copy()
+        decoy[ROWS_PER_BAND:] = np.arange(len(decoy) - ROWS_PER_BAND) + (i + 1) * 1000
+        rows.append({"question_text": f"Decoy {i}", "minhash": decoy.tolist(), "similarity_bands": band_keys(decoy)})
+    return rows
+
+
+def test_near_duplicate_candidates_are_capped_per_row_best_first():
+    async def scenario():
+        fake = FakeSupabase(latency_ms=0)
+        service, rpc_calls = service_for(fake)
+        lens = {"question_text": "A convex lens has a focal length of 20 cm. Find its power."}
+        prism = {"question_text": "Describe the dispersion of white light by a glass prism."}
+
+        # 30 weak candidates for the first row, then its real duplicate (inserted last)
+        for decoy in decoys(lens, 30):
+            fake.insert("questions", decoy)
+        lens_copy = fake.insert("questions", {**lens, **signature_columns(lens)})
+        prism_copy = fake.insert("questions", {**prism, **signature_columns(prism)})
+
+        original = question_service.DUPLICATE_CANDIDATES_PER_ROW
+        question_service.DUPLICATE_CANDIDATES_PER_ROW = 5
+        try:
+            empty = {"question_text": ""}
+            matches = await service.find_near_duplicates([lens, empty, prism])
+        finally:
+            question_service.DUPLICATE_CANDIDATES_PER_ROW = original
+
+        assert [[m["id"] for m in row] for row in matches] == [[lens_copy["id"]], [], [prism_copy["id"]]]
+        name, params = rpc_calls[-1]
+        assert name == "near_duplicate_candidates" and params["p_per_row"] == 5
+        # Unsigned rows are left out of the request
+        assert [len(bands) for bands in params["p_row_bands"]] == [BANDS, BANDS]
+
+        # Rows that carry their signature are not signed again
+        signed = {**lens, "minhash": [0] * len(lens_copy["minhash"]), "similarity_bands": ["b0_none"]}
+        assert await service.find_near_duplicates([signed]) == [[]]
+        assert rpc_calls[-1][1]["p_row_bands"] == [["b0_none"]]
+
+    asyncio.run(scenario())
+
+
+def test_duplicate_report_clusters_stored_and_unsigned_rows():
+    async def scenario():
+        fake = FakeSupabase(latency_ms=0)
+        service, _ = service_for(fake)
+        lens = {"subject": "Physics", "question_text": "A convex lens has a focal length of 20 cm. Find its power."}
+        stored = fake.insert("questions", {**lens, **signature_columns(lens)})
+        # Written before signatures existed
+        unsigned = fake.insert("questions", {**lens, "question_text": lens["question_text"].replace("20", "35")})
+        fake.insert("questions", {"subject": "Physics", "question_text": "State Snell's law.",
+                                  **signature_columns({"question_text": "State Snell's law."})})
+        for decoy in decoys(lens, 3):
+            fake.insert("questions", {**decoy, "subject": "Physics"})
+        fake.insert("questions", {**lens, "subject": "Chemistry", **signature_columns(lens)})
+
+        report = await service.get_duplicate_report(subject="Physics")
+        assert report["scanned"] == 6
+        # The legacy row's signature was stored, so insert and import checks find it now
+        assert fake.tables["questions"][unsigned["id"]]["minhash"] is not None
+        (matches,) = await service.find_near_duplicates([lens], exclude_ids=[stored["id"]])
+        assert unsigned["id"] in {m["id"] for m in matches}
+        assert report["duplicate_pairs"] == 1
+        (cluster,) = report["clusters"]
+        assert cluster["size"] == 2
+        assert {q["id"] for q in cluster["questions"]} == {stored["id"], unsigned["id"]}
+        assert all(q["subject"] == "Physics" and q["similarity"] == 1.0 for q in cluster["questions"])
+        assert cluster["questions"][0]["question_text"].startswith("A convex lens")
+
+    asyncio.run(scenario())
+
+
+def test_failed_duplicate_lookup_does_not_fail_the_insert():
+    async def scenario():
+        fake = FakeSupabase(latency_ms=0)
+        service, _ = service_for(fake)
+
+        async def unavailable(rows, exclude_ids=None):
+            raise DatabaseTimeout("POST /rpc/near_duplicate_candidates")
+
+        service.find_near_duplicates = unavailable
+        app = FastAPI()
+        app.include_router(router, prefix="/questions")
+        app.dependency_overrides[get_question_service] = lambda: service
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post("/questions/", json=new_question().model_dump(mode="json"))
+
+        assert response.status_code == 201
+        assert "x-near-duplicate-ids" not in response.headers
+        assert list(fake.tables["questions"]) == [response.json()["id"]]
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_statistics_map_the_rpc_result_and_refresh_after_writes()
+    test_search_sends_filters_and_columns_to_the_rpc_and_maps_the_page()
+    test_toggle_star_calls_the_rpc_and_refreshes_cached_reads()
+    test_set_starred_sends_unique_ids_and_refreshes_cached_reads()
+    test_near_duplicate_candidates_are_capped_per_row_best_first()
+    test_duplicate_report_clusters_stored_and_unsigned_rows()
+    test_failed_duplicate_lookup_does_not_fail_the_insert()
+    print("PASS")
@@ -0,0 +1,62 @@
+import os
+import sys
+
+import numpy as np
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.question_similarity import (
+    NUM_PERM,
+    band_keys,
+    cluster_pairs,
+    duplicate_pairs,
+    match_candidates,
+    minhash,
+    normalize,
+    signature_columns,
+)
+
+QUESTIONS = [
+    {"question_text": "Calculate the kinetic energy of a 2 kg ball moving at 3 m/s."},
+    {"question_text": "Calculate the kinetic energy of a 5 kg ball moving at 10 m/s"},
+    {"question_text": "State Newton's third law of motion with an example."},
+    {"question_text": "Which gas is released during photosynthesis?",
+     "option_a": "Oxygen", "option_b": "Nitrogen", "option_c": "Carbon dioxide", "option_d": "Hydrogen"},
+    {"question_text": "Which gas is released in photosynthesis?",
+     "option_a": "Oxygen", "option_b": "Nitrogen", "option_c": "Carbon dioxide", "option_d": "Hydrogen"},
+]
+
+
+def test_numbers_and_punctuation_do_not_change_the_signature():
+    assert normalize(QUESTIONS[0]) == normalize(QUESTIONS[1])
+    columns = signature_columns(QUESTIONS[0])
+    assert len(columns["minhash"]) == NUM_PERM
+    assert columns == signature_columns(QUESTIONS[1])
+    assert signature_columns({"question_text": "  "}) == {"minhash": None, "similarity_bands": None}
+
+
+def test_candidates_are_confirmed_by_signature_similarity():
+    signature = minhash(normalize(QUESTIONS[3]))
+    candidates = [
+        {"id": "same", "minhash": signature.tolist()},
+        {"id": "reworded", "minhash": minhash(normalize(QUESTIONS[4])).tolist()},
+        {"id": "other", "minhash": minhash(normalize(QUESTIONS[2])).tolist()},
+    ]
+    matches = match_candidates(signature, candidates, exclude_id="same")
+    assert [m["id"] for m in matches] == ["reworded"]
+    assert band_keys(signature)[0].startswith("b0_")
+
+
+def test_batch_report_clusters_near_duplicates():
+    signatures = np.array([minhash(normalize(q)) for q in QUESTIONS])
+    pairs = duplicate_pairs(signatures)
+    assert {(i, j) for i, j, _ in pairs} == {(0, 1), (3, 4)}
+    assert cluster_pairs(pairs) == [[0, 1], [3, 4]]
+
+
+if __name__ == "__main__":
+    test_numbers_and_punctuation_do_not_change_the_signature()
+    test_candidates_are_confirmed_by_signature_similarity()
+    test_batch_report_clusters_near_duplicates()
+    print("PASS")
@@ -0,0 +1,111 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import tempfile
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core import structured_logging
+from app.core.structured_logging import (
+    DebugSamplingFilter,
+    JSONFormatter,
+    NonBlockingQueueHandler,
+    RequestIdFilter,
+    RequestIdMiddleware,
+    SizeAndTimeRotatingFileHandler,
+)
+
+
+def make_record(message, level=logging.INFO, **extra):
+    record = logging.LogRecord("app.test", level, __file__, 1, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_records_carry_the_request_id_as_json():
+    app = FastAPI()
+    records = []
+
+    @app.get("/work")
+    def work():
+        record = make_record("working", question_count=3)
+        RequestIdFilter().filter(record)
+        records.append(record)
+        return {}
+
+    app.add_middleware(RequestIdMiddleware)
+    client = TestClient(app)
+
+    res = client.get("/work", headers={"X-Request-ID": "abc123"})
+    assert res.headers["x-request-id"] == "abc123"
+    entry = json.loads(JSONFormatter().format(records[0]))
+    assert entry["request_id"] == "abc123"
+    assert entry["message"] == "working"
+    assert entry["question_count"] == 3
+
+    # One is generated when the client sends none
+    generated = client.get("/work").headers["x-request-id"]
+    assert len(generated) == 32
+    assert records[1].request_id == generated
+
+
+def test_full_queue_drops_and_counts_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    before = REGISTRY.get_sample_value("log_records_dropped_total") or 0.0
+    for i in range(3):
+        handler.handle(make_record("burst %d"))
+    assert handler.queue.qsize() == 1
+    assert REGISTRY.get_sample_value("log_records_dropped_total") - before == 2
+
+
+def test_debug_records_are_sampled_but_warnings_never_are():
+    sampler = DebugSamplingFilter(0.0)
+    assert not sampler.filter(make_record("chatty", logging.DEBUG))
+    assert sampler.filter(make_record("quota", logging.WARNING))
+    assert DebugSamplingFilter(1.0).filter(make_record("chatty", logging.DEBUG))
+
+
+def test_files_rotate_on_size_and_age():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "app.log")
+        handler = SizeAndTimeRotatingFileHandler(path, max_bytes=200, interval=3600, backup_count=2)
+        handler.setFormatter(JSONFormatter())
+        for i in range(10):
+            handler.handle(make_record("x" * 50))
+        assert os.path.exists(path + ".1")
+        assert not os.path.exists(path + ".3")
+
+        handler.rollover_at = 0
+        handler.handle(make_record("new day"))
+        handler.close()
+        with open(path) as f:
+            assert [json.loads(line)["message"] for line in f] == ["new day"]
+
+
+def test_several_workers_append_without_rotating():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "app.log")
+        single = structured_logging._file_handler(path, workers=1)
+        shared = structured_logging._file_handler(path, workers=4)
+        assert isinstance(single, SizeAndTimeRotatingFileHandler)
+        assert isinstance(shared, logging.handlers.WatchedFileHandler)
+        assert not isinstance(shared, logging.handlers.RotatingFileHandler)
+        single.close()
+        shared.close()
+
+
+if __name__ == "__main__":
+    test_records_carry_the_request_id_as_json()
+    test_full_queue_drops_and_counts_instead_of_blocking()
+    test_debug_records_are_sampled_but_warnings_never_are()
+    test_files_rotate_on_size_and_age()
+    test_several_workers_append_without_rotating()
+    print("PASS")
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from postgrest import AsyncPostgrestClient
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# app.core.database needs (JWT-shaped) credentials at import time; no request is sent
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+
+from app.api.v1.endpoints import student
+from app.core.auth_deps import get_current_user
+from app.core.pagination import encode_cursor
+from app.models.user import AuthenticatedUser
+from app.services.student_service import StudentService
+
+NOTES = [
+    {"id": f"n{i}", "title": f"Note {i}", "created_at": f"2026-01-0{i}T10:00:00+00:00"}
+    for i in range(5, 0, -1)
+]
+
+
+class FakeStudentService:
+    """Serves NOTES newest first and records which queries ran"""
+
+    def __init__(self):
+        self.calls = []
+        self.limits = []
+
+    async def get_latest(self, listing, user_id, cursor=None):
+        self.calls.append("latest")
+        return NOTES[0] if NOTES else None
+
+    async def get_notes(self, user_id, columns="*", limit=None, cursor=None):
+        self.calls.append("page")
+        self.limits.append(limit)
+        start = 0
+        if cursor:
+            start = next(i for i, n in enumerate(NOTES) if encode_cursor(n["created_at"], n["id"]) == cursor) + 1
+        if limit is None:
+            return NOTES[start:], None
+        page = NOTES[start:start + limit]
+        more = start + limit < len(NOTES)
+        return page, encode_cursor(page[-1]["created_at"], page[-1]["id"]) if more else None
+
+
+class FakeProfileService:
+    async def get_identity(self, user):
+        return {"id": user.id, "role": "student", "category": None}
+
+
+def make_client():
+    service = FakeStudentService()
+    app = FastAPI()
+    app.include_router(student.router, prefix="/student")
+    app.dependency_overrides[get_current_user] = lambda: AuthenticatedUser(id="u1")
+    app.dependency_overrides[student.get_services] = lambda: {"student": service, "profile": FakeProfileService()}
+    return TestClient(app), service
+
+
+def test_listing_is_paginated_with_a_cursor_header():
+    client, _ = make_client()
+
+    first = client.get("/student/notes", params={"limit": 2})
+    assert first.status_code == 200
+    assert [n["id"] for n in first.json()] == ["n5", "n4"]
+    assert first.headers["Last-Modified"] == "Mon, 05 Jan 2026 10:00:00 GMT"
+
+    second = client.get("/student/notes", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert [n["id"] for n in second.json()] == ["n3", "n2"]
+
+
+def test_listing_without_limit_or_cursor_returns_everything():
+    client, service = make_client()
+
+    response = client.get("/student/notes")
+    assert [n["id"] for n in response.json()] == [n["id"] for n in NOTES]
+    assert "X-Next-Cursor" not in response.headers
+
+    # A cursor alone pages with the default size
+    cursor = encode_cursor(NOTES[0]["created_at"], NOTES[0]["id"])
+    client.get("/student/notes", params={"cursor": cursor})
+    assert service.limits == [None, student.DEFAULT_PAGE_SIZE]
+
+
+def test_unchanged_listing_answers_304_without_loading_content():
+    client, service = make_client()
+    etag = client.get("/student/notes", params={"limit": 2}).headers["ETag"]
+    service.calls.clear()
+
+    cached = client.get("/student/notes", params={"limit": 2}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert service.calls == ["latest"]
+
+    other_page_size = client.get("/student/notes", params={"limit": 3}, headers={"If-None-Match": etag})
+    assert other_page_size.status_code == 200
+
+
+class ConcurrencyDatabase:
+    """Real query builders, fake execution that measures how many queries overlap"""
+
+    def __init__(self):
+        self.client = AsyncPostgrestClient("http://localhost:54321/rest/v1")
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.queries = []
+
+    def table(self, name):
+        return self.client.from_(name)
+
+    async def execute(self, query):
+        self.queries.append(query)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        table = query.path.strip("/")
+        return SimpleNamespace(count=len(table), data=[{"id": f"{table}-1"}])
+
+
+def test_dashboard_queries_all_listings_concurrently():
+    db = ConcurrencyDatabase()
+    dashboard = asyncio.run(StudentService(db).get_dashboard("u1", recent=3))
+
+    assert db.max_in_flight == 4
+    assert dashboard["counts"] == {"notes": 10, "flashcards": 15, "quizzes": 12, "mindmaps": 13}
+    assert dashboard["recent"]["quizzes"] == [{"id": "user_quizzes-1"}]
+    params = dict(db.queries[0].params)
+    assert params["limit"] == "3" and params["user_id"] == "eq.u1"
+    assert "content" not in params["select"]
+
+
+if __name__ == "__main__":
+    test_listing_is_paginated_with_a_cursor_header()
+    test_listing_without_limit_or_cursor_returns_everything()
+    test_unchanged_listing_answers_304_without_loading_content()
+    test_dashboard_queries_all_listings_concurrently()
+    print("PASS")
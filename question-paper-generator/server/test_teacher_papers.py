@@ -0,0 +1,79 @@
+import os
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add server dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# app.core.database needs (JWT-shaped) credentials at import time; no request is sent
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+
+from app.api.v1.endpoints import teacher
+from app.core.auth_deps import get_current_user
+from app.models.user import AuthenticatedUser
+from app.services.teacher_service import PAPER_SUMMARY_FIELDS
+
+PAPER = {
+    "id": "p1", "title": "Unit test", "category": "school", "total_marks": 80, "duration_minutes": 90,
+    "instructions": "Answer all questions.", "questions": [{"question_text": "Define work."}],
+    "created_at": "2026-01-05T10:00:00+00:00", "updated_at": None, "question_count": 1,
+}
+
+
+class FakeTeacherService:
+    """Projects PAPER to the requested columns and records them"""
+
+    def __init__(self):
+        self.columns = []
+
+    async def get_papers(self, user_id, columns="*"):
+        self.columns.append(columns)
+        if columns == "*":
+            return [PAPER]
+        return [{c: PAPER[c] for c in columns.split(",")}]
+
+
+class FakeProfileService:
+    async def get_identity(self, user):
+        return {"id": user.id, "role": "teacher", "category": None}
+
+
+def make_client():
+    service = FakeTeacherService()
+    app = FastAPI()
+    app.include_router(teacher.router, prefix="/teacher")
+    app.dependency_overrides[get_current_user] = lambda: AuthenticatedUser(id="u1")
+    app.dependency_overrides[teacher.get_services] = lambda: {"teacher": service, "profile": FakeProfileService()}
+    return TestClient(app), service
+
+
+def test_summary_fields_leave_out_the_embedded_questions():
+    client, service = make_client()
+
+    response = client.get("/teacher/papers", params={"fields": "summary"})
+    assert response.status_code == 200
+    assert service.columns == [",".join(PAPER_SUMMARY_FIELDS)]
+    assert set(response.json()[0]) == set(PAPER_SUMMARY_FIELDS)
+    assert "questions" not in response.json()[0]
+
+    client.get("/teacher/papers", params={"fields": "title,total_marks"})
+    client.get("/teacher/papers")
+    assert service.columns[1:] == ["id,title,total_marks", "*"]
+
+
+def test_unknown_field_is_rejected_before_querying():
+    client, service = make_client()
+
+    response = client.get("/teacher/papers", params={"fields": "title,password"})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unknown fields: password"}
+    assert service.columns == []
+
+
+if __name__ == "__main__":
+    test_summary_fields_leave_out_the_embedded_questions()
+    test_unknown_field_is_rejected_before_querying()
+    print("PASS")